@@ -0,0 +1,89 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from edit_dialog import center_window
+
+
+# Окно группового запуска: список баз со статусом каждой.
+#   rows — [(ключ, наименование)]
+#   on_cancel() — остановить оставшиеся запуски
+# Возвращает (set_status(ключ, текст), set_done(cancelled)).
+def open_batch_dialog(master, rows, on_cancel):
+    dialog = tk.Toplevel(master)
+    dialog.title("Групповой запуск")
+    dialog.transient(master)
+
+    center_window(master, dialog, 480, 320)
+
+    progress_var = tk.StringVar(value=f"Баз: {len(rows)}")
+    ttk.Label(dialog, textvariable=progress_var).pack(anchor="w", padx=10, pady=(10, 4))
+
+    tree = ttk.Treeview(dialog, columns=("status",), show="tree headings", selectmode="none")
+    tree.heading("#0", text="База")
+    tree.heading("status", text="Состояние")
+    tree.column("#0", width=260)
+    tree.column("status", width=180)
+    tree.pack(fill="both", expand=True, padx=10, pady=4)
+
+    for key, title in rows:
+        tree.insert("", "end", iid=key, text=title, values=("",))
+
+    button_frame = ttk.Frame(dialog)
+    button_frame.pack(fill="x", padx=10, pady=(4, 10))
+
+    running = [True]
+
+    def close():
+        if running[0]:
+            on_cancel()
+
+        dialog.destroy()
+
+    button = ttk.Button(button_frame, text="Отмена", command=close)
+    button.pack(side="right")
+
+    dialog.protocol("WM_DELETE_WINDOW", close)
+
+    def set_status(key, text):
+        if dialog.winfo_exists() and tree.exists(key):
+            tree.set(key, "status", text)
+            tree.see(key)
+
+    def set_done(cancelled):
+        running[0] = False
+
+        if dialog.winfo_exists():
+            progress_var.set("Запуск отменён" if cancelled else "Все базы обработаны")
+            button.configure(text="Закрыть")
+
+    return set_status, set_done
+
+
+# Запрос имени набора баз; on_save(имя)
+def open_workspace_name_dialog(master, count, on_save, name=""):
+    dialog = tk.Toplevel(master)
+    dialog.title("Сохранить набор")
+    dialog.transient(master)
+    dialog.grab_set()
+
+    center_window(master, dialog, 360, 130)
+
+    ttk.Label(dialog, text=f"Баз в наборе: {count}. Название набора:").pack(anchor="w", padx=10, pady=(10, 4))
+
+    name_var = tk.StringVar(value=name)
+    entry = ttk.Entry(dialog, textvariable=name_var)
+    entry.pack(fill="x", padx=10)
+    entry.focus_set()
+
+    def save():
+        value = name_var.get().strip()
+
+        if not value:
+            messagebox.showerror("Набор", "Введите название набора.", parent=dialog)
+            return
+
+        on_save(value)
+        dialog.destroy()
+
+    entry.bind("<Return>", lambda e: save())
+
+    ttk.Button(dialog, text="Сохранить", command=save).pack(pady=(8, 10))
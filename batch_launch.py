@@ -0,0 +1,89 @@
+from collections import deque
+
+# Групповой запуск баз: по concurrency баз за раз с паузой stagger_ms
+# между волнами, чтобы десяток 1cv8 не стартовал одновременно и не
+# упирался в диск и сервер лицензий. Всё выполняется в потоке Tk через
+# after; сам запуск (launch) только создаёт процесс и быстро возвращается.
+#   launch(ключ) — запускает; исключение означает ошибку запуска этой базы
+#   on_status(ключ, статус, текст ошибки)
+#   on_done(cancelled)
+
+BATCH_CONCURRENCY = 2
+BATCH_STAGGER_SECONDS = 3
+
+STATUS_WAITING = "waiting"
+STATUS_LAUNCHED = "launched"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+STATUS_TEXT = {
+    STATUS_WAITING: "в очереди",
+    STATUS_LAUNCHED: "запущена",
+    STATUS_FAILED: "ошибка",
+    STATUS_CANCELLED: "отменена"
+}
+
+
+class BatchLauncher:
+    def __init__(self, after, after_cancel, launch, on_status, on_done=None,
+                 concurrency=BATCH_CONCURRENCY, stagger_ms=BATCH_STAGGER_SECONDS * 1000):
+        self.after = after
+        self.after_cancel = after_cancel
+        self.launch = launch
+        self.on_status = on_status
+        self.on_done = on_done
+        self.concurrency = max(1, concurrency)
+        self.stagger_ms = max(0, stagger_ms)
+
+        self.running = False
+        self._queue = deque()
+        self._timer = None
+
+    def start(self, keys):
+        self._queue = deque(dict.fromkeys(keys))
+        self.running = True
+
+        for key in self._queue:
+            self.on_status(key, STATUS_WAITING, "")
+
+        self._tick()
+
+    def _tick(self):
+        self._timer = None
+
+        for _ in range(self.concurrency):
+            if not self._queue:
+                break
+
+            key = self._queue.popleft()
+
+            try:
+                self.launch(key)
+            except Exception as e:
+                self.on_status(key, STATUS_FAILED, str(e))
+            else:
+                self.on_status(key, STATUS_LAUNCHED, "")
+
+        if self._queue:
+            self._timer = self.after(self.stagger_ms, self._tick)
+        else:
+            self._finish(False)
+
+    def cancel(self):
+        if not self.running:
+            return
+
+        if self._timer is not None:
+            self.after_cancel(self._timer)
+            self._timer = None
+
+        while self._queue:
+            self.on_status(self._queue.popleft(), STATUS_CANCELLED, "")
+
+        self._finish(True)
+
+    def _finish(self, cancelled):
+        self.running = False
+
+        if self.on_done:
+            self.on_done(cancelled)
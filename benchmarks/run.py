@@ -0,0 +1,275 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import parse_mix, write_dataset  # noqa: E402
+from catalog import Catalog  # noqa: E402
+from persistence import atomic_write_json, default_starter, format_json, load_starter  # noqa: E402
+from search import SearchIndex  # noqa: E402
+from settings_dialog import parse_v8i_file  # noqa: E402
+from tree_layout import build_tree_layout  # noqa: E402
+from tree_reconciler import TreeReconciler  # noqa: E402
+from v8i import import_v8i_files  # noqa: E402
+
+# Бенчмарки основных операций над каталогом баз.
+#
+#   python -m benchmarks.run --sizes 100,1000,10000,50000 --out bench.json
+#   python -m benchmarks.run --baseline bench_baseline.json
+#
+# Результаты пишутся в JSON; с --baseline операции, ставшие медленнее
+# порога, перечисляются в конце, а код возврата становится 1.
+
+DEFAULT_SIZES = (100, 1000, 10000, 50000)
+
+SEARCH_QUERIES = ["бух", "srv03", "8.3.24", "архив 1", "demo dev", "web2.local", "кадры"]
+FUZZY_QUERIES = ["бухг", "зрпл", "тст 12", "dmo", "склад 9"]
+
+
+def timed(func, setup=None, repeat=5):
+    times = []
+
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        func(*args)
+        times.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "min_ms": round(min(times), 3),
+        "median_ms": round(statistics.median(times), 3),
+        "repeat": repeat
+    }
+
+
+# Treeview для замера вставки в дерево; без дисплея замер пропускается
+def make_tree():
+    try:
+        import tkinter as tk
+        from tkinter import ttk
+
+        root = tk.Tk()
+        root.withdraw()
+
+    except Exception:
+        return None, None
+
+    return root, ttk.Treeview(root, columns=("platform", "last_run", "size"))
+
+
+def bench_size(bases, workdir, repeat, mix, seed):
+    paths = write_dataset(os.path.join(workdir, str(bases)), bases, mix=mix, seed=seed)
+
+    with open(paths["starter"], "r", encoding="utf-8") as f:
+        starter_text = f.read()
+
+    def fresh_data():
+        return json.loads(starter_text)
+
+    def fresh_catalog():
+        return Catalog(fresh_data())
+
+    rng = random.Random(seed)
+    catalog = fresh_catalog()
+    base_ids = [node_id for node_id, node in catalog.nodes.items() if node.get("type") == "base"]
+    group_ids = [node_id for node_id, node in catalog.nodes.items() if node.get("type") == "group"]
+    out_path = os.path.join(workdir, "save.json")
+    results = {}
+
+    results["load_json"] = timed(lambda: load_starter(paths["starter"]), repeat=repeat)
+    results["save_json"] = timed(lambda: atomic_write_json(out_path, catalog.data), repeat=repeat)
+    results["save_json_compact"] = timed(lambda: atomic_write_json(out_path, catalog.data, compact=True), repeat=repeat)
+
+    # Часть отложенной записи, которая выполняется в потоке Tk
+    results["save_json_snapshot"] = timed(lambda: format_json(catalog.data, compact=True), repeat=repeat)
+
+    results["catalog_build"] = timed(Catalog, setup=lambda: (fresh_data(),), repeat=repeat)
+
+    results["populate_tree_lazy"] = timed(
+        lambda c: build_tree_layout(c, "", set()),
+        setup=lambda: (fresh_catalog(),),
+        repeat=repeat
+    )
+    results["populate_tree_full"] = timed(
+        lambda c: build_tree_layout(c, "", None),
+        setup=lambda: (fresh_catalog(),),
+        repeat=repeat
+    )
+    results["populate_tree_full_warm"] = timed(lambda: build_tree_layout(catalog, "", None), repeat=repeat)
+
+    root, tree = make_tree()
+
+    if tree is not None:
+        layout, rows, _ = build_tree_layout(catalog, "", None)
+
+        def first_sync():
+            tree.delete(*tree.get_children())
+            reconciler = TreeReconciler(tree)
+            return (reconciler,)
+
+        results["populate_tree_sync"] = timed(lambda r: r.sync(layout, rows), setup=first_sync, repeat=repeat)
+
+        reconciler = TreeReconciler(tree)
+        tree.delete(*tree.get_children())
+        reconciler.sync(layout, rows)
+        results["populate_tree_resync"] = timed(lambda: reconciler.sync(layout, rows), repeat=repeat)
+
+        root.destroy()
+
+    top_ids = [group["id"] for group in catalog.groups]
+
+    def count_all(c):
+        for group_id in top_ids:
+            c.count_bases(group_id)
+
+    results["count_bases_cold"] = timed(count_all, setup=lambda: (fresh_catalog(),), repeat=repeat)
+    results["count_bases_warm"] = timed(lambda: count_all(catalog), repeat=repeat)
+
+    def search_all(index):
+        for query in SEARCH_QUERIES:
+            index.search(query)
+
+    results["search_index_build"] = timed(
+        lambda c: SearchIndex(c).search("1"),
+        setup=lambda: (fresh_catalog(),),
+        repeat=repeat
+    )
+
+    index = SearchIndex(catalog)
+    index.search("1")
+    results["collect_search_results"] = timed(lambda: search_all(index), repeat=repeat)
+    results["fuzzy_search"] = timed(lambda: [index.fuzzy_search(query) for query in FUZZY_QUERIES], repeat=repeat)
+
+    update_ids = rng.sample(base_ids, min(100, len(base_ids)))
+
+    def update_all(c):
+        for number, base_id in enumerate(update_ids):
+            c.update_base(base_id, {"platform": "8.3.26.1", "last_run": f"2026-01-{number % 28 + 1:02d}"})
+
+    def indexed_catalog():
+        c = fresh_catalog()
+        SearchIndex(c)
+        return (c,)
+
+    results["update_base_everywhere"] = timed(update_all, setup=indexed_catalog, repeat=repeat)
+
+    move_ids = rng.sample(base_ids, max(1, min(500, len(base_ids) // 100)))
+    target_id = group_ids[-1]
+
+    def move_all(c):
+        c.move(move_ids, c.get(target_id))
+
+    results["move_selected_nodes"] = timed(move_all, setup=indexed_catalog, repeat=repeat)
+
+    results["parse_v8i_file"] = timed(lambda: parse_v8i_file(paths["v8i"]), repeat=repeat)
+    results["settings_import_empty"] = timed(
+        lambda catalog: import_v8i_files(catalog, [paths["v8i"]]),
+        setup=lambda: (Catalog(default_starter()),),
+        repeat=repeat
+    )
+    results["settings_import_existing"] = timed(
+        lambda catalog: import_v8i_files(catalog, [paths["v8i"]]),
+        setup=lambda: (Catalog(fresh_data()),),
+        repeat=repeat
+    )
+
+    return results
+
+
+# [(размер, операция, было, стало)] для операций медленнее порога
+def compare(results, baseline, threshold, min_delta_ms=1.0):
+    regressions = []
+
+    for size, operations in results.items():
+        for name, current in operations.items():
+            previous = baseline.get(size, {}).get(name)
+            if previous is None:
+                continue
+
+            before = previous["median_ms"]
+            after = current["median_ms"]
+
+            if after > before * threshold and after - before > min_delta_ms:
+                regressions.append((size, name, before, after))
+
+    return regressions
+
+
+def print_table(results, baseline=None):
+    for size, operations in results.items():
+        print(f"\n{size} баз")
+
+        for name, current in operations.items():
+            line = f"  {name:<28}{current['median_ms']:>12.3f} мс"
+            previous = (baseline or {}).get(size, {}).get(name)
+
+            if previous and previous["median_ms"]:
+                line += f"   x{current['median_ms'] / previous['median_ms']:.2f}"
+
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки CatStarter")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--mix", default="file:0.6,srvr:0.3,ws:0.1")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--baseline", help="файл с результатами прошлого запуска для сравнения")
+    parser.add_argument("--threshold", type=float, default=1.25, help="допустимое замедление, раз")
+    parser.add_argument("--workdir", help="каталог для синтетических данных (по умолчанию временный)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+
+        for size in sizes:
+            print(f"[*] {size} баз...")
+            results[str(size)] = bench_size(size, workdir, args.repeat, parse_mix(args.mix), args.seed)
+
+    baseline = None
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+
+    print_table(results, baseline)
+
+    atomic_write_json(args.out, {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "mix": args.mix
+        },
+        "results": results
+    })
+
+    print(f"\n[*] Результаты: {args.out}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+
+        for size, name, before, after in regressions:
+            print(f"[!] {size} баз, {name}: {before:.3f} → {after:.3f} мс")
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+import argparse
+import json
+import os
+import random
+import sys
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from persistence import atomic_write_json  # noqa: E402
+
+# Генератор синтетических starter.json, commands.json и ibases.v8i
+# заданного размера для бенчмарков.
+#
+#   python -m benchmarks.synthetic --bases 10000 --out bench_data
+
+DEFAULT_MIX = {"file": 0.6, "srvr": 0.3, "ws": 0.1}
+
+PLATFORMS = ["8.3.22.1709", "8.3.23.1865", "8.3.24.1342", "8.3.25.1257", "8.2.19.130"]
+
+WORDS = [
+    "Бухгалтерия", "Зарплата", "Торговля", "Склад", "Розница", "Управление",
+    "Документооборот", "Холдинг", "Филиал", "Архив", "Тест", "Копия",
+    "Производство", "Финансы", "Кадры", "Отчётность", "Demo", "Dev"
+]
+
+
+def parse_mix(text):
+    mix = {}
+
+    for part in text.split(","):
+        kind, _, weight = part.partition(":")
+        mix[kind.strip().lower()] = float(weight or 1)
+
+    return mix
+
+
+def make_connect(kind, name, number):
+    if kind == "srvr":
+        return f'Srvr="srv{number % 17:02d}";Ref="{name}";'
+
+    if kind == "ws":
+        return f'ws="http://web{number % 5}.local/{name}";'
+
+    return f'File="D:\\Bases\\{name}";'
+
+
+def make_id(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128)))
+
+
+# Дерево групп глубиной depth; баз в среднем около 25 на группу
+def generate_catalog(bases, depth=3, favorites_ratio=0.05, mix=None, seed=1):
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+
+    group_count = max(1, bases // 25)
+    fanout = max(2, round(group_count ** (1 / max(1, depth))))
+
+    top = []
+    groups = []
+    level = []
+
+    for index in range(min(fanout, group_count)):
+        group = {"type": "group", "id": make_id(rng), "name": f"{rng.choice(WORDS)} {index}", "children": []}
+        top.append(group)
+        level.append(group)
+
+    groups.extend(level)
+
+    for _ in range(depth - 1):
+        next_level = []
+
+        for parent in level:
+            for index in range(fanout):
+                if len(groups) >= group_count:
+                    break
+
+                group = {"type": "group", "id": make_id(rng), "name": f"{rng.choice(WORDS)} {index}", "children": []}
+                parent["children"].append(group)
+                next_level.append(group)
+                groups.append(group)
+
+        level = next_level or level
+
+    favorites = []
+
+    for number in range(bases):
+        name = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {number}"
+        kind = rng.choices(kinds, weights)[0]
+        last_run = ""
+
+        if rng.random() < 0.4:
+            last_run = f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+        base = {
+            "type": "base",
+            "id": make_id(rng),
+            "name": name,
+            "platform": rng.choice(PLATFORMS),
+            "connect": make_connect(kind, name, number),
+            "parameters": "",
+            "interface": "Auto",
+            "username": "",
+            "password": "",
+            "last_run": last_run,
+            "size": f"{rng.randint(1, 900)}.0 МБ" if kind == "file" else ""
+        }
+
+        rng.choice(groups)["children"].append(base)
+
+        if rng.random() < favorites_ratio:
+            favorites.append(base["id"])
+
+    return {
+        "favorites": favorites,
+        "groups": top,
+        "window_geometry": "900x600",
+        "open_nodes": [group["id"] for group in top]
+    }
+
+
+def generate_commands(count=50, seed=1):
+    rng = random.Random(seed)
+    groups = []
+
+    for group_index in range(max(1, count // 10)):
+        group = {"type": "group", "id": make_id(rng), "name": f"Команды {group_index}", "children": []}
+        groups.append(group)
+
+    for index in range(count):
+        rng.choice(groups)["children"].append({
+            "type": "command",
+            "id": make_id(rng),
+            "name": f"Команда {index}",
+            "command_type": "cmd",
+            "command": "cmd.exe",
+            "parameters": f"/c echo {index}",
+            "workdir": ""
+        })
+
+    return {"groups": groups}
+
+
+# ibases.v8i с теми же базами, папки — по пути группы
+def write_v8i(path, starter):
+    lines = []
+    names = set()
+
+    def walk(children, folder):
+        for child in children:
+            if child.get("type") == "group":
+                walk(child.get("children", []), f"{folder}/{child['name']}")
+                continue
+
+            section = child["name"]
+
+            while section in names:
+                section += " (копия)"
+
+            names.add(section)
+            lines.extend([
+                f"[{section}]",
+                f"Connect={child['connect']}",
+                f"ID={child['id']}",
+                f"OrderInList={len(names)}",
+                f"Folder={folder or '/'}",
+                "External=0",
+                "ClientConnectionSpeed=Normal",
+                "App=Auto",
+                "WA=1",
+                f"Version={child['platform']}",
+                ""
+            ])
+
+    walk(starter.get("groups", []), "")
+
+    with open(path, "w", encoding="utf-8-sig") as f:
+        f.write("\n".join(lines))
+
+
+def write_dataset(directory, bases, depth=3, favorites_ratio=0.05, mix=None, seed=1):
+    os.makedirs(directory, exist_ok=True)
+
+    starter = generate_catalog(bases, depth, favorites_ratio, mix, seed)
+    paths = {
+        "starter": os.path.join(directory, "starter.json"),
+        "commands": os.path.join(directory, "commands.json"),
+        "v8i": os.path.join(directory, "ibases.v8i")
+    }
+
+    atomic_write_json(paths["starter"], starter)
+    atomic_write_json(paths["commands"], generate_commands(max(10, bases // 100), seed))
+    write_v8i(paths["v8i"], starter)
+
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Синтетические данные для бенчмарков CatStarter")
+    parser.add_argument("--bases", type=int, default=1000)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--favorites", type=float, default=0.05, help="доля баз в избранном")
+    parser.add_argument("--mix", default="file:0.6,srvr:0.3,ws:0.1", help="доли типов подключения")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default="bench_data")
+    args = parser.parse_args()
+
+    paths = write_dataset(args.out, args.bases, args.depth, args.favorites, parse_mix(args.mix), args.seed)
+    print(json.dumps(paths, ensure_ascii=False, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,395 @@
+import uuid
+
+# Модель каталога баз поверх словаря starter.json.
+#
+# Сам словарь остаётся единственным хранилищем данных и сохраняется
+# как есть, а Catalog держит рядом индексы id → узел, id → родитель
+# и путь → группа. Все изменения структуры должны идти через методы
+# каталога, чтобы индексы не расходились с данными.
+#
+# Избранное хранится списком id баз (favorites), а не копиями: у базы
+# один объект, и правка или переименование сразу видны в избранном.
+# Старый формат с копиями баз переводится в список id при загрузке.
+
+# Группа для баз, которые были только в избранном (копия без базы в дереве)
+ORPHAN_FAVORITES_GROUP = "Из избранного"
+
+
+def ensure_id(item):
+    if not item.get("id"):
+        item["id"] = str(uuid.uuid4())
+    return item["id"]
+
+
+# Порядок отображения: сначала группы, затем элементы с "_" в начале имени,
+# остальные — по алфавиту без учёта регистра
+def display_sort_key(node):
+    name = node.get("name", "")
+    return (node.get("type") != "group", not name.startswith("_"), name.lower())
+
+
+def platform_matches(item, platform_filter):
+    if not platform_filter:
+        return True
+
+    return item.get("platform", "").startswith(platform_filter)
+
+
+class Catalog:
+    def __init__(self, data):
+        self.data = data
+        self.data.setdefault("groups", [])
+        self.data.setdefault("favorites", [])
+        self.listeners = []
+        self.rebuild()
+
+    @property
+    def groups(self):
+        return self.data["groups"]
+
+    # Список id избранных баз
+    @property
+    def favorites(self):
+        return self.data["favorites"]
+
+    def rebuild(self):
+        self.nodes = {}
+        self.parents = {}
+        self._paths = None
+        self._counts = {}
+
+        for node in self.groups:
+            self._register(node, None)
+
+        self._load_favorites()
+        self._notify("rebuild", None)
+
+    # Приводит favorites к списку id существующих баз без повторов.
+    # Копия из старого формата сопоставляется с базой по id, затем по
+    # наименованию и строке подключения; копия без базы переносится
+    # в группу ORPHAN_FAVORITES_GROUP, чтобы не потерять её данные.
+    def _load_favorites(self):
+        ids = []
+        by_name_connect = None
+        self.favorites_migrated = False
+
+        for fav in self.favorites:
+            if not isinstance(fav, dict):
+                ids.append(fav)
+                continue
+
+            self.favorites_migrated = True
+
+            fav_id = fav.get("id")
+
+            if fav_id not in self.nodes:
+                if by_name_connect is None:
+                    by_name_connect = {
+                        (node.get("name", ""), node.get("connect", "")): node_id
+                        for node_id, node in self.nodes.items() if node.get("type") == "base"
+                    }
+
+                fav_id = by_name_connect.get((fav.get("name", ""), fav.get("connect", "")))
+
+            if fav_id is None and fav.get("type") == "base":
+                group = self._orphan_group()
+                group.setdefault("children", []).append(fav)
+                self._register(fav, group)
+
+                fav_id = fav["id"]
+                by_name_connect[(fav.get("name", ""), fav.get("connect", ""))] = fav_id
+
+            if fav_id is not None:
+                ids.append(fav_id)
+
+        seen = set()
+        self.favorites[:] = [
+            fav_id for fav_id in ids
+            if self._is_base(fav_id) and not (fav_id in seen or seen.add(fav_id))
+        ]
+        self.favorite_ids = seen
+
+    def _is_base(self, node_id):
+        node = self.nodes.get(node_id)
+        return node is not None and node.get("type") == "base"
+
+    def _orphan_group(self):
+        for group in self.groups:
+            if group.get("type") == "group" and group.get("name") == ORPHAN_FAVORITES_GROUP:
+                return group
+
+        group = {"type": "group", "name": ORPHAN_FAVORITES_GROUP, "children": []}
+        self.groups.append(group)
+        self._register(group, None)
+        return group
+
+    # Подписчики получают (событие, узел): add, remove, rename, update, rebuild
+    def subscribe(self, callback):
+        self.listeners.append(callback)
+
+    def _notify(self, event, node):
+        for callback in self.listeners:
+            callback(event, node)
+
+    def _register(self, node, parent):
+        stack = [(node, parent)]
+
+        while stack:
+            current, current_parent = stack.pop()
+            node_id = ensure_id(current)
+
+            # Повторяющийся id (например, скопированный руками узел) получает новый
+            if node_id in self.nodes and self.nodes[node_id] is not current:
+                current["id"] = ""
+                node_id = ensure_id(current)
+
+            self.nodes[node_id] = current
+            self.parents[node_id] = current_parent
+
+            if current.get("type") == "group":
+                for child in reversed(current.get("children", [])):
+                    stack.append((child, current))
+
+    def _unregister(self, node):
+        stack = [node]
+
+        while stack:
+            current = stack.pop()
+            node_id = current.get("id")
+            self.nodes.pop(node_id, None)
+            self.parents.pop(node_id, None)
+
+            if current.get("type") == "group":
+                stack.extend(current.get("children", []))
+
+    def children_of(self, parent):
+        if parent is None:
+            return self.groups
+
+        return parent.setdefault("children", [])
+
+    def get(self, node_id):
+        return self.nodes.get(node_id)
+
+    def parent_of(self, node_id):
+        return self.parents.get(node_id)
+
+    def ancestors(self, node_id):
+        result = []
+        parent = self.parents.get(node_id)
+
+        while parent is not None:
+            result.append(parent)
+            parent = self.parents.get(parent.get("id"))
+
+        return result
+
+    def add(self, node, parent=None):
+        self.children_of(parent).append(node)
+        self._register(node, parent)
+        self._invalidate_counts(node.get("id"))
+
+        if node.get("type") == "group":
+            self._paths = None
+
+        self._notify("add", node)
+        return node
+
+    # Удалённые базы (и базы удалённой группы) уходят и из избранного
+    def remove(self, node_id):
+        node = self._detach(node_id)
+
+        if node is not None:
+            stack = [node]
+
+            while stack:
+                current = stack.pop()
+
+                if current.get("type") == "group":
+                    stack.extend(current.get("children", []))
+                else:
+                    self.remove_favorite(current.get("id"))
+
+        return node
+
+    # Снятие узла с места без удаления из избранного — для перемещения
+    def _detach(self, node_id):
+        node = self.nodes.get(node_id)
+        if node is None:
+            return None
+
+        self._invalidate_counts(node_id)
+        siblings = self.children_of(self.parents.get(node_id))
+
+        for index, child in enumerate(siblings):
+            if child is node:
+                del siblings[index]
+                break
+
+        self._unregister(node)
+
+        if node.get("type") == "group":
+            self._paths = None
+
+        self._notify("remove", node)
+        return node
+
+    def move(self, node_ids, target):
+        target_id = target.get("id") if target is not None else None
+        moved = []
+
+        for node_id in node_ids:
+            node = self.nodes.get(node_id)
+            if node is None:
+                continue
+
+            if node.get("type") == "group" and target_id is not None:
+                if node_id == target_id or self.is_descendant(node_id, target_id):
+                    continue
+
+            self._detach(node_id)
+            moved.append(node)
+
+        for node in moved:
+            self.add(node, target)
+
+        return moved
+
+    def rename(self, node_id, name):
+        node = self.nodes.get(node_id)
+        if node is None:
+            return None
+
+        node["name"] = name
+
+        if node.get("type") == "group":
+            self._paths = None
+
+        self._notify("rename", node)
+        return node
+
+    # Проверка по указателям на родителя: O(глубины), без обхода поддерева
+    def is_descendant(self, group_id, node_id):
+        parent = self.parents.get(node_id)
+
+        while parent is not None:
+            parent_id = parent.get("id")
+            if parent_id == group_id:
+                return True
+            parent = self.parents.get(parent_id)
+
+        return False
+
+    def group_path(self, group_id):
+        group = self.nodes.get(group_id)
+        if group is None:
+            return ""
+
+        names = [group.get("name", "")]
+        names.extend(parent.get("name", "") for parent in self.ancestors(group_id))
+        return "\\".join(reversed(names))
+
+    def group_paths(self):
+        result = []
+
+        def walk(nodes, prefix=""):
+            for node in nodes:
+                if node.get("type") != "group":
+                    continue
+
+                name = node.get("name", "")
+                path = f"{prefix}\\{name}" if prefix else name
+                result.append(path)
+
+                walk(node.get("children", []), path)
+
+        walk(self.groups)
+        return result
+
+    def find_group_by_path(self, group_path):
+        if self._paths is None:
+            self._paths = {}
+
+            for node_id, node in self.nodes.items():
+                if node.get("type") == "group":
+                    self._paths.setdefault(self.group_path(node_id), node)
+
+        return self._paths.get(group_path)
+
+    def update_base(self, base_id, updates):
+        updates = {key: value for key, value in updates.items() if key != "id"}
+
+        node = self.nodes.get(base_id)
+        if node is not None:
+            if "platform" in updates and updates["platform"] != node.get("platform", ""):
+                self._invalidate_counts(base_id)
+
+            node.update(updates)
+            self._notify("update", node)
+
+        return node
+
+    # Количество баз в поддереве группы с учётом отбора по платформе.
+    # Результаты кэшируются отдельно для каждого отбора и сбрасываются
+    # по цепочке родителей при изменении структуры или версии базы.
+    def count_bases(self, group_id, platform_filter=""):
+        counts = self._counts.setdefault(platform_filter, {})
+        cached = counts.get(group_id)
+
+        if cached is not None:
+            return cached
+
+        group = self.nodes.get(group_id)
+        if group is None:
+            return 0
+
+        total = 0
+
+        for child in group.get("children", []):
+            if child.get("type") == "base":
+                if platform_matches(child, platform_filter):
+                    total += 1
+
+            elif child.get("type") == "group":
+                total += self.count_bases(child.get("id"), platform_filter)
+
+        counts[group_id] = total
+        return total
+
+    def _invalidate_counts(self, node_id):
+        if not self._counts:
+            return
+
+        for group in self.ancestors(node_id):
+            group_id = group.get("id")
+
+            for counts in self._counts.values():
+                counts.pop(group_id, None)
+
+    def is_favorite(self, base_id):
+        return base_id in self.favorite_ids
+
+    # Избранные базы в порядке добавления; id удалённых баз пропускаются
+    def favorite_bases(self):
+        return [self.nodes[fav_id] for fav_id in self.favorites if fav_id in self.nodes]
+
+    def add_favorite(self, base):
+        base_id = ensure_id(base)
+
+        if base_id in self.favorite_ids or not self._is_base(base_id):
+            return False
+
+        self.favorites.append(base_id)
+        self.favorite_ids.add(base_id)
+        return True
+
+    def remove_favorite(self, base_id):
+        if base_id not in self.favorite_ids:
+            return False
+
+        self.favorite_ids.discard(base_id)
+        self.favorites[:] = [fav_id for fav_id in self.favorites if fav_id != base_id]
+        return True
+
+    def to_dict(self):
+        return self.data
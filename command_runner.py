@@ -0,0 +1,271 @@
+import codecs
+import os
+import queue
+import subprocess
+import threading
+import time
+from collections import deque
+
+# Выполнение команд вкладки «Команды» с выводом.
+#
+# Каждый запуск (run) — процесс со своими каналами stdout и stderr. Их
+# читают фоновые потоки и кладут куски текста в общую очередь, а поток Tk
+# забирает их через after раз в poll_ms, так что окно не блокируется даже
+# при большом выводе. Запуски объединяются в пакеты: пакет из одной
+# команды, группа по очереди (concurrency=1) или группа с ограничением
+# числа одновременно работающих процессов.
+#
+#   on_output(run, stream, text) — новый кусок вывода ("stdout"/"stderr")
+#   on_state(run)                — смена состояния запуска
+#
+# Запуск: id, name, argv, cwd, status, started, ended, exit_code, output
+# (список (stream, text), не больше OUTPUT_LIMIT символов).
+
+POLL_MS = 100
+READ_CHUNK = 4096
+
+# Сколько символов вывода хранить на один запуск
+OUTPUT_LIMIT = 500_000
+
+# Консольные программы Windows пишут в кодировке OEM
+OUTPUT_ENCODING = "cp866" if os.name == "nt" else "utf-8"
+
+RUN_WAITING = "waiting"
+RUN_RUNNING = "running"
+RUN_DONE = "done"
+RUN_FAILED = "failed"
+RUN_CANCELLED = "cancelled"
+
+RUN_STATUS_TEXT = {
+    RUN_WAITING: "в очереди",
+    RUN_RUNNING: "выполняется",
+    RUN_DONE: "завершена",
+    RUN_FAILED: "ошибка",
+    RUN_CANCELLED: "отменена"
+}
+
+# Без консольного окна у каждой команды (только Windows)
+CREATE_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+
+def run_duration(run):
+    if run["started"] is None:
+        return None
+
+    return (run["ended"] or time.time()) - run["started"]
+
+
+def append_output(run, stream, text):
+    run["output"].append((stream, text))
+    run["output_size"] += len(text)
+
+    # Старый вывод отбрасывается целыми кусками
+    while run["output_size"] > OUTPUT_LIMIT and len(run["output"]) > 1:
+        _, dropped = run["output"].pop(0)
+        run["output_size"] -= len(dropped)
+
+
+class CommandRunner:
+    def __init__(self, after, on_output, on_state, encoding=OUTPUT_ENCODING, poll_ms=POLL_MS):
+        self.after = after
+        self.on_output = on_output
+        self.on_state = on_state
+        self.encoding = encoding
+        self.poll_ms = poll_ms
+
+        self.runs = {}
+        self.events = queue.Queue()
+
+        self._batches = []
+        self._next_id = 0
+        self._timer = None
+
+    # commands — [(name, argv, cwd)]; возвращает созданные запуски
+    def start(self, commands, concurrency=1):
+        batch = {"waiting": deque(), "active": set(), "concurrency": max(1, concurrency)}
+        runs = []
+
+        for name, argv, cwd in commands:
+            self._next_id += 1
+
+            run = {
+                "id": f"run_{self._next_id}",
+                "name": name,
+                "argv": list(argv),
+                "cwd": cwd or None,
+                "status": RUN_WAITING,
+                "started": None,
+                "ended": None,
+                "exit_code": None,
+                "output": [],
+                "output_size": 0,
+                "popen": None,
+                "cancelled": False
+            }
+
+            self.runs[run["id"]] = run
+            batch["waiting"].append(run["id"])
+            runs.append(run)
+            self.on_state(run)
+
+        self._batches.append(batch)
+        self._pump()
+        return runs
+
+    def _pump(self):
+        for batch in self._batches:
+            while batch["waiting"] and len(batch["active"]) < batch["concurrency"]:
+                run = self.runs[batch["waiting"].popleft()]
+
+                if self._launch(run):
+                    batch["active"].add(run["id"])
+
+        self._batches = [batch for batch in self._batches if batch["waiting"] or batch["active"]]
+
+        if self._batches and self._timer is None:
+            self._timer = self.after(self.poll_ms, self._poll)
+
+    def _launch(self, run):
+        run["started"] = time.time()
+
+        try:
+            popen = subprocess.Popen(
+                run["argv"],
+                cwd=run["cwd"],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                creationflags=CREATE_NO_WINDOW
+            )
+        except (OSError, ValueError) as e:
+            run["ended"] = time.time()
+            run["status"] = RUN_FAILED
+            append_output(run, "stderr", f"{e}\n")
+            self.on_output(run, "stderr", f"{e}\n")
+            self.on_state(run)
+            return False
+
+        run["popen"] = popen
+        run["status"] = RUN_RUNNING
+        self.on_state(run)
+
+        stderr_thread = threading.Thread(
+            target=self._read,
+            args=(run["id"], "stderr", popen.stderr),
+            daemon=True
+        )
+        stderr_thread.start()
+
+        threading.Thread(
+            target=self._read_and_wait,
+            args=(run["id"], popen, stderr_thread),
+            daemon=True
+        ).start()
+
+        return True
+
+    # Фоновые потоки: только чтение каналов, интерфейс не трогают
+    def _read(self, run_id, stream, pipe):
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+
+        try:
+            for chunk in iter(lambda: pipe.read1(READ_CHUNK), b""):
+                text = decoder.decode(chunk)
+
+                if text:
+                    self.events.put((run_id, stream, text))
+
+            text = decoder.decode(b"", final=True)
+
+            if text:
+                self.events.put((run_id, stream, text))
+        except (OSError, ValueError):
+            pass
+        finally:
+            pipe.close()
+
+    def _read_and_wait(self, run_id, popen, stderr_thread):
+        self._read(run_id, "stdout", popen.stdout)
+        stderr_thread.join()
+        self.events.put((run_id, "exit", popen.wait()))
+
+    def _poll(self):
+        self._timer = None
+        events = []
+
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                break
+
+            # Подряд идущие куски одного канала склеиваются в одну вставку
+            if events and event[1] != "exit" and events[-1][:2] == event[:2]:
+                events[-1] = (event[0], event[1], events[-1][2] + event[2])
+            else:
+                events.append(event)
+
+        for run_id, stream, value in events:
+            run = self.runs[run_id]
+
+            if stream == "exit":
+                self._finish(run, value)
+            else:
+                append_output(run, stream, value)
+                self.on_output(run, stream, value)
+
+        self._pump()
+
+    def _finish(self, run, exit_code):
+        run["ended"] = time.time()
+        run["exit_code"] = exit_code
+        run["popen"] = None
+
+        if run["cancelled"]:
+            run["status"] = RUN_CANCELLED
+        else:
+            run["status"] = RUN_DONE if exit_code == 0 else RUN_FAILED
+
+        for batch in self._batches:
+            batch["active"].discard(run["id"])
+
+        self.on_state(run)
+
+    # Ожидающий запуск снимается, работающий процесс завершается
+    # (дочерние процессы команды при этом не останавливаются)
+    def cancel(self, run_id):
+        run = self.runs.get(run_id)
+
+        if run is None:
+            return
+
+        if run["status"] == RUN_WAITING:
+            for batch in self._batches:
+                if run_id in batch["waiting"]:
+                    batch["waiting"].remove(run_id)
+
+            run["status"] = RUN_CANCELLED
+            self.on_state(run)
+            self._pump()
+
+        elif run["status"] == RUN_RUNNING and run["popen"] is not None:
+            run["cancelled"] = True
+
+            try:
+                run["popen"].terminate()
+            except OSError:
+                pass
+
+    def cancel_all(self):
+        for run_id in list(self.runs):
+            self.cancel(run_id)
+
+    # Забыть завершённые запуски
+    def clear_finished(self):
+        for run_id, run in list(self.runs.items()):
+            if run["status"] in (RUN_DONE, RUN_FAILED, RUN_CANCELLED):
+                del self.runs[run_id]
+
+    @property
+    def running(self):
+        return bool(self._batches)
@@ -0,0 +1,253 @@
+from functools import lru_cache
+
+# Разбор строк подключения к информационным базам 1С
+#
+# Строка вида File="D:\Bases\Buh"; или Srvr="srv";Ref="buh"; разбирается
+# один раз в ConnectionString: параметры без учёта регистра ключей, значения
+# без кавычек ("" внутри кавычек — одна кавычка). Разобранные строки
+# кэшируются, так что повторные вызовы для той же строки бесплатны.
+#
+# key — канонический ключ для сравнения баз: регистр, кавычки, пробелы
+# и завершающая ";" не важны, а у файловой базы — и вид разделителей пути.
+
+KIND_FILE = "file"
+KIND_SERVER = "server"
+KIND_WEB = "web"
+
+
+def split_connect(connect):
+    parts = []
+    current = []
+    quoted = False
+    index = 0
+
+    while index < len(connect):
+        char = connect[index]
+
+        if char == '"':
+            if quoted and connect[index + 1:index + 2] == '"':
+                current.append('"')
+                index += 2
+                continue
+
+            quoted = not quoted
+
+        elif char == ";" and not quoted:
+            parts.append("".join(current))
+            current = []
+            index += 1
+            continue
+
+        current.append(char)
+        index += 1
+
+    parts.append("".join(current))
+    return parts
+
+
+def unquote(value):
+    value = value.strip()
+
+    if len(value) >= 2 and value[0] == '"' and value[-1] == '"':
+        return value[1:-1]
+
+    return value.replace('"', "")
+
+
+class ConnectionString:
+    def __init__(self, raw, params):
+        self.raw = raw
+        self.params = params
+
+    @property
+    def kind(self):
+        if "ws" in self.params:
+            return KIND_WEB
+
+        if "srvr" in self.params:
+            return KIND_SERVER
+
+        if "file" in self.params:
+            return KIND_FILE
+
+        return ""
+
+    @property
+    def file(self):
+        return self.params.get("file", "")
+
+    @property
+    def server(self):
+        return self.params.get("srvr", "")
+
+    @property
+    def ref(self):
+        return self.params.get("ref", "")
+
+    @property
+    def ws(self):
+        return self.params.get("ws", "")
+
+    @property
+    def user(self):
+        return self.params.get("usr", "")
+
+    @property
+    def password(self):
+        return self.params.get("pwd", "")
+
+    @property
+    def key(self):
+        kind = self.kind
+
+        if kind == KIND_FILE:
+            return "file=" + self.file.replace("/", "\\").rstrip("\\").lower()
+
+        if kind == KIND_SERVER:
+            return f"srvr={self.server.lower()};ref={self.ref.lower()}"
+
+        if kind == KIND_WEB:
+            return "ws=" + self.ws.rstrip("/").lower()
+
+        return ";".join(f"{key}={value.lower()}" for key, value in sorted(self.params.items()))
+
+    # Аргументы командной строки 1cv8 для подключения (ключ и значение
+    # отдельными элементами argv); None — строку не разобрать
+    def launch_args(self):
+        kind = self.kind
+
+        if kind == KIND_WEB:
+            return ["/WS", self.ws]
+
+        if kind == KIND_SERVER:
+            if not self.server or not self.ref:
+                return None
+            return ["/S", f"{self.server}\\{self.ref}"]
+
+        if kind == KIND_FILE and self.file:
+            return ["/F", self.file]
+
+        return None
+
+    # Путь для копирования: каталог файловой базы, адрес веб-сервера
+    # или сама строка без завершающей ";"
+    def display_path(self):
+        kind = self.kind
+
+        if kind == KIND_FILE:
+            return self.file
+
+        if kind == KIND_WEB:
+            return self.ws
+
+        return self.raw.strip().rstrip(";").strip()
+
+
+@lru_cache(maxsize=65536)
+def parse_connection(connect):
+    connect = connect or ""
+    params = {}
+
+    for part in split_connect(connect):
+        key, separator, value = part.partition("=")
+
+        if not separator:
+            # Голый путь без File= — так тоже пишут файловые базы
+            if part.strip() and not params:
+                params["file"] = unquote(part)
+            continue
+
+        key = key.strip().lower()
+
+        if key:
+            params[key] = unquote(value)
+
+    return ConnectionString(connect, params)
+
+
+def normalize_infobase_path(connect):
+    return parse_connection(connect).display_path()
+
+
+def connection_key(connect):
+    return parse_connection(connect).key
+
+
+# Индекс баз каталога по каноническому ключу строки подключения.
+# Подписан на события Catalog и обновляется вместе с ним.
+class ConnectionIndex:
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.by_key = {}
+        self.keys = {}
+
+        self._index_all()
+        catalog.subscribe(self.on_catalog_change)
+
+    def _index_all(self):
+        self.by_key = {}
+        self.keys = {}
+
+        for node in self.catalog.groups:
+            self._index_subtree(node)
+
+    def _add(self, node):
+        node_id = node.get("id")
+        key = connection_key(node.get("connect"))
+
+        self.keys[node_id] = key
+        self.by_key.setdefault(key, []).append(node_id)
+
+    def _drop(self, node_id):
+        key = self.keys.pop(node_id, None)
+        if key is None:
+            return
+
+        ids = self.by_key.get(key, [])
+
+        if node_id in ids:
+            ids.remove(node_id)
+
+        if not ids:
+            self.by_key.pop(key, None)
+
+    def _walk(self, node):
+        stack = [node]
+
+        while stack:
+            current = stack.pop()
+
+            if current.get("type") == "base":
+                yield current
+            elif current.get("type") == "group":
+                stack.extend(current.get("children", []))
+
+    def _index_subtree(self, node):
+        for base in self._walk(node):
+            self._add(base)
+
+    def on_catalog_change(self, event, node):
+        if event == "rebuild":
+            self._index_all()
+
+        elif event == "add":
+            self._index_subtree(node)
+
+        elif event == "remove":
+            for base in self._walk(node):
+                self._drop(base.get("id"))
+
+        elif event == "update" and node.get("type") == "base":
+            node_id = node.get("id")
+
+            if self.keys.get(node_id) != connection_key(node.get("connect")):
+                self._drop(node_id)
+                self._add(node)
+
+    # id баз с той же строкой подключения
+    def find(self, connect, exclude=None):
+        return [node_id for node_id in self.by_key.get(connection_key(connect), []) if node_id != exclude]
+
+    # [[id, ...]] — группы баз с одинаковой строкой подключения
+    def duplicates(self):
+        return [list(ids) for key, ids in sorted(self.by_key.items()) if len(ids) > 1 and key]
@@ -0,0 +1,185 @@
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+from edit_dialog import center_window
+from designer_jobs import OPERATION_LOAD, OPERATION_TITLES, OPERATIONS_WITH_FILES
+
+
+# Выбор пакетной операции конфигуратора для count баз.
+#   on_start(операция, каталог, обновить БД после загрузки, параллельно)
+# Каталог общий: файлы каждой базы кладутся в его подкаталог.
+def open_designer_job_dialog(master, title, count, concurrency, on_start):
+    dialog = tk.Toplevel(master)
+    dialog.title("Пакетная операция конфигуратора")
+    dialog.transient(master)
+    dialog.grab_set()
+
+    center_window(master, dialog, 520, 260)
+
+    ttk.Label(dialog, text=f"{title} — баз: {count}", font=("Segoe UI", 10, "bold")).pack(anchor="w", padx=10, pady=(10, 6))
+
+    operations = list(OPERATION_TITLES)
+    operation_var = tk.StringVar(value=OPERATION_TITLES[operations[-1]])
+
+    ttk.Combobox(
+        dialog,
+        textvariable=operation_var,
+        values=[OPERATION_TITLES[operation] for operation in operations],
+        state="readonly"
+    ).pack(fill="x", padx=10, pady=(0, 8))
+
+    dir_frame = ttk.Frame(dialog)
+    dir_frame.pack(fill="x", padx=10)
+
+    ttk.Label(dir_frame, text="Каталог файлов:").pack(side="left")
+
+    dir_var = tk.StringVar()
+    dir_entry = ttk.Entry(dir_frame, textvariable=dir_var)
+    dir_entry.pack(side="left", fill="x", expand=True, padx=6)
+
+    def browse():
+        path = filedialog.askdirectory(parent=dialog)
+        if path:
+            dir_var.set(path)
+
+    dir_button = ttk.Button(dir_frame, text="...", width=3, command=browse)
+    dir_button.pack(side="left")
+
+    update_db_var = tk.BooleanVar(value=True)
+    update_db_check = ttk.Checkbutton(dialog, text="Обновить конфигурацию БД после загрузки", variable=update_db_var)
+    update_db_check.pack(anchor="w", padx=10, pady=(6, 0))
+
+    concurrency_frame = ttk.Frame(dialog)
+    concurrency_frame.pack(fill="x", padx=10, pady=(8, 0))
+
+    ttk.Label(concurrency_frame, text="Конфигураторов одновременно:").pack(side="left")
+
+    concurrency_var = tk.IntVar(value=concurrency)
+    ttk.Spinbox(concurrency_frame, from_=1, to=16, textvariable=concurrency_var, width=5).pack(side="left", padx=6)
+
+    def selected_operation():
+        return next(
+            operation for operation in operations
+            if OPERATION_TITLES[operation] == operation_var.get()
+        )
+
+    def on_operation_changed(*args):
+        operation = selected_operation()
+        state = "normal" if operation in OPERATIONS_WITH_FILES else "disabled"
+
+        dir_entry.configure(state=state)
+        dir_button.configure(state=state)
+        update_db_check.configure(state="normal" if operation == OPERATION_LOAD else "disabled")
+
+    operation_var.trace_add("write", on_operation_changed)
+    on_operation_changed()
+
+    def start():
+        operation = selected_operation()
+        files_dir = dir_var.get().strip()
+
+        if operation in OPERATIONS_WITH_FILES and not files_dir:
+            messagebox.showerror("Каталог", "Укажите каталог файлов конфигурации.", parent=dialog)
+            return
+
+        try:
+            workers = max(1, int(concurrency_var.get()))
+        except (tk.TclError, ValueError):
+            workers = concurrency
+
+        dialog.destroy()
+        on_start(operation, files_dir, update_db_var.get(), workers)
+
+    bottom = ttk.Frame(dialog)
+    bottom.pack(fill="x", padx=10, pady=(12, 10))
+
+    ttk.Button(bottom, text="Отмена", command=dialog.destroy).pack(side="right")
+    ttk.Button(bottom, text="Запустить", command=start).pack(side="right", padx=(0, 8))
+
+
+# Очередь пакетных заданий: состояние, длительность и результат каждой базы.
+#   rows — [(ключ, наименование)]
+#   on_retry(ключи или None для всех ошибочных), on_cancel(), on_open_log(ключ)
+# Возвращает (set_job(ключ, состояние, длительность, сообщение),
+#             set_progress(выполнено, всего, текст), set_done(done)).
+def open_job_queue_dialog(master, title, rows, on_retry, on_cancel, on_open_log):
+    dialog = tk.Toplevel(master)
+    dialog.title(title)
+    dialog.transient(master)
+
+    center_window(master, dialog, 720, 420)
+
+    progress_var = tk.StringVar(value=f"Баз: {len(rows)}")
+    ttk.Label(dialog, textvariable=progress_var).pack(anchor="w", padx=10, pady=(10, 4))
+
+    progress = ttk.Progressbar(dialog, maximum=max(1, len(rows)))
+    progress.pack(fill="x", padx=10, pady=(0, 6))
+
+    columns = ("status", "duration", "message")
+
+    tree = ttk.Treeview(dialog, columns=columns, show="tree headings", selectmode="extended")
+    tree.heading("#0", text="База")
+    tree.heading("status", text="Состояние")
+    tree.heading("duration", text="Длительность")
+    tree.heading("message", text="Результат")
+
+    tree.column("#0", width=220)
+    tree.column("status", width=100, stretch=False)
+    tree.column("duration", width=90, anchor="e", stretch=False)
+    tree.column("message", width=280)
+
+    tree.pack(fill="both", expand=True, padx=10, pady=4)
+
+    for key, name in rows:
+        tree.insert("", "end", iid=key, text=name, values=("", "", ""))
+
+    def retry_selected():
+        keys = list(tree.selection())
+        if keys:
+            on_retry(keys)
+
+    def open_log():
+        key = tree.focus()
+        if key:
+            on_open_log(key)
+
+    tree.bind("<Double-1>", lambda e: open_log())
+
+    button_frame = ttk.Frame(dialog)
+    button_frame.pack(fill="x", padx=10, pady=(4, 10))
+
+    ttk.Button(button_frame, text="Повторить ошибочные", command=lambda: on_retry(None)).pack(side="left")
+    ttk.Button(button_frame, text="Повторить выбранные", command=retry_selected).pack(side="left", padx=5)
+    ttk.Button(button_frame, text="Журнал", command=open_log).pack(side="left")
+
+    running = [True]
+
+    def cancel():
+        if running[0]:
+            on_cancel()
+
+    def close():
+        cancel()
+        dialog.destroy()
+
+    ttk.Button(button_frame, text="Закрыть", command=close).pack(side="right")
+    cancel_button = ttk.Button(button_frame, text="Отменить ожидающие", command=cancel)
+    cancel_button.pack(side="right", padx=5)
+
+    dialog.protocol("WM_DELETE_WINDOW", close)
+
+    def set_job(key, status, duration, message):
+        if dialog.winfo_exists() and tree.exists(key):
+            tree.item(key, values=(status, duration, message))
+
+    def set_progress(done, total, text):
+        if dialog.winfo_exists():
+            progress.configure(maximum=max(1, total), value=done)
+            progress_var.set(text)
+
+    def set_done(done):
+        running[0] = not done
+
+        if dialog.winfo_exists():
+            cancel_button.configure(state="disabled" if done else "normal")
+
+    return set_job, set_progress, set_done
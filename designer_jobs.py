@@ -0,0 +1,270 @@
+import os
+import re
+import subprocess
+import time
+from collections import deque
+
+# Пакетные операции конфигуратора над группой баз.
+#
+# Для каждой базы запускается 1cv8 DESIGNER с командой пакетного режима
+# (DumpConfigToFiles, LoadConfigFromFiles, UpdateDBCfg), своим файлом
+# журнала /Out и файлом результата /DumpResult. Одновременно работает не
+# больше concurrency конфигураторов; завершение процессов проверяется
+# опросом через after, поэтому окно не блокируется.
+#
+# Код в файле /DumpResult: 0 — успешно, иначе ошибка (1 — ошибка
+# выполнения, 101 — ошибки в данных). Если файла нет, используется код
+# выхода процесса.
+#
+# Задание: key, name, argv, out_path, result_path, status, started, ended,
+# exit_code, result_code, message, attempts.
+
+DESIGNER_CONCURRENCY = 2
+POLL_MS = 1000
+
+OPERATION_DUMP = "dump"
+OPERATION_LOAD = "load"
+OPERATION_UPDATE = "update"
+
+OPERATION_TITLES = {
+    OPERATION_DUMP: "Выгрузить конфигурацию в файлы (DumpConfigToFiles)",
+    OPERATION_LOAD: "Загрузить конфигурацию из файлов (LoadConfigFromFiles)",
+    OPERATION_UPDATE: "Обновить конфигурацию базы данных (UpdateDBCfg)"
+}
+
+# Операции, которым нужен каталог с файлами конфигурации
+OPERATIONS_WITH_FILES = (OPERATION_DUMP, OPERATION_LOAD)
+
+JOB_WAITING = "waiting"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+JOB_STATUS_TEXT = {
+    JOB_WAITING: "в очереди",
+    JOB_RUNNING: "выполняется",
+    JOB_DONE: "успешно",
+    JOB_FAILED: "ошибка",
+    JOB_CANCELLED: "отменено"
+}
+
+DUMP_RESULT_TEXT = {
+    0: "успешно",
+    1: "ошибка выполнения",
+    101: "ошибки в данных"
+}
+
+LOG_TAIL_LINES = 5
+
+
+# Имя файла или каталога для базы: без запрещённых в Windows символов
+def safe_file_name(name):
+    name = re.sub(r'[\\/:*?"<>|\s]+', "_", name).strip("._")
+    return name[:80] or "base"
+
+
+# Аргументы пакетной команды (после строки подключения и авторизации)
+def operation_args(operation, files_dir="", update_db=False):
+    if operation == OPERATION_DUMP:
+        return ["/DumpConfigToFiles", files_dir]
+
+    if operation == OPERATION_LOAD:
+        args = ["/LoadConfigFromFiles", files_dir]
+
+        if update_db:
+            args.append("/UpdateDBCfg")
+
+        return args
+
+    if operation == OPERATION_UPDATE:
+        return ["/UpdateDBCfg"]
+
+    raise ValueError(f"Неизвестная операция: {operation}")
+
+
+def designer_argv(exe_path, connection_args, credentials, operation_argv, out_path, result_path):
+    return [
+        exe_path,
+        "DESIGNER",
+        *connection_args,
+        *credentials,
+        "/DisableStartupDialogs",
+        "/DisableStartupMessages",
+        *operation_argv,
+        "/Out", out_path,
+        "/DumpResult", result_path
+    ]
+
+
+def read_dump_result(path):
+    try:
+        with open(path, "r", encoding="utf-8-sig", errors="replace") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+# Последние строки журнала /Out: 1С пишет его в UTF-8 с BOM
+# или в кодировке Windows, в зависимости от версии платформы
+def read_log_tail(path, lines=LOG_TAIL_LINES):
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return ""
+
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = data.decode("cp1251", errors="replace")
+
+    return [line.strip() for line in text.splitlines() if line.strip()][-lines:]
+
+
+def job_duration(job):
+    if job.get("started") is None:
+        return None
+
+    return (job.get("ended") or time.time()) - job["started"]
+
+
+class DesignerJobQueue:
+    # on_update(задание) — после каждой смены состояния; on_done() — очередь пуста
+    def __init__(self, after, on_update, on_done=None, concurrency=DESIGNER_CONCURRENCY, poll_ms=POLL_MS):
+        self.after = after
+        self.on_update = on_update
+        self.on_done = on_done
+        self.concurrency = max(1, concurrency)
+        self.poll_ms = poll_ms
+
+        self.jobs = {}
+        self._queue = deque()
+        self._active = {}
+        self._timer = None
+
+    @property
+    def running(self):
+        return bool(self._queue or self._active)
+
+    # Задания без argv сразу помечаются ошибкой с текстом message
+    def start(self, jobs):
+        for job in jobs:
+            job.setdefault("attempts", 0)
+            self.jobs[job["key"]] = job
+
+            if job.get("argv"):
+                self._enqueue(job)
+            else:
+                job["status"] = JOB_FAILED
+                self.on_update(job)
+
+        self._pump()
+
+    def _enqueue(self, job):
+        job.update({
+            "status": JOB_WAITING,
+            "started": None,
+            "ended": None,
+            "exit_code": None,
+            "result_code": None
+        })
+        job.setdefault("message", "")
+
+        self._queue.append(job["key"])
+        self.on_update(job)
+
+    # Повтор завершившихся с ошибкой или отменённых заданий
+    def retry(self, keys=None):
+        for key in list(self.jobs) if keys is None else keys:
+            job = self.jobs.get(key)
+
+            if job and job.get("argv") and job["status"] in (JOB_FAILED, JOB_CANCELLED):
+                job["message"] = ""
+                self._enqueue(job)
+
+        self._pump()
+
+    # Снимает ожидающие задания; запущенный конфигуратор не прерывается,
+    # чтобы не оставить базу посреди обновления структуры
+    def cancel(self):
+        while self._queue:
+            job = self.jobs[self._queue.popleft()]
+            job["status"] = JOB_CANCELLED
+            self.on_update(job)
+
+        self._check_done()
+
+    def _pump(self):
+        while self._queue and len(self._active) < self.concurrency:
+            job = self.jobs[self._queue.popleft()]
+            self._launch(job)
+
+        if self._active and self._timer is None:
+            self._timer = self.after(self.poll_ms, self._poll)
+
+        self._check_done()
+
+    def _launch(self, job):
+        for path in (job["out_path"], job["result_path"]):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+        job["attempts"] += 1
+        job["started"] = time.time()
+
+        try:
+            self._active[job["key"]] = subprocess.Popen(job["argv"], close_fds=True)
+        except OSError as e:
+            job["ended"] = time.time()
+            job["status"] = JOB_FAILED
+            job["message"] = str(e)
+        else:
+            job["status"] = JOB_RUNNING
+
+        self.on_update(job)
+
+    def _poll(self):
+        self._timer = None
+
+        for key, popen in list(self._active.items()):
+            exit_code = popen.poll()
+
+            if exit_code is None:
+                continue
+
+            del self._active[key]
+            self._finish(self.jobs[key], exit_code)
+
+        self._pump()
+
+    def _finish(self, job, exit_code):
+        job["ended"] = time.time()
+        job["exit_code"] = exit_code
+        job["result_code"] = read_dump_result(job["result_path"])
+
+        code = exit_code if job["result_code"] is None else job["result_code"]
+
+        if code == 0:
+            job["status"] = JOB_DONE
+            job["message"] = ""
+        else:
+            job["status"] = JOB_FAILED
+            tail = read_log_tail(job["out_path"])
+            job["message"] = tail[-1] if tail else DUMP_RESULT_TEXT.get(code, f"код {code}")
+
+        self.on_update(job)
+
+    def _check_done(self):
+        if not self.running and self.on_done:
+            self.on_done()
+
+    def counts(self):
+        counts = {}
+
+        for job in self.jobs.values():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+
+        return counts
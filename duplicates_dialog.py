@@ -0,0 +1,86 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from edit_dialog import center_window
+
+
+# Отчёт о базах с одинаковой строкой подключения.
+#   duplicates   -> [[id базы, ...]] из ConnectionIndex.duplicates()
+#   describe(id) -> (наименование, путь группы, строка подключения, дата запуска)
+#   on_show(id)   — показать базу в дереве
+#   on_delete(id) — удалить базу из списка
+def open_duplicates_dialog(master, duplicates, describe, on_show, on_delete):
+    dialog = tk.Toplevel(master)
+    dialog.title("Дубликаты баз")
+    dialog.transient(master)
+    center_window(master, dialog, 720, 420)
+
+    total = sum(len(ids) for ids in duplicates)
+
+    ttk.Label(
+        dialog,
+        text=f"Строк подключения с повторами: {len(duplicates)}, баз: {total}"
+    ).pack(anchor="w", padx=10, pady=(10, 4))
+
+    columns = ("group", "last_run")
+
+    tree = ttk.Treeview(dialog, columns=columns, show="tree headings", selectmode="browse")
+    tree.heading("#0", text="База")
+    tree.heading("group", text="Группа")
+    tree.heading("last_run", text="Запуск")
+
+    tree.column("#0", width=320)
+    tree.column("group", width=250)
+    tree.column("last_run", width=90, stretch=False)
+
+    tree.pack(fill="both", expand=True, padx=10, pady=4)
+
+    for number, ids in enumerate(duplicates):
+        connect = describe(ids[0])[2]
+        parent = tree.insert("", "end", iid=f"dup_{number}", text=connect, open=True)
+
+        for base_id in ids:
+            name, group_path, _, last_run = describe(base_id)
+            tree.insert(parent, "end", iid=base_id, text=name, values=(group_path, last_run))
+
+    def selected_base():
+        selected = tree.focus()
+
+        if not selected or selected.startswith("dup_"):
+            return None
+
+        return selected
+
+    def show():
+        base_id = selected_base()
+        if base_id:
+            on_show(base_id)
+
+    def delete():
+        base_id = selected_base()
+        if not base_id:
+            return
+
+        if not messagebox.askyesno(
+            "Подтверждение",
+            f"Удалить базу «{tree.item(base_id, 'text')}» из списка?\n\nФайлы базы на диске удалены не будут.",
+            parent=dialog
+        ):
+            return
+
+        parent = tree.parent(base_id)
+
+        on_delete(base_id)
+        tree.delete(base_id)
+
+        # Повтор снят — группа из одной базы больше не нужна
+        if len(tree.get_children(parent)) < 2:
+            tree.delete(parent)
+
+    tree.bind("<Double-1>", lambda e: show())
+
+    button_frame = ttk.Frame(dialog)
+    button_frame.pack(fill="x", padx=10, pady=(4, 10))
+
+    ttk.Button(button_frame, text="Показать в дереве", command=show).pack(side="left")
+    ttk.Button(button_frame, text="Удалить из списка", command=delete).pack(side="left", padx=5)
+    ttk.Button(button_frame, text="Закрыть", command=dialog.destroy).pack(side="right")
@@ -1,7 +1,7 @@
-import os
 import tkinter as tk
 from tkinter import ttk
 import datetime
+from platforms import get_installed_1c_versions
 
 def enable_ctrl_v(widget):
     def paste_event(event=None):
@@ -33,28 +33,6 @@ def center_window(parent, window, width=500, height=400):
 
     window.geometry(f"{width}x{height}+{pos_x}+{pos_y}")
 
-def get_installed_1c_versions():
-    versions = []
-
-    base_dirs = [
-        os.path.join(os.environ.get("PROGRAMFILES", "C:\\Program Files"), "1cv8"),
-        os.path.join(os.environ.get("PROGRAMFILES(X86)", "C:\\Program Files (x86)"), "1cv8")
-    ]
-
-    for base_dir in base_dirs:
-        if not os.path.exists(base_dir):
-            continue
-
-        for name in os.listdir(base_dir):
-            bin_dir = os.path.join(base_dir, name, "bin")
-            exe_1cv8 = os.path.join(bin_dir, "1cv8.exe")
-            exe_1cv8c = os.path.join(bin_dir, "1cv8c.exe")
-
-            if os.path.exists(exe_1cv8) or os.path.exists(exe_1cv8c):
-                versions.append(name)
-
-    return sorted(set(versions), reverse=True)
-
 def open_properties_dialog(master, data, on_save):
     dialog = tk.Toplevel(master)
     dialog.title("Свойства базы")
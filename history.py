@@ -0,0 +1,194 @@
+import datetime
+import json
+import uuid
+
+from persistence import atomic_write_text
+
+# Журнал запусков баз (history.jsonl).
+#
+# Каждый запуск — одна строка JSON в конце файла, поэтому запуск базы
+# больше не переписывает starter.json. Дата последнего запуска базы
+# (last_run) берётся из журнала. Чтобы файл не рос бесконечно, старые
+# записи периодически отбрасываются (compact): журнал переписывается
+# атомарно с последними max_records записями не старше max_days дней.
+#
+# Запись: id, ts, base_id, name, mode, platform, interface, params, admin,
+# latency_ms — время от нажатия до запуска процесса.
+#
+# Когда клиент 1С закрывается, в журнал дописывается строка завершения
+# {"event": "exit", "id": id запуска, exit_code, duration_s}. При чтении
+# она переносится в запись запуска (поля exit_code и duration_s), а при
+# сжатии журнала отдельные строки завершения больше не пишутся.
+
+HISTORY_MAX_RECORDS = 20000
+HISTORY_MAX_DAYS = 365
+HISTORY_PAGE_SIZE = 100
+
+MODE_TITLES = {
+    "enterprise": "1С:Предприятие",
+    "configurator": "Конфигуратор"
+}
+
+
+def record_date(record):
+    return record.get("ts", "")[:10]
+
+
+class LaunchHistory:
+    def __init__(self, path, max_records=HISTORY_MAX_RECORDS, max_days=HISTORY_MAX_DAYS):
+        self.path = path
+        self.max_records = max_records
+        self.max_days = max_days
+
+        self.records = []
+        self.last_runs = {}
+        self._by_id = {}
+        self._torn = False
+
+        self.load()
+
+    def load(self):
+        records = []
+        self._torn = False
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    self._torn = not line.endswith("\n")
+
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # Оборванная при сбое последняя строка
+                        continue
+
+        except FileNotFoundError:
+            pass
+
+        self.records = []
+        self.last_runs = {}
+        self._by_id = {}
+
+        for record in records:
+            if record.get("event") == "exit":
+                self._apply_exit(record)
+            else:
+                self.records.append(record)
+                self._index(record)
+
+        records = self.records
+
+        if len(records) > self.max_records or (records and record_date(records[0]) < self._cutoff()):
+            self.compact()
+
+    def _index(self, record):
+        base_id = record.get("base_id")
+        date = record_date(record)
+
+        if record.get("id"):
+            self._by_id[record["id"]] = record
+
+        if base_id and date > self.last_runs.get(base_id, ""):
+            self.last_runs[base_id] = date
+
+    def _apply_exit(self, event):
+        record = self._by_id.get(event.get("id"))
+
+        if record is not None:
+            record["exit_code"] = event.get("exit_code")
+            record["duration_s"] = event.get("duration_s")
+
+        return record
+
+    def _cutoff(self):
+        return (datetime.date.today() - datetime.timedelta(days=self.max_days)).isoformat()
+
+    def _write_line(self, record):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            # Не дописываем к оборванной строке
+            f.write("\n" + line if self._torn else line)
+
+        self._torn = False
+
+    def append(self, record):
+        record.setdefault("id", uuid.uuid4().hex[:12])
+        record.setdefault("ts", datetime.datetime.now().isoformat(timespec="seconds"))
+
+        self._write_line(record)
+
+        self.records.append(record)
+        self._index(record)
+
+        # С запасом в четверть, чтобы не переписывать файл на каждом запуске
+        if len(self.records) > self.max_records * 5 // 4:
+            self.compact()
+
+        return record
+
+    # Завершение сеанса, начатого запуском launch_id
+    def finish(self, launch_id, exit_code, duration_s):
+        event = {
+            "event": "exit",
+            "id": launch_id,
+            "ts": datetime.datetime.now().isoformat(timespec="seconds"),
+            "exit_code": exit_code,
+            "duration_s": round(duration_s)
+        }
+
+        # Запуск уже вытеснен из журнала — записывать нечего
+        if self._apply_exit(event) is None:
+            return None
+
+        self._write_line(event)
+        return event
+
+    def compact(self):
+        cutoff = self._cutoff()
+        keep = [record for record in self.records if record_date(record) >= cutoff][-self.max_records:]
+
+        atomic_write_text(
+            self.path,
+            "".join(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n" for record in keep)
+        )
+
+        self.records = keep
+        self._by_id = {record["id"]: record for record in keep if record.get("id")}
+        self._torn = False
+
+    def last_run(self, base_id):
+        return self.last_runs.get(base_id, "")
+
+    # Переносит даты из журнала в базы каталога (там, где журнал новее)
+    def apply_last_runs(self, catalog):
+        for base_id, date in self.last_runs.items():
+            node = catalog.get(base_id)
+
+            if node is not None and node.get("last_run", "") < date:
+                catalog.update_base(base_id, {"last_run": date})
+
+    # Страница записей, новые сверху; возвращает (записи, всего найдено).
+    # base — подстрока имени или id базы, даты — в формате ГГГГ-ММ-ДД
+    def query(self, base="", mode="", date_from="", date_to="", offset=0, limit=HISTORY_PAGE_SIZE):
+        base = base.strip().lower()
+        found = []
+
+        for record in reversed(self.records):
+            if mode and record.get("mode") != mode:
+                continue
+
+            date = record_date(record)
+
+            if date_from and date < date_from:
+                continue
+
+            if date_to and date > date_to:
+                continue
+
+            if base and base not in record.get("name", "").lower() and base != record.get("base_id"):
+                continue
+
+            found.append(record)
+
+        return found[offset:offset + limit], len(found)
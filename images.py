@@ -0,0 +1,74 @@
+import hashlib
+import os
+import tempfile
+import tkinter as tk
+
+# Кэш уменьшенных картинок (иконки, маскот).
+#
+# Готовые PNG нужного размера лежат в каталоге кэша и грузятся прямо
+# в tk.PhotoImage — Tk 8.6 читает PNG сам, и на тёплом старте PIL даже
+# не импортируется. Ключ — путь к исходнику, его mtime и размер
+# и целевой размер; при промахе картинка один раз уменьшается через
+# PIL и сохраняется в кэш.
+
+
+class ImageCache:
+    def __init__(self, cache_dir, master, base_dir=None):
+        self.cache_dir = cache_dir
+        self.master = master
+        self.base_dir = base_dir
+
+    def _cache_path(self, path, size, st):
+        # Путь относительно каталога ресурсов: у собранного exe он
+        # распаковывается каждый раз в новый временный каталог
+        source = path
+
+        if self.base_dir:
+            try:
+                source = os.path.relpath(path, self.base_dir)
+            except ValueError:
+                pass
+
+        key = f"{source}|{st.st_mtime_ns}|{st.st_size}|{size[0]}x{size[1]}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        stem = os.path.splitext(os.path.basename(path))[0]
+
+        return os.path.join(self.cache_dir, f"{stem}_{size[0]}x{size[1]}_{digest}.png")
+
+    def load(self, path, size):
+        cache_path = self._cache_path(path, size, os.stat(path))
+
+        if os.path.exists(cache_path):
+            try:
+                return tk.PhotoImage(master=self.master, file=cache_path)
+            except tk.TclError:
+                pass
+
+        from PIL import Image, ImageTk
+
+        img = Image.open(path).resize(size, Image.Resampling.LANCZOS)
+
+        try:
+            self._save(img, cache_path)
+            return tk.PhotoImage(master=self.master, file=cache_path)
+
+        except (OSError, tk.TclError) as e:
+            print(f"[!] Кэш картинок недоступен: {e}")
+            return ImageTk.PhotoImage(img, master=self.master)
+
+    def _save(self, img, cache_path):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".png", dir=self.cache_dir)
+
+        try:
+            with os.fdopen(fd, "wb") as f:
+                img.save(f, "PNG")
+
+            os.replace(tmp_path, cache_path)
+
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
@@ -5,18 +5,58 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import os
 import pyperclip
+import queue
+import sqlite3
 import subprocess
 import sys
-import uuid
+import threading
+import time
 import webbrowser
-from PIL import Image, ImageTk
 from edit_dialog import (
     open_register_dialog,
     open_properties_dialog,
     center_window
 )
-from settings_dialog import open_settings_dialog
+from settings_dialog import load_settings, open_settings_dialog
 from command_dialog import open_command_dialog
+from tree_reconciler import TreeReconciler
+from catalog import Catalog, ensure_id, platform_matches
+from connection import ConnectionIndex, normalize_infobase_path, parse_connection
+from duplicates_dialog import open_duplicates_dialog
+from batch_launch import BATCH_CONCURRENCY, BATCH_STAGGER_SECONDS, STATUS_TEXT, BatchLauncher
+from batch_dialog import open_batch_dialog, open_workspace_name_dialog
+from processes import ProcessSupervisor, format_command, format_duration, split_args
+from processes_dialog import open_processes_dialog
+from designer_jobs import (
+    DESIGNER_CONCURRENCY, JOB_CANCELLED, JOB_DONE, JOB_FAILED, JOB_RUNNING, JOB_STATUS_TEXT, OPERATION_DUMP,
+    OPERATION_TITLES, DesignerJobQueue, designer_argv, job_duration, operation_args, safe_file_name
+)
+from designer_dialog import open_designer_job_dialog, open_job_queue_dialog
+from command_runner import OUTPUT_ENCODING, RUN_RUNNING, RUN_STATUS_TEXT, CommandRunner, run_duration
+from search import SEARCH_LIMIT, SearchIndex
+from quick_launch_dialog import QUICK_LAUNCH_LIMIT, open_quick_launch_dialog
+from persistence import atomic_write_json
+from starter_sync import data_changed, merge_starter, parse_starter
+from storage import LOST_BASES_GROUP, STORAGE_JSON, copy_to_backend, open_storage
+from tree_layout import base_row, build_tree_layout, sort_tree_children
+from images import ImageCache
+from history import HISTORY_MAX_DAYS, HISTORY_MAX_RECORDS, HISTORY_PAGE_SIZE, MODE_TITLES, LaunchHistory
+from v8i import apply_v8i_sync, load_v8i_sync_state, plan_v8i_sync, save_v8i_sync_state
+from platforms import get_installed_1c_versions, resolve_1c_path, set_preferred_arch, start_platform_scan
+from sizes import (
+    DB_FILE_NAME,
+    SIZE_MAX_WORKERS,
+    SIZE_MISSING,
+    SIZE_REFRESH_DAYS,
+    SIZE_SHARE_WORKERS,
+    SIZE_TIMEOUT,
+    SIZE_UNREACHABLE,
+    SizeRefresher,
+    StatCache,
+    file_base_path,
+    format_size,
+    is_size_fresh
+)
 
 class ToolTip:
     def __init__(self, widget, text):
@@ -64,14 +104,62 @@ else:
     
 def load_icon(name, size=(18, 18)):
     path = os.path.join(RESOURCE_DIR, "assets", "icons", name)
-    img = Image.open(path).resize(size, Image.Resampling.LANCZOS)
-    return ImageTk.PhotoImage(img)
+    return image_cache.load(path, size)
 
 STARTER_JSON = os.path.join(APP_DIR, "starter.json")
+STARTER_DB = os.path.join(APP_DIR, "starter.db")
 COMMANDS_JSON = os.path.join(APP_DIR, "commands.json")
+SIZE_CACHE_JSON = os.path.join(APP_DIR, "size_cache.json")
+PLATFORMS_CACHE_JSON = os.path.join(APP_DIR, "platforms_cache.json")
+IMAGE_CACHE_DIR = os.path.join(APP_DIR, "image_cache")
+V8I_SYNC_JSON = os.path.join(APP_DIR, "v8i_sync.json")
+HISTORY_JSONL = os.path.join(APP_DIR, "history.jsonl")
+DESIGNER_LOGS_DIR = os.path.join(APP_DIR, "designer_logs")
+
+# установленные платформы ищем в фоне, пока строится окно
+set_preferred_arch(load_settings().get("platform_arch", ""))
+start_platform_scan(PLATFORMS_CACHE_JSON)
 
 root = tk.Tk()
 
+# Каталог хранится в starter.json или в starter.db (settings.json: storage).
+# Запись отложенная; синхронно — только при выходе. Изменения starter.json
+# от других копий программы отслеживаются по stat (starter_watch_seconds,
+# 0 — не следить); у SQLite слежения нет — starter_sync равен None
+def on_storage_error(e):
+    messagebox.showerror(
+        "Сохранение",
+        f"Не удалось сохранить список баз:\n{e}\n\nПоследние изменения могут быть не записаны."
+    )
+
+try:
+    storage = open_storage(load_settings(), STARTER_JSON, STARTER_DB, root.after, root.after_cancel, on_storage_error)
+except (sqlite3.Error, OSError, ValueError) as e:
+    messagebox.showerror("Хранилище", f"Не удалось открыть {STARTER_DB}:\n{e}\n\nСписок баз загружен из starter.json.")
+    storage = open_storage(
+        {**load_settings(), "storage": STORAGE_JSON},
+        STARTER_JSON,
+        STARTER_DB,
+        root.after,
+        root.after_cancel,
+        on_storage_error
+    )
+
+starter_sync = storage.sync
+
+# журнал запусков дописывается построчно; settings.json: history_max_records, history_max_days
+launch_history = LaunchHistory(
+    HISTORY_JSONL,
+    max_records=load_settings().get("history_max_records", HISTORY_MAX_RECORDS),
+    max_days=load_settings().get("history_max_days", HISTORY_MAX_DAYS)
+)
+
+# запущенные клиенты 1С и команды; завершение ловится опросом через after
+process_supervisor = ProcessSupervisor(root.after, on_exit=lambda record: on_process_exit(record))
+
+# уменьшенные иконки берутся из кэша, PIL нужен только при промахе
+image_cache = ImageCache(IMAGE_CACHE_DIR, root, RESOURCE_DIR)
+
 try:
     ctypes.windll.shell32.SetCurrentProcessExplicitAppUserModelID("CatStarter.App")
 except Exception:
@@ -118,7 +206,18 @@ search_entry.pack(side="left", padx=(0, 5))
 SEARCH_PLACEHOLDER = "🔍 Ctrl+F"
 search_var.set(SEARCH_PLACEHOLDER)
 
-version_filter_var = tk.StringVar(value="")
+# Число совпадений поиска по мере ввода
+search_count_var = tk.StringVar()
+
+ttk.Label(
+    toolbar,
+    textvariable=search_count_var,
+    foreground="#888888"
+).pack(side="left", padx=(0, 5))
+
+# Текущий отбор по версии платформы; хранится в обычной переменной,
+# чтобы проверка каждой базы не была обращением к Tcl.
+platform_filter = ""
 filter_button_text = tk.StringVar(value="8.x")
 
 def clear_search_placeholder(event=None):
@@ -155,15 +254,15 @@ def create_group():
 
         selected = tree.focus()
         if selected in tree_nodes and tree_nodes[selected].get("type") == "group":
-            tree_nodes[selected].setdefault("children", []).append(new_group)
+            catalog.add(new_group, tree_nodes[selected])
         elif starter.get("groups"):
-            starter["groups"][0].setdefault("children", []).append(new_group)
+            catalog.add(new_group, starter["groups"][0])
         else:
-            starter["groups"] = [{
+            catalog.add({
                 "type": "group",
                 "name": "Информационные базы",
                 "children": [new_group]
-            }]
+            })
 
         save_json(starter)
         populate_tree()
@@ -205,12 +304,20 @@ btn_settings = ttk.Button(
     toolbar,
     image=icon_settings,
     width=3,
-    command=lambda: open_settings_dialog(root, reload_data)
+    command=lambda: open_settings()
 )
 ToolTip(btn_settings, "Настройки")
 
 btn_settings.pack(side="left", padx=2)
 
+# Сохранённые наборы баз для группового запуска
+workspaces_menu = tk.Menu(root, tearoff=0, postcommand=lambda: fill_workspaces_menu())
+
+btn_workspaces = ttk.Menubutton(toolbar, text="Наборы", menu=workspaces_menu)
+ToolTip(btn_workspaces, "Наборы баз для группового запуска")
+
+btn_workspaces.pack(side="left", padx=2)
+
 # Генерация окна с закладками "Базы", "История", "Команды"
 main_notebook = ttk.Notebook(frame_left)
 main_notebook.pack(fill="both", expand=True)
@@ -238,6 +345,8 @@ tree.heading("last_run", text="Дата")
 tree.heading("size", text="Размер")
 tree.pack(fill="both", expand=True)
 
+tree_reconciler = TreeReconciler(tree)
+
 # Панель инструментов для команд
 commands_toolbar = ttk.Frame(commands_tab)
 commands_toolbar.pack(fill="x", pady=(0, 5))
@@ -268,9 +377,46 @@ btn_command_delete = ttk.Button(
 )
 btn_command_delete.pack(side="left", padx=2)
 
+ttk.Separator(commands_toolbar, orient="vertical").pack(side="left", fill="y", padx=6)
+
+ttk.Button(
+    commands_toolbar,
+    text="Выполнить",
+    command=lambda: launch_selected_command()
+).pack(side="left", padx=2)
+
+ttk.Button(
+    commands_toolbar,
+    text="Отменить",
+    command=lambda: cancel_selected_run()
+).pack(side="left", padx=2)
+
+ttk.Button(
+    commands_toolbar,
+    text="Очистить",
+    command=lambda: clear_finished_runs()
+).pack(side="left", padx=2)
+
+# Группа команд выполняется по очереди (1) или по N одновременно;
+# settings.json: commands_concurrency
+commands_concurrency_var = tk.IntVar(value=load_settings().get("commands_concurrency", 1))
+
+ttk.Spinbox(
+    commands_toolbar,
+    from_=1,
+    to=16,
+    width=3,
+    textvariable=commands_concurrency_var
+).pack(side="right", padx=2)
+
+ttk.Label(commands_toolbar, text="Группу одновременно:").pack(side="right", padx=2)
+
+commands_paned = ttk.PanedWindow(commands_tab, orient="vertical")
+commands_paned.pack(fill="both", expand=True)
+
 # Дерево команд
 commands_tree = ttk.Treeview(
-    commands_tab,
+    commands_paned,
     columns=("command_type", "command"),
     show="tree headings",
     selectmode="browse"
@@ -282,7 +428,112 @@ commands_tree.heading("command", text="Команда")
 commands_tree.column("#0", width=220)
 commands_tree.column("command", width=420)
 
-commands_tree.pack(fill="both", expand=True)
+commands_paned.add(commands_tree, weight=1)
+
+# Запуски команд и вывод выбранного запуска
+runs_paned = ttk.PanedWindow(commands_paned, orient="horizontal")
+commands_paned.add(runs_paned, weight=1)
+
+runs_tree = ttk.Treeview(
+    runs_paned,
+    columns=("status", "duration", "exit_code"),
+    show="tree headings",
+    selectmode="browse",
+    height=6
+)
+
+runs_tree.heading("#0", text="Запуск")
+runs_tree.heading("status", text="Состояние")
+runs_tree.heading("duration", text="Время")
+runs_tree.heading("exit_code", text="Код")
+
+runs_tree.column("#0", width=150)
+runs_tree.column("status", width=90, stretch=False)
+runs_tree.column("duration", width=60, anchor="e", stretch=False)
+runs_tree.column("exit_code", width=40, anchor="e", stretch=False)
+
+runs_paned.add(runs_tree, weight=1)
+
+run_output_frame = ttk.Frame(runs_paned)
+runs_paned.add(run_output_frame, weight=2)
+
+run_output = tk.Text(run_output_frame, wrap="none", height=8, state="disabled", font=("Consolas", 9))
+run_output_scroll = ttk.Scrollbar(run_output_frame, orient="vertical", command=run_output.yview)
+run_output.configure(yscrollcommand=run_output_scroll.set)
+
+run_output_scroll.pack(side="right", fill="y")
+run_output.pack(side="left", fill="both", expand=True)
+
+run_output.tag_configure("stderr", foreground="#b00000")
+
+# Вкладка "История": журнал запусков с отбором и постраничным выводом
+history_filter_frame = ttk.Frame(history_tab)
+history_filter_frame.pack(fill="x", pady=(0, 5))
+
+history_base_var = tk.StringVar()
+history_mode_var = tk.StringVar(value="Все")
+history_from_var = tk.StringVar()
+history_to_var = tk.StringVar()
+history_page_var = tk.StringVar()
+history_offset = 0
+
+history_mode_values = {"Все": ""}
+history_mode_values.update({title: mode for mode, title in MODE_TITLES.items()})
+
+ttk.Label(history_filter_frame, text="База:").pack(side="left")
+ttk.Entry(history_filter_frame, textvariable=history_base_var, width=20).pack(side="left", padx=(2, 8))
+
+ttk.Label(history_filter_frame, text="Режим:").pack(side="left")
+ttk.Combobox(
+    history_filter_frame,
+    textvariable=history_mode_var,
+    values=list(history_mode_values),
+    state="readonly",
+    width=15
+).pack(side="left", padx=(2, 8))
+
+ttk.Label(history_filter_frame, text="С:").pack(side="left")
+ttk.Entry(history_filter_frame, textvariable=history_from_var, width=11).pack(side="left", padx=(2, 4))
+ttk.Label(history_filter_frame, text="по:").pack(side="left")
+ttk.Entry(history_filter_frame, textvariable=history_to_var, width=11).pack(side="left", padx=(2, 8))
+
+ttk.Button(
+    history_filter_frame,
+    text="Сбросить",
+    command=lambda: reset_history_filters()
+).pack(side="left")
+
+history_columns = ("time", "base", "mode", "platform", "interface", "params", "latency", "duration", "exit_code")
+
+history_tree = ttk.Treeview(history_tab, columns=history_columns, show="headings", selectmode="browse")
+history_tree.heading("time", text="Время")
+history_tree.heading("base", text="База")
+history_tree.heading("mode", text="Режим")
+history_tree.heading("platform", text="Платформа")
+history_tree.heading("interface", text="Интерфейс")
+history_tree.heading("params", text="Параметры")
+history_tree.heading("latency", text="Запуск, мс")
+history_tree.heading("duration", text="Сеанс")
+history_tree.heading("exit_code", text="Код")
+
+history_tree.column("time", width=130, stretch=False)
+history_tree.column("base", width=200)
+history_tree.column("mode", width=110, stretch=False)
+history_tree.column("platform", width=90, stretch=False)
+history_tree.column("interface", width=80, stretch=False)
+history_tree.column("params", width=120)
+history_tree.column("latency", width=80, anchor="e", stretch=False)
+history_tree.column("duration", width=70, anchor="e", stretch=False)
+history_tree.column("exit_code", width=50, anchor="e", stretch=False)
+
+history_tree.pack(fill="both", expand=True)
+
+history_pager = ttk.Frame(history_tab)
+history_pager.pack(fill="x", pady=(4, 0))
+
+ttk.Button(history_pager, text="◀", width=3, command=lambda: show_history_page(-1)).pack(side="left")
+ttk.Label(history_pager, textvariable=history_page_var).pack(side="left", padx=6)
+ttk.Button(history_pager, text="▶", width=3, command=lambda: show_history_page(1)).pack(side="left")
 
 status_name_var = tk.StringVar(value="")
 status_connect_var = tk.StringVar(value="")
@@ -321,46 +572,61 @@ status_cmd_label = ttk.Label(
 
 status_cmd_label.pack(fill="x")
 
-# считает базы в большом узле
-def count_bases(nodes):
-    total = 0
-
-    for node in nodes:
-        if node.get("type") == "base":
-            if base_matches_filter(node):
-                total += 1
-
-        elif node.get("type") == "group":
-            total += count_bases(node.get("children", []))
-
-    return total
-
-
-# Нормализация строки соединения (для копирования)
-def normalize_connect_path(connect: str) -> str:
-    connect = (connect or "").strip()
-
-    lower = connect.lower()
+def history_filters():
+    return {
+        "base": history_base_var.get(),
+        "mode": history_mode_values.get(history_mode_var.get(), ""),
+        "date_from": history_from_var.get().strip(),
+        "date_to": history_to_var.get().strip()
+    }
 
-    if lower.startswith("file="):
-        path = connect[5:].strip()
-        path = path.rstrip(";").strip()
+def refresh_history(offset=0):
+    global history_offset
+
+    records, total = launch_history.query(offset=offset, limit=HISTORY_PAGE_SIZE, **history_filters())
+    history_offset = offset
+
+    history_tree.delete(*history_tree.get_children())
+
+    for record in records:
+        history_tree.insert("", "end", values=(
+            record.get("ts", "").replace("T", " "),
+            record.get("name", ""),
+            MODE_TITLES.get(record.get("mode"), record.get("mode", "")),
+            record.get("platform", ""),
+            record.get("interface", ""),
+            record.get("params", ""),
+            record.get("latency_ms", ""),
+            format_duration(record["duration_s"]) if record.get("duration_s") is not None else "",
+            record.get("exit_code", "")
+        ))
+
+    if total:
+        history_page_var.set(f"{offset + 1}–{offset + len(records)} из {total}")
+    else:
+        history_page_var.set("Запусков нет")
 
-        if len(path) >= 2 and path[0] == '"' and path[-1] == '"':
-            path = path[1:-1]
+def show_history_page(direction):
+    offset = history_offset + direction * HISTORY_PAGE_SIZE
+    _, total = launch_history.query(offset=0, limit=0, **history_filters())
 
-        return path
+    if 0 <= offset < total:
+        refresh_history(offset)
 
-    if lower.startswith("srvr="):
-        # Для серверной базы "путь" как файловый каталог не существует,
-        # поэтому возвращаем строку соединения как есть.
-        return connect.rstrip(";")
+def reset_history_filters():
+    history_base_var.set("")
+    history_mode_var.set("Все")
+    history_from_var.set("")
+    history_to_var.set("")
 
-    if lower.startswith("ws="):
-        return connect[3:].rstrip(";").strip()
+def refresh_history_if_visible():
+    if main_notebook.select() == str(history_tab):
+        refresh_history(history_offset)
 
-    return connect.rstrip(";").strip()
+for history_var in (history_base_var, history_mode_var, history_from_var, history_to_var):
+    history_var.trace_add("write", lambda *args: refresh_history_if_visible())
 
+main_notebook.bind("<<NotebookTabChanged>>", lambda e: refresh_history_if_visible())
 
 def copy_to_clipboard(text):
     root.clipboard_clear()
@@ -380,24 +646,6 @@ def get_selected_base():
     return item
 
 
-def normalize_infobase_path(connect):
-    connect = (connect or "").strip()
-    lower = connect.lower()
-
-    if lower.startswith("file="):
-        path = connect[5:].strip().rstrip(";").strip()
-
-        if len(path) >= 2 and path[0] == '"' and path[-1] == '"':
-            path = path[1:-1]
-
-        return path
-
-    if lower.startswith("ws="):
-        return connect[3:].strip().rstrip(";").strip()
-
-    return connect.rstrip(";").strip()
-
-
 def copy_base_name():
     base = get_selected_base()
     if base:
@@ -473,6 +721,50 @@ copy_cmd_button = ttk.Button(
 
 copy_cmd_button.pack(anchor="e", pady=(2, 0))
 
+# индикатор фонового пересчёта размеров баз, виден только во время работы
+size_progress_frame = ttk.Frame(status_frame)
+
+size_progress_var = tk.StringVar(value="")
+
+size_progress_bar = ttk.Progressbar(
+    size_progress_frame,
+    orient="horizontal",
+    mode="determinate",
+    length=160
+)
+
+size_progress_bar.pack(side="left")
+
+ttk.Label(
+    size_progress_frame,
+    textvariable=size_progress_var,
+    foreground="#888888"
+).pack(side="left", padx=(6, 0))
+
+ttk.Button(
+    size_progress_frame,
+    text="Отмена",
+    command=lambda: cancel_size_refresh()
+).pack(side="right")
+
+# ошибки синхронизации с .v8i, видны до следующей удачной синхронизации
+v8i_sync_error_frame = ttk.Frame(status_frame)
+
+v8i_sync_error_var = tk.StringVar(value="")
+v8i_sync_errors = []
+
+ttk.Label(
+    v8i_sync_error_frame,
+    textvariable=v8i_sync_error_var,
+    foreground="#b00000"
+).pack(side="left")
+
+ttk.Button(
+    v8i_sync_error_frame,
+    text="Подробнее",
+    command=lambda: messagebox.showwarning("Синхронизация .v8i", "\n\n".join(v8i_sync_errors))
+).pack(side="right")
+
 # сохраняем ширину колонок списка
 def save_column_widths():
     starter["column_widths"] = {
@@ -510,20 +802,32 @@ def update_status():
 
     status_name_var.set(base.get("name", ""))
     status_connect_var.set(base.get("connect", ""))
-    status_cmd_var.set("")
+
+    running = process_supervisor.running(base.get("id")) if base.get("type") == "base" else []
+
+    if running:
+        pids = ", ".join(str(record["pid"]) for record in running)
+        status_cmd_var.set(f"Запущено клиентов: {len(running)} (PID {pids})")
+    else:
+        status_cmd_var.set("")
     
 
 
 # Поиск по Enter
 def perform_search(event=None):
-    global search_results, search_index
+    global search_results, search_index, search_after_id
 
-    query = search_var.get().strip().lower()
-    if not query or query == SEARCH_PLACEHOLDER.lower():
+    if search_after_id:
+        root.after_cancel(search_after_id)
+        search_after_id = None
+
+    query = search_var.get().strip()
+    if not query or query == SEARCH_PLACEHOLDER:
         return "break"
 
     search_results = collect_search_results(query)
     search_index = -1
+    show_search_count()
     find_next()
 
     return "break"
@@ -531,49 +835,100 @@ def perform_search(event=None):
 search_entry.bind("<Return>", perform_search)
 search_results = []
 search_index = -1
+search_limit = SEARCH_LIMIT
+search_truncated = False
+search_after_id = None
+SEARCH_DELAY_MS = 150
+SEARCH_MIN_LENGTH = 2
 
 
-def collect_search_results(query):
-    result = []
-
-    def walk(parent=""):
-        for iid in tree.get_children(parent):
-            item = tree.item(iid)
-            text = item["text"].lower()
+# Поиск идёт по индексу модели, а не по Treeview: так находятся и базы
+# в ещё не загруженных группах, а также совпадения в строке подключения,
+# пути к базе, версии платформы и пути группы.
+# Совпадения берутся страницами по SEARCH_LIMIT: следующая страница
+# запрашивается, только когда F3 доходит до конца текущей.
+def collect_search_results(query, limit=SEARCH_LIMIT):
+    global search_limit, search_truncated
 
-            if query in text:
-                result.append(iid)
+    results = bases_index.search(query, platform_filter, limit)
+    search_limit = limit
+    search_truncated = bases_index.truncated
+    return results
 
-            walk(iid)
 
-    walk()
-    return result
+def show_search_count():
+    if not search_results:
+        search_count_var.set("Не найдено")
+    elif search_truncated:
+        search_count_var.set(f"Найдено: {len(search_results)}+")
+    else:
+        search_count_var.set(f"Найдено: {len(search_results)}")
 
 
 def find_next(event=None):
     global search_results, search_index
 
-    query = search_var.get().strip().lower()
-    if not query or query == SEARCH_PLACEHOLDER.lower():
+    query = search_var.get().strip()
+    if not query or query == SEARCH_PLACEHOLDER:
         return "break"
 
     if not search_results:
         search_results = collect_search_results(query)
         search_index = -1
+        show_search_count()
 
     if not search_results:
         return "break"
 
+    if search_index + 1 >= len(search_results) and search_truncated:
+        search_results = collect_search_results(query, search_limit + SEARCH_LIMIT)
+        show_search_count()
+
     search_index = (search_index + 1) % len(search_results)
     iid = search_results[search_index]
 
-    tree.see(iid)
+    # Результаты могли устареть после правок — в следующий раз ищем заново
+    if not reveal_node(iid):
+        search_results = []
+        return "break"
+
     tree.selection_set(iid)
     tree.focus(iid)
 
     return "break"
 
 
+# Поиск по мере ввода: запускается после короткой паузы в наборе
+def on_search_changed(*args):
+    global search_after_id
+
+    if search_after_id:
+        root.after_cancel(search_after_id)
+
+    search_after_id = root.after(SEARCH_DELAY_MS, run_live_search)
+
+
+# Выделение в дереве при наборе не двигается: к совпадениям переходят
+# по Enter и F3, а здесь только обновляется их число
+def run_live_search():
+    global search_results, search_index, search_after_id
+
+    search_after_id = None
+    search_results = []
+    search_index = -1
+
+    query = search_var.get().strip()
+
+    # Односимвольный запрос совпадает почти со всем каталогом — ждём второй символ
+    if len(query) < SEARCH_MIN_LENGTH or query == SEARCH_PLACEHOLDER:
+        search_count_var.set("")
+        return
+
+    search_results = collect_search_results(query)
+    show_search_count()
+
+
+search_var.trace_add("write", on_search_changed)
 root.bind("<F3>", find_next)
 search_entry.bind("<F3>", find_next)
 
@@ -593,51 +948,283 @@ root.bind("<Control-F>", focus_search)
 
 # F5 → перезагрузка данных
 def reload_data():
-    global starter, favorites
+    global starter, catalog, bases_index, connections_index, search_results
 
     current_open_nodes = get_open_nodes()
-    
-    starter = load_json()
+
+    flush_json()
+    catalog = Catalog(load_json())
+    storage.attach(catalog)
+    bases_index = SearchIndex(catalog)
+    connections_index = ConnectionIndex(catalog)
+    search_results = []
+    starter = catalog.data
+    starter["open_nodes"] = current_open_nodes
+    launch_history.apply_last_runs(catalog)
+
+    save_json(starter)
+    populate_tree()
+    start_size_refresh()
+
+root.bind("<F5>", lambda e: reload_data())
+
+STARTER_POLL_MS = 500
+
+# Изменения starter.json от других копий: чужие правки сливаются с
+# несохранёнными своими, дерево обновляется через TreeReconciler —
+# без F5, перечитывания .v8i и пересчёта размеров
+def poll_starter_changes():
+    while True:
+        try:
+            event = starter_sync.events.get_nowait()
+        except queue.Empty:
+            break
+
+        try:
+            if event[0] == "external":
+                _, text, stamp = event
+
+                # Уже слито при записи или файл успел измениться ещё раз
+                if not starter_sync.is_stale(stamp):
+                    adopt_starter(starter_sync.base(), text, stamp)
+            else:
+                _, snapshot, text, stamp = event
+                adopt_starter(parse_starter(snapshot), text, stamp)
+
+        except Exception as e:
+            print(f"[!] Не удалось применить изменения {STARTER_JSON}: {e}")
+
+    root.after(STARTER_POLL_MS, poll_starter_changes)
+
+def adopt_starter(base, text, stamp):
+    global starter, catalog, bases_index, connections_index, search_results
+
+    theirs = parse_starter(text)
+    current_open_nodes = get_open_nodes()
+    merged = merge_starter(base, catalog.data, theirs)
+
+    storage.discard()
+    starter_sync.rebase(text, stamp)
+
+    catalog = Catalog(merged)
+    storage.attach(catalog)
+    bases_index = SearchIndex(catalog)
+    connections_index = ConnectionIndex(catalog)
+    search_results = []
+    starter = catalog.data
     starter["open_nodes"] = current_open_nodes
-    favorites = starter.get("favorites", [])
+    launch_history.apply_last_runs(catalog)
+
+    # Свои несохранённые правки остались — записываем поверх новой версии
+    if data_changed(merged, theirs):
+        save_json(starter)
+
+    populate_tree()
+
+size_refresher = None
+size_cache = StatCache(SIZE_CACHE_JSON)
+
+# Размеры файловых баз считаются в фоне; свежие (settings.json,
+# size_refresh_days, по умолчанию раз в день) не перепроверяются.
+# Свежесть смотрится и по дате в базе, и по кэшу stat: база, которую
+# перенесли в другую группу или добавили заново, не проверяется повторно.
+def start_size_refresh():
+    global size_refresher
+
+    cancel_size_refresh()
+
+    settings = load_settings()
+    days = settings.get("size_refresh_days", SIZE_REFRESH_DAYS)
+    today = datetime.date.today()
+    now = time.time()
+    jobs = []
+
+    for base_id, node in catalog.nodes.items():
+        if node.get("type") != "base":
+            continue
+
+        path = file_base_path(node.get("connect", ""))
+
+        if path is None or is_size_fresh(node, days, today):
+            continue
+
+        if node.get("size") and size_cache.is_fresh(os.path.join(path, DB_FILE_NAME), days * 86400, now):
+            continue
+
+        jobs.append((base_id, path))
 
-    def refresh_sizes(nodes):
-        for node in nodes:
-            if node.get("type") == "group":
-                refresh_sizes(node.get("children", []))
+    if not jobs:
+        return
+
+    size_refresher = SizeRefresher(
+        root.after,
+        on_size_result,
+        on_progress=on_size_progress,
+        on_done=on_size_done,
+        max_workers=settings.get("size_max_workers", SIZE_MAX_WORKERS),
+        share_workers=settings.get("size_share_workers", SIZE_SHARE_WORKERS),
+        timeout=settings.get("size_timeout", SIZE_TIMEOUT),
+        measure=size_cache.base_size
+    )
+
+    size_refresher.start(jobs)
+
+def cancel_size_refresh():
+    if size_refresher is not None and size_refresher.running:
+        size_refresher.cancel()
+
+def on_size_result(base_id, size_bytes, status):
+    base = catalog.get(base_id)
+    if base is None:
+        return
+
+    today = datetime.date.today().isoformat()
+
+    if status is None:
+        size = format_size(size_bytes)
+
+        # Размер не изменился — строку не трогаем, свежесть хранит кэш stat
+        if base.get("size") == size and not base.get("size_status"):
+            return
+
+        updates = {"size": size, "size_updated": today}
+
+        if base.get("size_status"):
+            updates["size_status"] = ""
+
+    elif status == SIZE_MISSING:
+        updates = {"size": "", "size_status": SIZE_MISSING, "size_updated": today}
+
+    else:
+        # Дату не трогаем — недоступная база перепроверится при следующем F5
+        updates = {"size_status": SIZE_UNREACHABLE}
+
+    update_base_everywhere(base_id, updates)
+    refresh_base_rows(base)
+
+def on_size_progress(done, total):
+    if not size_progress_frame.winfo_ismapped():
+        size_progress_frame.pack(fill="x", pady=(2, 0))
+
+    size_progress_bar.configure(maximum=total, value=done)
+    size_progress_var.set(f"Размеры баз: {done} из {total}")
+
+def on_size_done(cancelled):
+    size_progress_frame.pack_forget()
+    size_cache.save()
+    save_json(starter)
+
+v8i_sync_state = None
+v8i_sync_running = False
+v8i_sync_after_id = None
+
+# Синхронизация с файлами .v8i из настроек: чтение и сравнение с прошлым
+# разом идут в фоновом потоке, а в каталог изменения вносятся в потоке Tk.
+# Неизменённые файлы не перечитываются, поэтому по таймеру это дёшево.
+def start_v8i_sync():
+    global v8i_sync_state, v8i_sync_running
+
+    v8i_paths = load_settings().get("v8i_paths", [])
+
+    if v8i_sync_running or not v8i_paths:
+        return
+
+    if v8i_sync_state is None:
+        v8i_sync_state = load_v8i_sync_state(V8I_SYNC_JSON)
+
+    v8i_sync_running = True
+    results = queue.Queue()
+
+    def worker():
+        try:
+            results.put(plan_v8i_sync(v8i_paths, v8i_sync_state))
+        except Exception as e:
+            results.put(e)
+
+    threading.Thread(target=worker, name="v8i-sync", daemon=True).start()
+    root.after(100, lambda: poll_v8i_sync(results))
+
+def poll_v8i_sync(results):
+    global v8i_sync_running
+
+    try:
+        plans = results.get_nowait()
+    except queue.Empty:
+        root.after(100, lambda: poll_v8i_sync(results))
+        return
+
+    v8i_sync_running = False
+
+    if isinstance(plans, Exception):
+        show_v8i_sync_errors([f"Синхронизация не выполнена: {plans}"])
+        return
+
+    show_v8i_sync_errors([f'{plan["path"]}:\n{plan["error"]}' for plan in plans if plan["error"]])
+
+    counts = apply_v8i_sync(catalog, plans, v8i_sync_state)
+
+    if any(not plan["unchanged"] or plan["error"] for plan in plans):
+        save_v8i_sync_state(V8I_SYNC_JSON, v8i_sync_state)
 
-            elif node.get("type") == "base":
-                connect = node.get("connect", "").strip()
+    if any(counts.values()):
+        save_json(starter)
+        populate_tree()
+
+# Окна нет — синхронизация идёт по таймеру, поэтому ошибки показываются
+# строкой в статусе, а список — по кнопке «Подробнее»
+def show_v8i_sync_errors(errors):
+    v8i_sync_errors[:] = errors
+
+    if errors:
+        v8i_sync_error_var.set(f"Синхронизация .v8i: ошибок {len(errors)}")
 
-                if connect.lower().startswith("file="):
-                    path = connect[5:]
-                    path = path.rstrip(";").strip()
+        if not v8i_sync_error_frame.winfo_ismapped():
+            v8i_sync_error_frame.pack(fill="x", pady=(2, 0))
+    else:
+        v8i_sync_error_frame.pack_forget()
+
+# settings.json: v8i_sync_minutes — период синхронизации, 0 — выключена
+def schedule_v8i_sync(settings=None):
+    global v8i_sync_after_id
 
-                    if path.startswith('"') and path.endswith('"'):
-                        path = path[1:-1]
+    if v8i_sync_after_id is not None:
+        root.after_cancel(v8i_sync_after_id)
+        v8i_sync_after_id = None
 
-                    today = datetime.date.today().isoformat()
+    minutes = (settings or load_settings()).get("v8i_sync_minutes", 0)
 
-                    if node.get("size_updated") == today:
-                        continue
-                        
-                    db_file = os.path.join(path, "1Cv8.1CD")
+    if minutes > 0:
+        v8i_sync_after_id = root.after(int(minutes * 60000), on_v8i_sync_timer)
 
-                    if os.path.exists(db_file):
-                        size_value = format_size(os.path.getsize(db_file))
-                    else:
-                        size_value = ""
+def on_v8i_sync_timer():
+    global v8i_sync_after_id
 
-                    node["size"] = size_value
-                    node["size_updated"] = today
+    v8i_sync_after_id = None
+    start_v8i_sync()
+    schedule_v8i_sync()
 
-    refresh_sizes(starter.get("groups", []))
-    refresh_sizes(starter.get("favorites", []))
+def open_settings():
+    # Экспорт читает хранилище с диска — сначала дописываем отложенные изменения
+    flush_json()
+    open_settings_dialog(
+        root,
+        reload_data,
+        on_save=apply_settings,
+        storage=storage,
+        get_catalog=lambda: catalog,
+        on_imported=on_v8i_imported
+    )
 
+# Базы из .v8i уже добавлены в каталог — сохранить и показать
+def on_v8i_imported():
     save_json(starter)
     populate_tree()
+    start_size_refresh()
 
-root.bind("<F5>", lambda e: reload_data())
+def apply_settings(settings):
+    storage.set_compact(settings.get("compact_json", False))
+    set_preferred_arch(settings.get("platform_arch", ""))
+    schedule_v8i_sync(settings)
 
 def rename_selected_group():
     selected = tree.focus()
@@ -673,9 +1260,8 @@ def rename_selected_group():
         if not new_name:
             return
 
-        item["name"] = new_name
+        catalog.rename(selected, new_name)
 
-        starter["open_nodes"] = get_open_nodes()
         save_json(starter)
         populate_tree()
         dialog.destroy()
@@ -737,8 +1323,12 @@ def delete_selected_base():
         return
 
     base = tree_nodes[selected]
+
+    if base.get("type") != "base":
+        messagebox.showinfo("Удаление", "Выберите базу для удаления.")
+        return
+
     name = base.get("name")
-    connect = base.get("connect")
 
     if not messagebox.askyesno(
         "Подтверждение",
@@ -746,22 +1336,10 @@ def delete_selected_base():
     ):
         return
 
-    # Удаляем из favorites
-    global favorites
-    favorites = [b for b in favorites if not (b.get("name") == name and b.get("connect") == connect)]
-    starter["favorites"] = favorites
-
-    # Удаляем из всех групп
-    def remove_from_groups(groups):
-        for group in groups:
-            if group.get("type") == "group":
-                group["children"] = [
-                    b for b in group.get("children", [])
-                    if not (b.get("type") == "base" and b.get("name") == name and b.get("connect") == connect)
-                ]
-                remove_from_groups(group["children"])
-
-    remove_from_groups(starter.get("groups", []))
+    base_id = ensure_id(base)
+
+    catalog.remove(base_id)
+
     save_json(starter)
     populate_tree()
 
@@ -785,9 +1363,7 @@ menu_bar.columnconfigure(1, minsize=24)
 starter_icon = None
 
 try:
-    img_starter = Image.open(os.path.join(RESOURCE_DIR, "assets", "icons", "1c_starter.png"))
-    img_starter = img_starter.resize((18, 18), Image.Resampling.LANCZOS)
-    starter_icon = ImageTk.PhotoImage(img_starter)
+    starter_icon = load_icon("1c_starter.png")
 except Exception as e:
     print(f"Иконка штатного стартера не загрузилась: {e}")
 
@@ -854,8 +1430,10 @@ interface = tk.StringVar(value="Auto")
 ttk.Combobox(param_frame, values=["Auto", "Версия 8.5", "Такси", "Обычный"], textvariable=interface, state="readonly").pack(anchor="w")
 
 starter = {}
-favorites = []
+catalog = None
+bases_index = None
 tree_nodes = {}
+loaded_groups = set()
 commands_nodes = {}
 
 def load_window_geometry():
@@ -868,19 +1446,20 @@ def save_window_geometry():
 def get_open_nodes():
     open_ids = []
 
-    def walk(parent=""):
-        for iid in tree.get_children(parent):
-            if tree.item(iid, "open"):
-                if iid == "favorites":
-                    open_ids.append("favorites")
-                elif iid in tree_nodes:
-                    item = tree_nodes[iid]
-                    item_id = ensure_id(item)
-                    open_ids.append(item_id)
+    for iid in tree_reconciler.rendered_ids():
+        if not tree.item(iid, "open"):
+            continue
+
+        if iid == "favorites":
+            open_ids.append("favorites")
+        elif iid in tree_nodes and not iid.startswith("fav_"):
+            open_ids.append(ensure_id(tree_nodes[iid]))
 
-            walk(iid)
+    # Незагруженные группы в Treeview не видны — их состояние берём из модели
+    for iid in starter.get("open_nodes", []):
+        if not tree_reconciler.is_rendered(iid) and iid not in open_ids:
+            open_ids.append(iid)
 
-    walk()
     return open_ids
 
 def on_close():
@@ -889,22 +1468,39 @@ def on_close():
 
     save_column_widths()
 
-    save_json(starter)
+    cancel_size_refresh()
+    storage.close(starter)
+
+    # Вид хранилища сменили в настройках — данные переносятся при выходе,
+    # со следующего запуска работает новое хранилище
+    kind = load_settings().get("storage", STORAGE_JSON)
+
+    if kind != storage.kind:
+        try:
+            copy_to_backend(starter, kind, STARTER_JSON, STARTER_DB)
+        except (sqlite3.Error, OSError) as e:
+            print(f"[!] Не удалось перенести список баз в новое хранилище: {e}")
+
     root.destroy()
 
 def load_json():
-    if not os.path.exists(STARTER_JSON):
-        return {
-            "favorites": [],
-            "groups": [],
-            "window_geometry": "900x600"
-        }
-    with open(STARTER_JSON, "r", encoding="utf-8") as f:
-        return json.load(f)
+    data = storage.load()
+
+    if storage.recovered:
+        messagebox.showwarning(
+            "Хранилище",
+            f"В {STARTER_DB} найдено узлов без родительской группы: {storage.recovered}.\n\n"
+            f"Они перенесены в корень списка, базы — в группу «{LOST_BASES_GROUP}»."
+        )
+
+    return data
 
 def save_json(data):
-    with open(STARTER_JSON, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+    storage.save(data)
+
+# Дописывает отложенные изменения каталога в хранилище
+def flush_json():
+    storage.flush()
 
 # Загрузка списка команд для вкладки "Команды"
 def load_commands():
@@ -916,62 +1512,13 @@ def load_commands():
 
 
 def save_commands(data):
-    with open(COMMANDS_JSON, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
-
-def format_size(size_bytes):
-    for unit in ["Б", "КБ", "МБ", "ГБ", "ТБ"]:
-        if size_bytes < 1024:
-            return f"{size_bytes:.1f} {unit}"
-
-        size_bytes /= 1024
-
-    return f"{size_bytes:.1f} ПБ"
-
-
-def calculate_folder_size(path):
-    total = 0
-
-    try:
-        for root_dir, dirs, files in os.walk(path):
-            for file in files:
-                file_path = os.path.join(root_dir, file)
-
-                try:
-                    total += os.path.getsize(file_path)
-                except Exception:
-                    pass
-
-    except Exception:
-        return ""
-
-    return format_size(total)
-
-def ensure_id(item):
-    if not item.get("id"):
-        item["id"] = str(uuid.uuid4())
-    return item["id"]
-
-
-def insert_item(parent, item):
-    base_id = ensure_id(item)
-    iid = base_id
-
-    if parent == "favorites":
-        iid = f"fav_{base_id}"
-
-    values = (item.get("platform", ""), item.get("last_run", ""), item.get("size", ""))
-    tree_nodes[iid] = item
-    tree.insert(parent, "end", iid=iid, text=item["name"], values=values)
+    atomic_write_json(COMMANDS_JSON, data)
 
 def base_matches_filter(item):
-    selected_version = version_filter_var.get()
-
-    if not selected_version:
-        return True
+    return platform_matches(item, platform_filter)
 
-    platform = item.get("platform", "")
-    return platform.startswith(selected_version)
+def is_group_loaded(group_id):
+    return not starter.get("lazy_tree", True) or group_id in loaded_groups
 
 
 def group_has_visible_bases(children):
@@ -985,34 +1532,15 @@ def group_has_visible_bases(children):
 
     return False
 
-def insert_children(parent, children):
-    sorted_children = sorted(
-        children,
-        key=lambda x: (
-            x.get("type") != "group",
-            not x.get("name", "").startswith("_"),
-            x.get("name", "").lower()
-        )
-    )
-
-    for child in sorted_children:
-        if child.get("type") == "group":
+# Точечное обновление строк базы (в группе и в избранном) без перестроения дерева
+def refresh_base_rows(base):
+    base_id = ensure_id(base)
 
-            open_nodes = starter.get("open_nodes", [])
-            group_id = ensure_id(child)
-            gid = tree.insert(
-                parent,
-                "end",
-                iid=group_id,
-                text=child["name"],
-                open=group_id in open_nodes
-            )
-            tree_nodes[gid] = child
-            insert_children(gid, child.get("children", []))
+    for iid in (base_id, f"fav_{base_id}"):
+        item = tree_nodes.get(iid)
 
-        elif child.get("type") == "base":
-            if base_matches_filter(child):
-                insert_item(parent, child)
+        if item is not None:
+            tree_reconciler.update_row(iid, *base_row(item))
 
 def open_launch_params_dialog(mode="enterprise", force_auth=False):
     selected = tree.focus()
@@ -1207,49 +1735,80 @@ def open_launch_params_dialog(mode="enterprise", force_auth=False):
     ttk.Button(bottom, text="Продолжить", command=continue_launch).pack(side="right", padx=(0, 8))
 
 def populate_tree():
+    lazy = starter.get("lazy_tree", True)
+    layout, rows, nodes = build_tree_layout(catalog, platform_filter, loaded_groups if lazy else None)
+
     tree_nodes.clear()
-    tree.delete(*tree.get_children())
+    tree_nodes.update(nodes)
 
-    open_nodes = starter.get("open_nodes", [])
+    open_nodes = set(starter.get("open_nodes", []))
+    open_nodes.add("favorites")
 
-    favorites_count = count_bases(favorites)
-    favorites_title = f"★ Избранное ({favorites_count})"
+    tree_reconciler.sync(layout, rows, open_nodes)
 
-    tree.insert(
-        "",
-        "end",
-        iid="favorites",
-        text=favorites_title,
-        open=True
-    )
+def on_tree_open(event=None):
+    iid = tree.focus()
+    item = tree_nodes.get(iid)
 
-    for fav in favorites:
-        if base_matches_filter(fav):
-            insert_item("favorites", fav)
+    if not item or item.get("type") != "group" or iid in loaded_groups:
+        return
 
-    sorted_groups = sorted(
-        starter.get("groups", []),
-        key=lambda x: (
-            not x.get("name", "").startswith("_"),
-            x.get("name", "").lower()
-        )
-    )
+    loaded_groups.add(iid)
 
-    for group in sorted_groups:
+    if starter.get("lazy_tree", True):
+        populate_tree()
 
-        group_count = count_bases(group.get("children", []))
-        group_title = f'{group["name"]} ({group_count})'
+def on_tree_close(event=None):
+    iid = tree.focus()
 
-        group_id = ensure_id(group)
-        gid = tree.insert(
-            "",
-            "end",
-            iid=group_id,
-            text=group_title,
-            open=group_id in open_nodes
-        )
-        tree_nodes[gid] = group
-        insert_children(gid, group.get("children", []))
+    if not starter.get("unload_closed_groups", False) or iid not in loaded_groups:
+        return
+
+    remember_open_state(iid)
+    loaded_groups.discard(iid)
+    populate_tree()
+
+# Перед выгрузкой группы запоминаем раскрытие вложенных групп,
+# иначе после повторной загрузки оно потеряется.
+def remember_open_state(group_id):
+    open_nodes = set(starter.get("open_nodes", []))
+    open_nodes.discard(group_id)
+
+    stack = list(tree_reconciler.children_of(group_id))
+
+    while stack:
+        iid = stack.pop()
+        item = tree_nodes.get(iid)
+
+        if not item or item.get("type") != "group":
+            continue
+
+        if tree.item(iid, "open"):
+            open_nodes.add(iid)
+        else:
+            open_nodes.discard(iid)
+
+        stack.extend(tree_reconciler.children_of(iid))
+
+    starter["open_nodes"] = list(open_nodes)
+
+# Подгружает цепочку групп до узла и прокручивает к нему
+def reveal_node(iid):
+    if not iid.startswith("fav_"):
+        missing = [
+            ensure_id(group) for group in catalog.ancestors(iid)
+            if not is_group_loaded(ensure_id(group))
+        ]
+
+        if missing:
+            loaded_groups.update(missing)
+            populate_tree()
+
+    if not tree_reconciler.is_rendered(iid):
+        return False
+
+    tree.see(iid)
+    return True
 
 # Генерация дерева команд
 def populate_commands_tree():
@@ -1372,7 +1931,7 @@ def open_platform_filter_dialog():
 
     center_window(root, dialog, 260, 160)
 
-    selected = tk.StringVar(value=version_filter_var.get() or "8.5")
+    selected = tk.StringVar(value=platform_filter or "8.5")
 
     options = [
         ("1С:Предприятие 8.5", "8.5"),
@@ -1396,16 +1955,18 @@ def open_platform_filter_dialog():
     button_frame.pack(fill="x", padx=10, pady=(12, 10))
 
     def apply_filter():
+        global platform_filter
+
         value = selected.get()
-        starter["open_nodes"] = get_open_nodes()
-        version_filter_var.set(value)
+        platform_filter = value
         filter_button_text.set(value)
         populate_tree()
         dialog.destroy()
 
     def clear_filter():
-        starter["open_nodes"] = get_open_nodes()
-        version_filter_var.set("")
+        global platform_filter
+
+        platform_filter = ""
         filter_button_text.set("8.x")
         populate_tree()
         dialog.destroy()
@@ -1432,6 +1993,14 @@ def on_register_save(result):
         "size": ""
     }
 
+    twins = connections_index.find(base_entry["connect"])
+
+    if twins and not messagebox.askyesno(
+        "Добавление базы",
+        f"База с этой строкой подключения уже есть: «{catalog.get(twins[0]).get('name', '')}».\n\nДобавить ещё одну?"
+    ):
+        return
+
     selected = tree.focus()
     target_group = None
 
@@ -1451,21 +2020,17 @@ def on_register_save(result):
                     target_group = parent_item
 
     if target_group is not None:
-        target_group.setdefault("children", []).append(base_entry)
+        catalog.add(base_entry, target_group)
 
     elif starter.get("groups"):
-        starter["groups"][0].setdefault("children", []).append(base_entry)
+        catalog.add(base_entry, starter["groups"][0])
 
     else:
-        starter["groups"] = [
-            {
-                "name": "Информационные базы",
-                "type": "group",
-                "children": [base_entry]
-            }
-        ]
-
-    starter["open_nodes"] = get_open_nodes()
+        catalog.add({
+            "name": "Информационные базы",
+            "type": "group",
+            "children": [base_entry]
+        })
 
     save_json(starter)
     populate_tree()
@@ -1479,151 +2044,67 @@ def add_to_favorites():
         if item.get("type") != "base":
             return
 
-        if not any(
-            f.get("name") == item.get("name")
-            and f.get("connect") == item.get("connect")
-            for f in favorites
-        ):
+        base_id = ensure_id(item)
+        twins = [
+            twin_id for twin_id in connections_index.find(item.get("connect"), exclude=base_id)
+            if catalog.is_favorite(twin_id)
+        ]
 
-            favorites.append(item.copy())
-            starter["favorites"] = favorites
-            starter["open_nodes"] = get_open_nodes()
+        if twins:
+            messagebox.showinfo(
+                "Избранное",
+                f"База с этой строкой подключения уже в избранном: «{catalog.get(twins[0]).get('name', '')}»."
+            )
+            return
 
+        if catalog.add_favorite(item):
             save_json(starter)
             populate_tree()
 
-def update_base_everywhere(name, connect, updates):
-    def walk(nodes):
-        for node in nodes:
-            if node.get("type") == "group":
-                walk(node.get("children", []))
-            elif node.get("type") == "base":
-                if node.get("name") == name and node.get("connect") == connect:
-                    node.update(updates)
+# Отчёт о базах с одинаковой строкой подключения по всему каталогу
+def open_duplicates():
+    duplicates = connections_index.duplicates()
 
-    walk(starter.get("groups", []))
+    if not duplicates:
+        messagebox.showinfo("Дубликаты баз", "Баз с одинаковой строкой подключения нет.")
+        return
 
-    for fav in starter.get("favorites", []):
-        if fav.get("name") == name and fav.get("connect") == connect:
-            fav.update(updates)
+    def describe(base_id):
+        node = catalog.get(base_id)
+        parent = catalog.parent_of(base_id)
+        group_path = catalog.group_path(parent.get("id")) if parent else ""
 
-def open_properties(item_id):
-    item = tree_nodes[item_id]
+        return (node.get("name", ""), group_path, node.get("connect", ""), node.get("last_run", ""))
 
-    def on_save(new_data):
-        old_name = item.get("name")
-        old_connect = item.get("connect")
+    def show(base_id):
+        main_notebook.select(bases_tab)
 
-        update_base_everywhere(old_name, old_connect, new_data)
+        if reveal_node(base_id):
+            tree.selection_set(base_id)
+            tree.focus(base_id)
+
+    def delete(base_id):
+        catalog.remove(base_id)
 
         save_json(starter)
         populate_tree()
 
-    open_properties_dialog(root, item.copy(), on_save)
-
-def collect_group_paths():
-    result = []
-
-    def walk(groups, prefix=""):
-        for group in groups:
-            if group.get("type") != "group":
-                continue
-
-            name = group.get("name", "")
-            path = f"{prefix}\\{name}" if prefix else name
-            result.append(path)
-
-            walk(group.get("children", []), path)
-
-    walk(starter.get("groups", []))
-    return result
-
-
-def remove_base_from_groups(groups, name, connect):
-    for group in groups:
-        if group.get("type") != "group":
-            continue
-
-        children = group.get("children", [])
-
-        for child in list(children):
-            if (
-                child.get("type") == "base"
-                and child.get("name") == name
-                and child.get("connect") == connect
-            ):
-                children.remove(child)
-                return child
-
-        found = remove_base_from_groups(children, name, connect)
-        if found:
-            return found
-
-    return None
-
-
-def add_base_to_group_path(groups, group_path, base):
-    parts = group_path.split("\\")
-    current = groups
-
-    for part in parts:
-        match = next(
-            (
-                g for g in current
-                if g.get("type") == "group" and g.get("name") == part
-            ),
-            None
-        )
-
-        if not match:
-            match = {
-                "type": "group",
-                "name": part,
-                "children": []
-            }
-            current.append(match)
-
-        current = match["children"]
+    open_duplicates_dialog(root, duplicates, describe, show, delete)
 
-    current.append(base)
-
-def find_node_by_id(nodes, node_id):
-    for node in nodes:
-        if ensure_id(node) == node_id:
-            return node
-
-        if node.get("type") == "group":
-            found = find_node_by_id(node.get("children", []), node_id)
-            if found:
-                return found
-
-    return None
-
-
-def remove_node_by_id(nodes, node_id):
-    for node in list(nodes):
-        if ensure_id(node) == node_id:
-            nodes.remove(node)
-            return node
-
-        if node.get("type") == "group":
-            found = remove_node_by_id(node.get("children", []), node_id)
-            if found:
-                return found
-
-    return None
+# Обновляет базу по id; избранное ссылается на тот же объект
+def update_base_everywhere(base_id, updates):
+    return catalog.update_base(base_id, updates)
 
+def open_properties(item_id):
+    item = tree_nodes[item_id]
 
-def is_descendant_group(parent_group, possible_child_id):
-    for child in parent_group.get("children", []):
-        if ensure_id(child) == possible_child_id:
-            return True
+    def on_save(new_data):
+        update_base_everywhere(ensure_id(item), new_data)
 
-        if child.get("type") == "group":
-            if is_descendant_group(child, possible_child_id):
-                return True
+        save_json(starter)
+        populate_tree()
 
-    return False
+    open_properties_dialog(root, item.copy(), on_save)
 
 def move_selected_nodes():
     selected_ids = list(tree.selection())
@@ -1647,7 +2128,7 @@ def move_selected_nodes():
         messagebox.showinfo("Перемещение", "Нет выбранных элементов для перемещения.")
         return
 
-    group_paths = collect_group_paths()
+    group_paths = catalog.group_paths()
 
     if not group_paths:
         messagebox.showinfo("Перемещение", "Нет доступных групп.")
@@ -1677,7 +2158,7 @@ def move_selected_nodes():
 
     def apply_move():
         target_path = group_var.get()
-        target_group = find_group_by_path(starter.get("groups", []), target_path)
+        target_group = catalog.find_group_by_path(target_path)
 
         if not target_group:
             messagebox.showerror("Перемещение", "Группа назначения не найдена.")
@@ -1685,53 +2166,17 @@ def move_selected_nodes():
 
         target_id = ensure_id(target_group)
 
-        moved = []
-
-        for item in movable:
-            item_id = ensure_id(item)
-
-            if item.get("type") == "group":
-                if item_id == target_id or is_descendant_group(item, target_id):
-                    continue
+        catalog.move([ensure_id(item) for item in movable], target_group)
 
-            removed = remove_node_by_id(starter.get("groups", []), item_id)
-
-            if removed:
-                moved.append(removed)
-
-        target_group.setdefault("children", []).extend(moved)
-
-        starter["open_nodes"] = get_open_nodes()
-        starter["open_nodes"].append(target_id)
+        loaded_groups.add(target_id)
 
         save_json(starter)
         populate_tree()
+        tree.item(target_id, open=True)
         dialog.destroy()
 
     ttk.Button(dialog, text="Переместить", command=apply_move).pack(pady=(6, 10))
 
-def find_group_by_path(groups, group_path):
-    parts = group_path.split("\\")
-    current = groups
-    found = None
-
-    for part in parts:
-        found = next(
-            (
-                g for g in current
-                if g.get("type") == "group" and g.get("name") == part
-            ),
-            None
-        )
-
-        if not found:
-            return None
-
-        current = found.get("children", [])
-
-    return found
-
-
 def show_context_menu(event):
     selected = tree.identify_row(event.y)
     if not selected:
@@ -1762,20 +2207,32 @@ def show_context_menu(event):
             menu.add_command(label="Удалить группу...", command=delete_selected_group)
 
         menu.add_command(label="Переместить в группу...", command=move_selected_nodes)
+        menu.add_separator()
+
+        if len(current_selection) == 1:
+            menu.add_command(
+                label="Запустить все базы группы",
+                command=lambda: start_batch_launch(group_bases(item))
+            )
+            menu.add_command(
+                label="Сохранить базы группы как набор...",
+                command=lambda: save_workspace(group_bases(item))
+            )
+            menu.add_command(
+                label="Пакетная операция конфигуратора...",
+                command=lambda: start_designer_jobs(item)
+            )
+            menu.add_separator()
+
+        menu.add_command(label="Найти дубликаты баз...", command=open_duplicates)
+        menu.add_command(label="Запущенные клиенты...", command=open_processes)
         menu.post(event.x_root, event.y_root)
         return
 
     # Контекстное меню базы
     if tree.parent(selected) == "favorites":
         def remove():
-            favorites[:] = [
-                f for f in favorites
-                if not (
-                    f.get("name") == item.get("name")
-                    and f.get("connect") == item.get("connect")
-                )
-            ]
-            starter["favorites"] = favorites
+            catalog.remove_favorite(ensure_id(item))
             save_json(starter)
             populate_tree()
 
@@ -1783,10 +2240,26 @@ def show_context_menu(event):
     else:
         menu.add_command(label="Добавить в избранное", command=add_to_favorites)
 
+    bases = selected_bases()
+
+    if len(bases) > 1:
+        menu.add_separator()
+        menu.add_command(label=f"Запустить выбранные ({len(bases)})", command=lambda: start_batch_launch(bases))
+        menu.add_command(label="Сохранить выбранные как набор...", command=lambda: save_workspace(bases))
+
     menu.add_separator()
     menu.add_command(label="Переместить в группу...", command=move_selected_nodes)
     menu.add_command(label="Свойства", command=lambda: open_properties(selected))
     menu.add_command(label="Удалить из списка", command=delete_selected_base)
+    menu.add_separator()
+
+    running = process_supervisor.running(ensure_id(item))
+
+    menu.add_command(
+        label=f"Запущенные клиенты базы ({len(running)})..." if running else "Запущенные клиенты базы...",
+        command=lambda: open_processes(ensure_id(item))
+    )
+    menu.add_command(label="Найти дубликаты баз...", command=open_duplicates)
     menu.post(event.x_root, event.y_root)
 
 # удалить группу
@@ -1804,7 +2277,7 @@ def delete_selected_group():
         return
 
     name = item.get("name", "")
-    count = count_bases(item.get("children", []))
+    count = catalog.count_bases(ensure_id(item), platform_filter)
 
     if not messagebox.askyesno(
         "Подтверждение",
@@ -1813,49 +2286,37 @@ def delete_selected_group():
         return
 
     group_id = ensure_id(item)
-    removed = remove_node_by_id(starter.get("groups", []), group_id)
+    removed = catalog.remove(group_id)
 
     if not removed:
         messagebox.showerror("Удаление группы", "Не удалось найти группу в starter.json.")
         return
 
-    starter["open_nodes"] = get_open_nodes()
     save_json(starter)
     populate_tree()
 
-def get_installed_1c_versions():
-    versions = []
-
-    base_dirs = [
-        os.path.join(os.environ.get("PROGRAMFILES", "C:\\Program Files"), "1cv8"),
-        os.path.join(os.environ.get("PROGRAMFILES(X86)", "C:\\Program Files (x86)"), "1cv8")
-    ]
-
-    for base_dir in base_dirs:
-        if not os.path.exists(base_dir):
-            continue
-
-        for name in os.listdir(base_dir):
-            bin_dir = os.path.join(base_dir, name, "bin")
-            exe_1cv8 = os.path.join(bin_dir, "1cv8.exe")
-            exe_1cv8c = os.path.join(bin_dir, "1cv8c.exe")
+def collect_bases_from_node(item_id):
+    if item_id == "favorites":
+        return [fav for fav in catalog.favorite_bases() if base_matches_filter(fav)]
 
-            if os.path.exists(exe_1cv8) or os.path.exists(exe_1cv8c):
-                versions.append(name)
+    item = tree_nodes.get(item_id)
+    if not item:
+        return []
 
-    return sorted(set(versions), reverse=True)
+    if item.get("type") == "base":
+        return [item]
 
-def collect_bases_from_node(item_id):
     result = []
 
-    item = tree_nodes.get(item_id)
-    if item and item.get("type") == "base":
-        result.append(item)
-        return result
+    def walk(children):
+        for child in sort_tree_children(children):
+            if child.get("type") == "group":
+                walk(child.get("children", []))
 
-    for child_id in tree.get_children(item_id):
-        result.extend(collect_bases_from_node(child_id))
+            elif child.get("type") == "base" and base_matches_filter(child):
+                result.append(child)
 
+    walk(item.get("children", []))
     return result
 
 def assign_platform_to_selected():
@@ -1896,11 +2357,7 @@ def assign_platform_to_selected():
             return
 
         for base in bases:
-            update_base_everywhere(
-                base.get("name"),
-                base.get("connect"),
-                {"platform": selected_version}
-            )
+            update_base_everywhere(ensure_id(base), {"platform": selected_version})
 
         save_json(starter)
         populate_tree()
@@ -1928,15 +2385,38 @@ toolbar.icons = [
 
    
 # Запуск выбранной информационной базы   
+class LaunchError(Exception):
+    pass
+
 def launch_selected_base(mode="enterprise", extra_params="", run_as_admin=False, forced_version=""):
     print("launch mode:", mode)
+
+    # Несколько выделенных баз запускаются группой
+    bases = selected_bases()
+
+    if len(bases) > 1 and not forced_version:
+        start_batch_launch(bases, mode, extra_params, run_as_admin)
+        return
+
     selected = tree.focus()
     if not selected or selected not in tree_nodes:
         messagebox.showinfo("Выбор", "Выберите базу")
         return
 
-    base = tree_nodes[selected]
-    
+    try:
+        launch_base(tree_nodes[selected], mode, extra_params, run_as_admin, forced_version)
+
+    except LaunchError as e:
+        messagebox.showerror("Ошибка", str(e))
+
+    except Exception as e:
+        messagebox.showerror("Ошибка запуска", str(e))
+
+# Запуск одной базы; ошибки — исключением, без окон с сообщениями,
+# чтобы групповой запуск показывал их в своём списке
+def launch_base(base, mode="enterprise", extra_params="", run_as_admin=False, forced_version=""):
+    started = time.perf_counter()
+
     base_run_as_admin = base.get("run_as_admin", False)
     run_as_admin = run_as_admin or base_run_as_admin
     
@@ -1944,72 +2424,85 @@ def launch_selected_base(mode="enterprise", extra_params="", run_as_admin=False,
     version = forced_version or base.get("platform", "")
 
     if not connect or not version:
-        messagebox.showerror("Ошибка", "Отсутствует строка подключения или версия платформы.")
-        return
+        raise LaunchError("Отсутствует строка подключения или версия платформы.")
 
     exe_path = resolve_1c_path(version, mode)
     if not exe_path:
-        messagebox.showerror("Ошибка", f"Не найдена исполняемая программа для платформы {version}.")
-        return
-
-    connect_lower = connect.lower()
-
-    # WS
-    if "ws=" in connect_lower:
-        ws_url = connect.split("=", 1)[1]
-        ws_url = ws_url.rstrip(";").strip()
-
-        if ws_url.startswith('"') and ws_url.endswith('"'):
-            ws_url = ws_url[1:-1]
-
-        arg = f'/WS"{ws_url}"'
+        raise LaunchError(f"Не найдена исполняемая программа для платформы {version}.")
 
-    # Клиент-сервер
-    elif "srvr=" in connect_lower:
-        server_connect = connect.strip().replace('"', '')
+    # /WS, /S или /F по виду строки подключения
+    connection_args = parse_connection(connect).launch_args()
 
-        server = ""
-        ref = ""
+    if connection_args is None:
+        raise LaunchError(f"Не удалось разобрать строку подключения:\n{connect}")
 
-        for part in server_connect.split(";"):
-            part = part.strip()
+    mode_flag = "ENTERPRISE"
+    if mode == "configurator":
+        mode_flag = "DESIGNER"
 
-            if part.lower().startswith("srvr="):
-                server = part.split("=", 1)[1].strip()
+    # Аргументы передаются списком без cmd.exe: кавычки и спецсимволы
+    # в пароле или пути не ломают командную строку
+    argv = [exe_path, mode_flag, *connection_args, *base_credentials(base)]
 
-            elif part.lower().startswith("ref="):
-                ref = part.split("=", 1)[1].strip()
+    selected_interface = interface.get()
 
-        if not server or not ref:
-            messagebox.showerror(
-                "Ошибка",
-                f"Не удалось разобрать серверную строку:\n{connect}"
-            )
-            return
+    if mode == "enterprise":
+        if selected_interface == "Обычный":
+            argv.append("/RunModeOrdinaryApplication")
 
-        arg = f'/S"{server}\\{ref}"'
+        if selected_interface == "Такси":
+            argv.append("/iTaxi")
 
-    # Файловая
+        if selected_interface == "Версия 8.5":
+            argv.append("/i85")
+    
+    argv += split_args(extra_params)
+    
+    status_cmd_var.set(format_command(argv))
+
+    base_id = ensure_id(base)
+    process = None
+
+    if run_as_admin:
+        # Процесс с повышением прав запускает оболочка Windows,
+        # его завершение отследить нельзя
+        ctypes.windll.shell32.ShellExecuteW(
+            None,
+            "runas",
+            exe_path,
+            format_command(argv[1:]),
+            None,
+            1
+        )
     else:
-        path = connect.strip()
-
-        if path.lower().startswith("file="):
-            path = path[5:]
-
-        path = path.rstrip(";").strip()
-
-        if path.startswith('"') and path.endswith('"'):
-            path = path[1:-1]
+        process = process_supervisor.spawn(argv, key=base_id, name=base.get("name", ""), mode=mode)
 
-        arg = f'/F"{path}"'
-  
+    try:
+        record = launch_history.append({
+            "base_id": base_id,
+            "name": base.get("name", ""),
+            "mode": mode,
+            "platform": version,
+            "interface": selected_interface if mode == "enterprise" else "",
+            "params": extra_params,
+            "admin": run_as_admin,
+            "latency_ms": round((time.perf_counter() - started) * 1000)
+        })
+    except OSError as e:
+        print(f"[!] Не удалось записать историю запусков: {e}")
+    else:
+        if process is not None:
+            process["launch_id"] = record["id"]
 
-    mode_flag = "ENTERPRISE"
-    if mode == "configurator":
-        mode_flag = "DESIGNER"
+    storage.record_launch(base_id, datetime.date.today().isoformat())
 
-    cmd = f'"{exe_path}" {mode_flag} {arg}'
+    # Дата запуска хранится в журнале; starter.json ради неё не переписывается
+    update_base_everywhere(base_id, {"last_run": datetime.date.today().isoformat()})
+    refresh_base_rows(base)
+    refresh_history_if_visible()
 
+# /N и /P базы; пустые значения берутся из авторизации 1С:Предприятия
+def base_credentials(base):
     username = (base.get("username") or "").strip()
     password = (base.get("password") or "").strip()
 
@@ -2021,59 +2514,437 @@ def launch_selected_base(mode="enterprise", extra_params="", run_as_admin=False,
     if not password:
         password = (auth_enterprise.get("password") or "").strip()
 
+    args = []
+
     if username:
-        cmd += f' /N"{username}"'
+        args += ["/N", username]
 
     if password:
-        cmd += f' /P"{password}"'
+        args += ["/P", password]
 
-    selected_interface = interface.get()
+    return args
 
-    if mode == "enterprise":
-        if selected_interface == "Обычный":
-            cmd += " /RunModeOrdinaryApplication"
+# Клиент 1С или команда завершились: длительность сеанса — в журнал запусков
+def on_process_exit(record):
+    if record.get("launch_id"):
+        try:
+            launch_history.finish(record["launch_id"], record["exit_code"], process_supervisor.duration(record))
+        except OSError as e:
+            print(f"[!] Не удалось записать завершение сеанса: {e}")
 
-        if selected_interface == "Такси":
-            cmd += " /iTaxi"
+        storage.record_session(record["key"], process_supervisor.duration(record))
+
+        refresh_history_if_visible()
+
+    focused = tree_nodes.get(tree.focus())
+
+    if focused is not None and focused.get("id") == record["key"]:
+        update_status()
+
+def describe_process(record):
+    return record.get("name", ""), MODE_TITLES.get(record.get("mode"), "Команда")
+
+# key — id базы; None — все запущенные процессы
+def open_processes(key=None):
+    open_processes_dialog(root, process_supervisor, describe_process, key)
+
+# Выделенные в дереве базы без повторов (база и её копия в избранном — одна)
+def selected_bases():
+    bases = {}
+
+    for iid in tree.selection():
+        item = tree_nodes.get(iid)
+
+        if item is not None and item.get("type") == "base":
+            bases.setdefault(ensure_id(item), catalog.get(ensure_id(item)) or item)
+
+    return list(bases.values())
+
+# Все базы группы и её подгрупп с учётом отбора по платформе
+def group_bases(group):
+    bases = []
+    stack = [group]
+
+    while stack:
+        node = stack.pop()
+
+        for child in sort_tree_children(node.get("children", [])):
+            if child.get("type") == "base" and platform_matches(child, platform_filter):
+                bases.append(child)
+
+        stack.extend(
+            child for child in reversed(sort_tree_children(node.get("children", [])))
+            if child.get("type") == "group"
+        )
+
+    return bases
+
+batch_launcher = None
+
+# Групповой запуск: settings.json, batch_concurrency — сколько баз
+# стартует за раз, batch_stagger_seconds — пауза между волнами
+def start_batch_launch(bases, mode="enterprise", extra_params="", run_as_admin=False):
+    global batch_launcher
+
+    if batch_launcher is not None and batch_launcher.running:
+        messagebox.showinfo("Групповой запуск", "Предыдущий групповой запуск ещё не завершён.")
+        return
+
+    if not bases:
+        messagebox.showinfo("Групповой запуск", "Нет баз для запуска.")
+        return
+
+    settings = load_settings()
+    base_ids = [ensure_id(base) for base in bases]
+    names = {ensure_id(base): base.get("name", "") for base in bases}
+
+    def launch(base_id):
+        base = catalog.get(base_id)
+
+        if base is None:
+            raise LaunchError("базы больше нет в списке")
+
+        launch_base(base, mode, extra_params, run_as_admin)
+
+    def on_status(base_id, status, error):
+        set_status(base_id, f"{STATUS_TEXT[status]}: {error}" if error else STATUS_TEXT[status])
+
+    set_status, set_done = open_batch_dialog(
+        root,
+        [(base_id, names[base_id]) for base_id in base_ids],
+        on_cancel=lambda: batch_launcher.cancel()
+    )
+
+    batch_launcher = BatchLauncher(
+        root.after,
+        root.after_cancel,
+        launch,
+        on_status,
+        on_done=set_done,
+        concurrency=settings.get("batch_concurrency", BATCH_CONCURRENCY),
+        stagger_ms=int(settings.get("batch_stagger_seconds", BATCH_STAGGER_SECONDS) * 1000)
+    )
+
+    batch_launcher.start(base_ids)
+
+designer_queue = None
+
+# Пакетная операция конфигуратора над всеми базами группы
+def start_designer_jobs(group):
+    if designer_queue is not None and designer_queue.running:
+        messagebox.showinfo("Пакетная операция", "Предыдущая пакетная операция ещё не завершена.")
+        return
+
+    bases = list({ensure_id(base): base for base in group_bases(group)}.values())
+
+    if not bases:
+        messagebox.showinfo("Пакетная операция", "В группе нет баз.")
+        return
+
+    open_designer_job_dialog(
+        root,
+        group.get("name", ""),
+        len(bases),
+        load_settings().get("designer_concurrency", DESIGNER_CONCURRENCY),
+        lambda operation, files_dir, update_db, concurrency: run_designer_jobs(
+            bases, operation, files_dir, update_db, concurrency
+        )
+    )
+
+# Задание для одной базы; без argv, если базу нельзя запустить
+def designer_job(base, operation, files_dir, update_db, log_dir):
+    base_id = ensure_id(base)
+    file_name = f"{safe_file_name(base.get('name', ''))}_{base_id[:8]}"
+
+    job = {
+        "key": base_id,
+        "name": base.get("name", ""),
+        "argv": None,
+        "out_path": os.path.join(log_dir, file_name + ".log"),
+        "result_path": os.path.join(log_dir, file_name + ".result"),
+        "message": ""
+    }
+
+    version = base.get("platform", "")
+    connection_args = parse_connection(base.get("connect", "")).launch_args()
+    exe_path = resolve_1c_path(version, "configurator") if version else None
+
+    if connection_args is None:
+        job["message"] = "не удалось разобрать строку подключения"
+    elif not exe_path:
+        job["message"] = f"не найдена платформа {version}" if version else "не указана версия платформы"
+    else:
+        target_dir = os.path.join(files_dir, file_name) if files_dir else ""
+
+        if operation == OPERATION_DUMP:
+            os.makedirs(target_dir, exist_ok=True)
+
+        job["argv"] = designer_argv(
+            exe_path,
+            connection_args,
+            base_credentials(base),
+            operation_args(operation, target_dir, update_db),
+            job["out_path"],
+            job["result_path"]
+        )
+
+    return job
+
+def run_designer_jobs(bases, operation, files_dir, update_db, concurrency):
+    global designer_queue
+
+    log_dir = os.path.join(DESIGNER_LOGS_DIR, datetime.datetime.now().strftime("%Y%m%d_%H%M%S"))
 
-        if selected_interface == "Версия 8.5":
-            cmd += " /i85"
-    
-    if extra_params:
-        cmd += f" {extra_params}"
-    
     try:
-        # status_var.set(cmd)
-        status_cmd_var.set(cmd)
-        if run_as_admin:
-            args = cmd.replace(f'"{exe_path}" ', "", 1)
-
-            ctypes.windll.shell32.ShellExecuteW(
-                None,
-                "runas",
-                exe_path,
-                args,
-                None,
-                1
-            )
-        else:
-            subprocess.Popen(cmd, shell=True)
+        os.makedirs(log_dir, exist_ok=True)
+        jobs = [designer_job(base, operation, files_dir, update_db, log_dir) for base in bases]
+    except OSError as e:
+        messagebox.showerror("Пакетная операция", f"Не удалось создать каталог:\n{e}")
+        return
+
+    total = len(jobs)
 
-        today = datetime.date.today().isoformat()
+    def on_update(job):
+        duration = job_duration(job)
 
-        update_base_everywhere(
-            base.get("name"),
-            base.get("connect"),
-            {"last_run": today}
+        set_job(
+            job["key"],
+            JOB_STATUS_TEXT[job["status"]],
+            format_duration(duration) if duration is not None else "",
+            job.get("message", "")
         )
 
+        counts = designer_queue.counts()
+        finished = sum(counts.get(status, 0) for status in (JOB_DONE, JOB_FAILED, JOB_CANCELLED))
+
+        set_progress(
+            finished,
+            total,
+            f"Выполнено {finished} из {total}: успешно {counts.get(JOB_DONE, 0)}, "
+            f"с ошибкой {counts.get(JOB_FAILED, 0)}, выполняется {counts.get(JOB_RUNNING, 0)}"
+        )
+
+    # Длительность выполняющихся заданий обновляется раз в секунду
+    def tick():
+        if not designer_queue.running:
+            return
+
+        for job in designer_queue.jobs.values():
+            if job["status"] == JOB_RUNNING:
+                on_update(job)
+
+        root.after(1000, tick)
+
+    def retry(keys):
+        was_running = designer_queue.running
+        designer_queue.retry(keys)
+
+        if designer_queue.running:
+            set_done(False)
+
+            if not was_running:
+                tick()
+
+    def open_log(key):
+        path = designer_queue.jobs[key]["out_path"]
+
+        if not os.path.exists(path):
+            messagebox.showinfo("Журнал", "Журнал для этой базы ещё не создан.")
+            return
+
+        webbrowser.open(path)
+
+    set_job, set_progress, set_done = open_job_queue_dialog(
+        root,
+        OPERATION_TITLES[operation],
+        [(job["key"], job["name"]) for job in jobs],
+        on_retry=retry,
+        on_cancel=lambda: designer_queue.cancel(),
+        on_open_log=open_log
+    )
+
+    designer_queue = DesignerJobQueue(
+        root.after,
+        on_update,
+        on_done=lambda: set_done(True),
+        concurrency=concurrency
+    )
+
+    designer_queue.start(jobs)
+    tick()
+
+# Наборы хранятся в starter.json: workspaces — [{id, name, mode, base_ids}]
+def save_workspace(bases, mode="enterprise"):
+    if not bases:
+        messagebox.showinfo("Набор", "Выберите базы для набора.")
+        return
+
+    def on_save(name):
+        workspaces = starter.setdefault("workspaces", [])
+        existing = next((ws for ws in workspaces if ws.get("name") == name), None)
+        workspace = existing or {"name": name}
+
+        ensure_id(workspace)
+        workspace["mode"] = mode
+        workspace["base_ids"] = [ensure_id(base) for base in bases]
+
+        if existing is None:
+            workspaces.append(workspace)
+
         save_json(starter)
-#        populate_tree()
 
-    except Exception as e:
-        messagebox.showerror("Ошибка запуска", str(e))
+    open_workspace_name_dialog(root, len(bases), on_save)
+
+def launch_workspace(workspace):
+    bases = [catalog.get(base_id) for base_id in workspace.get("base_ids", [])]
+    start_batch_launch([base for base in bases if base is not None], workspace.get("mode", "enterprise"))
+
+def delete_workspace(workspace):
+    if not messagebox.askyesno("Набор", f"Удалить набор «{workspace.get('name', '')}»?"):
+        return
+
+    starter["workspaces"] = [ws for ws in starter.get("workspaces", []) if ws is not workspace]
+    save_json(starter)
+
+def fill_workspaces_menu():
+    workspaces_menu.delete(0, "end")
+    workspaces = starter.get("workspaces", [])
+
+    for workspace in workspaces:
+        count = sum(1 for base_id in workspace.get("base_ids", []) if catalog.get(base_id) is not None)
+
+        workspaces_menu.add_command(
+            label=f"{workspace.get('name', '')} ({count})",
+            command=lambda ws=workspace: launch_workspace(ws)
+        )
+
+    if workspaces:
+        workspaces_menu.add_separator()
+
+    workspaces_menu.add_command(
+        label="Сохранить выделенные базы как набор...",
+        command=lambda: save_workspace(selected_bases())
+    )
+
+    if workspaces:
+        delete_menu = tk.Menu(workspaces_menu, tearoff=0)
 
-def launch_selected_command():
+        for workspace in workspaces:
+            delete_menu.add_command(
+                label=workspace.get("name", ""),
+                command=lambda ws=workspace: delete_workspace(ws)
+            )
+
+        workspaces_menu.add_cascade(label="Удалить набор", menu=delete_menu)
+
+# Папки, документы и ссылки открываются программой по умолчанию, без вывода
+OPEN_COMMAND_TYPES = ("folder", "document", "url")
+
+# Максимум строк в окне вывода; полный (ограниченный) вывод хранится в запуске
+RUN_OUTPUT_MAX_LINES = 5000
+
+RUN_TICK_MS = 1000
+
+run_tick_after_id = None
+
+def on_run_state(run):
+    duration = run_duration(run)
+
+    values = (
+        RUN_STATUS_TEXT[run["status"]],
+        format_duration(duration) if duration is not None else "",
+        "" if run["exit_code"] is None else run["exit_code"]
+    )
+
+    if runs_tree.exists(run["id"]):
+        runs_tree.item(run["id"], values=values)
+    else:
+        runs_tree.insert("", "end", iid=run["id"], text=run["name"], values=values)
+
+    if run["status"] == RUN_RUNNING:
+        schedule_run_tick()
+
+def on_run_output(run, stream, text):
+    if runs_tree.focus() == run["id"]:
+        append_run_output([(stream, text)])
+
+def append_run_output(chunks):
+    at_end = run_output.yview()[1] >= 1.0
+
+    run_output.configure(state="normal")
+
+    for stream, text in chunks:
+        run_output.insert("end", text, stream)
+
+    lines = int(run_output.index("end-1c").split(".")[0])
+
+    if lines > RUN_OUTPUT_MAX_LINES:
+        run_output.delete("1.0", f"{lines - RUN_OUTPUT_MAX_LINES}.0")
+
+    run_output.configure(state="disabled")
+
+    # Прокрутка за выводом, если пользователь не листает его выше
+    if at_end:
+        run_output.see("end")
+
+def show_selected_run_output(event=None):
+    run = command_runner.runs.get(runs_tree.focus())
+
+    run_output.configure(state="normal")
+    run_output.delete("1.0", "end")
+    run_output.configure(state="disabled")
+
+    if run is not None:
+        append_run_output(run["output"])
+
+# Время выполняющихся запусков обновляется раз в секунду
+def schedule_run_tick():
+    global run_tick_after_id
+
+    if run_tick_after_id is None:
+        run_tick_after_id = root.after(RUN_TICK_MS, on_run_tick)
+
+def on_run_tick():
+    global run_tick_after_id
+
+    run_tick_after_id = None
+
+    running = [run for run in command_runner.runs.values() if run["status"] == RUN_RUNNING]
+
+    for run in running:
+        on_run_state(run)
+
+command_runner = CommandRunner(
+    root.after,
+    on_run_output,
+    on_run_state,
+    encoding=load_settings().get("commands_encoding", OUTPUT_ENCODING)
+)
+
+# (наименование, argv, рабочий каталог) команды или None, если запускать нечего.
+# Без cmd.exe: встроенные команды оболочки (dir, echo) задаются
+# командой «cmd» с параметрами «/c ...»
+def command_job(item):
+    command = item.get("command", "").strip()
+
+    if not command:
+        return None
+
+    return (
+        item.get("name", "") or command,
+        [command, *split_args(item.get("parameters", "").strip())],
+        item.get("workdir", "").strip()
+    )
+
+def open_command_target(item):
+    target = item.get("command", "").strip()
+
+    if hasattr(os, "startfile") and item.get("command_type") != "url":
+        os.startfile(target)
+    else:
+        webbrowser.open(target)
+
+def launch_selected_command(run_groups=True):
     selected = commands_tree.focus()
 
     if not selected or selected not in commands_nodes:
@@ -2081,52 +2952,119 @@ def launch_selected_command():
 
     item = commands_nodes[selected]
 
+    if item.get("type") == "group":
+        if run_groups:
+            run_command_group(item)
+        return
+
     if item.get("type") != "command":
         return
 
-    command = item.get("command", "").strip()
-    parameters = item.get("parameters", "").strip()
-    workdir = item.get("workdir", "").strip()
+    job = command_job(item)
 
-    if not command:
+    if job is None:
         messagebox.showerror(
             "Команда",
             "Не указана команда для запуска."
         )
         return
 
-    cmd = f'"{command}"'
+    if item.get("command_type") in OPEN_COMMAND_TYPES:
+        try:
+            open_command_target(item)
+        except Exception as e:
+            messagebox.showerror("Ошибка запуска", str(e))
+        return
+
+    select_run(command_runner.start([job])[0])
+
+# Команды группы по очереди или с ограничением одновременных запусков
+def run_command_group(group):
+    jobs = [
+        command_job(child) for child in group.get("children", [])
+        if child.get("type") == "command" and child.get("command_type") not in OPEN_COMMAND_TYPES
+    ]
+    jobs = [job for job in jobs if job is not None]
 
-    if parameters:
-        cmd += f" {parameters}"
+    if not jobs:
+        messagebox.showinfo("Команды", "В группе нет команд для выполнения.")
+        return
 
     try:
-        subprocess.Popen(
-            cmd,
-            cwd=workdir if workdir else None,
-            shell=True
-        )
+        concurrency = max(1, int(commands_concurrency_var.get()))
+    except (tk.TclError, ValueError):
+        concurrency = 1
 
-    except Exception as e:
-        messagebox.showerror(
-            "Ошибка запуска",
-            str(e)
-        )
+    select_run(command_runner.start(jobs, concurrency)[0])
+
+def select_run(run):
+    if runs_tree.exists(run["id"]):
+        runs_tree.selection_set(run["id"])
+        runs_tree.focus(run["id"])
+        runs_tree.see(run["id"])
+        show_selected_run_output()
+
+def cancel_selected_run():
+    run_id = runs_tree.focus()
+
+    if run_id:
+        command_runner.cancel(run_id)
+
+def clear_finished_runs():
+    command_runner.clear_finished()
+
+    for run_id in runs_tree.get_children():
+        if run_id not in command_runner.runs:
+            runs_tree.delete(run_id)
+
+    show_selected_run_output()
+
+# Ctrl+P → палитра быстрого запуска
+def describe_base(base_id):
+    base = catalog.get(base_id) or {}
+    parent = catalog.parent_of(base_id)
+    group_path = catalog.group_path(ensure_id(parent)) if parent else ""
+    return base.get("name", ""), group_path
+
+
+def launch_base_by_id(base_id, mode):
+    if not reveal_node(base_id):
+        messagebox.showinfo("Быстрый запуск", "База не найдена в дереве.")
+        return
+
+    tree.selection_set(base_id)
+    tree.focus(base_id)
+    launch_selected_base(mode)
+
+
+def open_quick_launch(event=None):
+    open_quick_launch_dialog(
+        root,
+        lambda query: bases_index.fuzzy_search(query, QUICK_LAUNCH_LIMIT, platform_filter),
+        describe_base,
+        launch_base_by_id
+    )
+    return "break"
+
+
+root.bind("<Control-p>", open_quick_launch)
+root.bind("<Control-P>", open_quick_launch)
 
 tree.bind("<<TreeviewSelect>>", lambda e: update_status())
+tree.bind("<<TreeviewOpen>>", on_tree_open)
+tree.bind("<<TreeviewClose>>", on_tree_close)
 tree.bind("<Button-3>", show_context_menu)
 tree.bind("<Double-1>", lambda e: launch_selected_base())
 commands_tree.bind(
     "<Double-1>",
-    lambda e: launch_selected_command()
+    lambda e: launch_selected_command(run_groups=False)
 )
+runs_tree.bind("<<TreeviewSelect>>", show_selected_run_output)
 
 
 
 try:
-    img = Image.open(os.path.join(RESOURCE_DIR, "assets", "sin_code.png"))
-    img = img.resize((180, 180), Image.Resampling.LANCZOS)
-    sin_photo = ImageTk.PhotoImage(img)
+    sin_photo = image_cache.load(os.path.join(RESOURCE_DIR, "assets", "sin_code.png"), (180, 180))
     label_sin = ttk.Label(frame_right, image=sin_photo, cursor="hand2")
     label_sin.image = sin_photo
     label_sin.pack(pady=10, anchor="se")
@@ -2136,12 +3074,33 @@ except Exception as e:
 
 
 
-starter = load_json()
+catalog = Catalog(load_json())
+storage.attach(catalog)
+bases_index = SearchIndex(catalog)
+connections_index = ConnectionIndex(catalog)
+launch_history.apply_last_runs(catalog)
+starter = catalog.data
 commands_data = load_commands()
 root.geometry(load_window_geometry())
-favorites = starter.get("favorites", [])
+loaded_groups.update(starter.get("open_nodes", []))
+
+# Избранное из копий баз переведено в список id — сохраняем новый формат
+if catalog.favorites_migrated:
+    save_json(starter)
 populate_tree()
 populate_commands_tree()
 load_column_widths()
+
+startup_settings = load_settings()
+
+if startup_settings.get("v8i_sync_on_startup", False):
+    root.after(500, start_v8i_sync)
+
+schedule_v8i_sync(startup_settings)
+
+if starter_sync is not None and starter_sync.interval > 0:
+    starter_sync.start()
+    root.after(STARTER_POLL_MS, poll_starter_changes)
+
 root.protocol("WM_DELETE_WINDOW", on_close)
 root.mainloop()
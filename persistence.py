@@ -0,0 +1,242 @@
+import json
+import os
+import queue
+import stat
+import tempfile
+import threading
+
+# Сохранение JSON-файлов без потери данных при сбое.
+#
+# Файл пишется во временный рядом с исходным, сбрасывается на диск
+# (fsync) и только потом переименовывается поверх оригинала, поэтому
+# на диске всегда лежит либо старая, либо новая версия целиком.
+
+
+# umask читается один раз: os.umask меняет его для всего процесса
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+NEW_FILE_MODE = 0o666 & ~_UMASK
+
+
+def default_starter():
+    return {
+        "favorites": [],
+        "groups": [],
+        "window_geometry": "900x600"
+    }
+
+
+def load_starter(path):
+    if not os.path.exists(path):
+        return default_starter()
+
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def format_json(data, compact=False):
+    if compact:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+    return json.dumps(data, ensure_ascii=False, indent=4)
+
+
+def atomic_write_text(path, text):
+    directory = os.path.dirname(os.path.abspath(path))
+    name = os.path.basename(path)
+
+    # mkstemp создаёт файл с правами 0600 — права прежнего файла переносятся,
+    # иначе после первой записи общий starter.json станет доступен одному
+    # владельцу; новый файл получает обычные права, как у open()
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        mode = NEW_FILE_MODE
+
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".tmp", dir=directory)
+
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.chmod(tmp_path, mode)
+
+        os.replace(tmp_path, path)
+
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(path, data, compact=False):
+    atomic_write_text(path, format_json(data, compact))
+
+
+ERROR_POLL_MS = 200
+
+
+# Отложенная запись: серия изменений подряд превращается в одну запись
+# после паузы. В потоке Tk снимается только компактный снимок данных
+# (json.dumps без отступов работает на C-ускорителе), а форматирование
+# с отступами, fsync и переименование выполняются в рабочем потоке.
+#   after / after_cancel — root.after и root.after_cancel
+#   sync — StarterSync: проверка версии файла и слияние перед записью
+#   on_error(исключение) — ошибка фоновой записи, вызывается в потоке Tk
+class DebouncedJsonWriter:
+    def __init__(self, path, after, after_cancel, delay_ms=1000, compact=False, sync=None, on_error=None):
+        self.path = path
+        self.after = after
+        self.after_cancel = after_cancel
+        self.delay_ms = delay_ms
+        self.compact = compact
+        self.sync = sync
+        self.on_error = on_error
+
+        self._data = None
+        self._timer = None
+        self._errors = queue.Queue()
+        self._error_timer = None
+        self._pending = None
+        self._busy = False
+        self._closed = False
+        self._condition = threading.Condition()
+
+        self._thread = threading.Thread(target=self._run, name="json-writer", daemon=True)
+        self._thread.start()
+
+    def request(self, data):
+        self._data = data
+
+        if self._timer is not None:
+            self.after_cancel(self._timer)
+
+        self._timer = self.after(self.delay_ms, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+        data, self._data = self._data, None
+
+        if data is None:
+            return
+
+        token = self.sync.stamp_data(data) if self.sync else None
+        snapshot = format_json(data, compact=True)
+
+        with self._condition:
+            self._pending = (snapshot, self.compact, token)
+            self._condition.notify_all()
+
+        if self._error_timer is None:
+            self._error_timer = self.after(ERROR_POLL_MS, self._check_errors)
+
+    # Ошибки рабочего потока передаются в поток Tk через очередь;
+    # опрос идёт, пока у рабочего потока есть запись
+    def _check_errors(self):
+        self._error_timer = None
+
+        # Состояние читается до очереди: рабочий поток кладёт ошибку раньше,
+        # чем снимает _busy, поэтому ошибка последней записи не пропадёт
+        with self._condition:
+            writing = self._pending is not None or self._busy
+
+        error = None
+
+        while True:
+            try:
+                error = self._errors.get_nowait()
+            except queue.Empty:
+                break
+
+        if error is not None:
+            if self.on_error:
+                self.on_error(error)
+            else:
+                print(f"[!] Ошибка сохранения {self.path}: {error}")
+
+        if writing:
+            self._error_timer = self.after(ERROR_POLL_MS, self._check_errors)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._closed:
+                    self._condition.wait()
+
+                if self._pending is None:
+                    return
+
+                job = self._pending
+                self._pending = None
+                self._busy = True
+
+            try:
+                self._write(*job)
+            except Exception as e:
+                self._errors.put(e)
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _write(self, snapshot, compact, token=None):
+        def commit(text):
+            atomic_write_text(self.path, text if compact else format_json(json.loads(text)))
+
+        if self.sync is None:
+            commit(snapshot)
+        else:
+            self.sync.write(snapshot, token, commit)
+
+    # Отказ от ещё не снятых изменений — данные заменены целиком
+    def discard(self):
+        if self._timer is not None:
+            self.after_cancel(self._timer)
+            self._timer = None
+
+        self._data = None
+
+    # Синхронная запись: дожидается рабочего потока и пишет последние данные
+    def flush(self, data=None):
+        if self._timer is not None:
+            self.after_cancel(self._timer)
+            self._timer = None
+
+        if data is None:
+            data = self._data
+
+        self._data = None
+
+        with self._condition:
+            job = self._pending
+            self._pending = None
+
+            while self._busy:
+                self._condition.wait()
+
+        if data is not None and self.sync is not None:
+            token = self.sync.stamp_data(data)
+            self._write(format_json(data, compact=True), self.compact, token)
+        elif data is not None:
+            atomic_write_json(self.path, data, self.compact)
+        elif job is not None:
+            self._write(*job)
+
+    def close(self, data=None):
+        if self._error_timer is not None:
+            self.after_cancel(self._error_timer)
+            self._error_timer = None
+
+        try:
+            self.flush(data)
+        finally:
+            with self._condition:
+                self._closed = True
+                self._condition.notify_all()
+
+            self._thread.join(timeout=5)
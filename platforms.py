@@ -0,0 +1,274 @@
+import glob
+import json
+import os
+import re
+import sys
+import threading
+
+from persistence import atomic_write_json
+
+# Реестр установленных платформ 1С.
+#
+# Каталоги установки сканируются один раз в фоне при старте. Результат
+# сохраняется в кэш вместе с временем изменения корневых каталогов 1cv8:
+# установка или удаление версии меняет mtime корня, и только тогда
+# каталоги версий перечитываются заново.
+#
+# Корни установки:
+#   Windows — %PROGRAMFILES%\1cv8, %PROGRAMFILES(X86)%\1cv8,
+#             %LOCALAPPDATA%\Programs\1cv8*; исполняемые файлы в <версия>\bin
+#   Linux   — /opt/1cv8/<arch>; исполняемые файлы прямо в <версия>
+
+PLATFORM_EXECUTABLES = ("1cv8", "1cv8c")
+
+# Какие исполняемые файлы подходят для режима запуска, в порядке предпочтения.
+# Толстый клиент 1cv8 умеет и обычное приложение, поэтому для режима
+# предприятия он первый; тонкий 1cv8c — если толстого в установке нет.
+MODE_EXECUTABLES = {
+    "enterprise": ("1cv8", "1cv8c"),
+    "configurator": ("1cv8",)
+}
+
+
+def version_key(version):
+    numbers = tuple(int(part) for part in re.findall(r"\d+", version))
+    return numbers, version
+
+
+# "8.3.24.*", "8.3." → "8.3.24", "8.3"
+def version_mask(version):
+    return (version or "").strip().rstrip("*").rstrip(".")
+
+
+# Префиксы версии по границам частей: 8.3.24.1342 → 8, 8.3, 8.3.24, 8.3.24.1342
+def version_prefixes(version):
+    parts = version.split(".")
+    return [".".join(parts[:count]) for count in range(1, len(parts) + 1)]
+
+
+# Индекс (маска версии, архитектура, режим) → исполняемый файл. Для каждой
+# маски остаётся самая новая подходящая установка, так что разрешение
+# версии при запуске — один поиск в словаре.
+def build_executable_index(installs):
+    index = {}
+
+    for install in sorted(installs, key=lambda item: version_key(item["version"])):
+        executables = install["executables"]
+
+        for mode, candidates in MODE_EXECUTABLES.items():
+            exe = next((executables[name] for name in candidates if name in executables), None)
+            if exe is None:
+                continue
+
+            for prefix in version_prefixes(install["version"]):
+                index[(prefix, install["arch"], mode)] = exe
+
+    return index
+
+
+def arch_from_name(name):
+    lower = name.lower()
+
+    if "x86_64" in lower or "x64" in lower or "amd64" in lower:
+        return "x64"
+
+    if "x86" in lower or "i386" in lower or "i686" in lower:
+        return "x86"
+
+    return ""
+
+
+def host_arch():
+    return "x64" if sys.maxsize > 2 ** 32 else "x86"
+
+
+# [(каталог, архитектура)] — существующие и нет, в порядке приоритета
+def platform_roots():
+    if os.name != "nt":
+        return [(path, arch_from_name(os.path.basename(path)) or host_arch()) for path in sorted(glob.glob("/opt/1cv8/*"))]
+
+    roots = []
+    program_files = os.environ.get("PROGRAMFILES", "C:\\Program Files")
+    program_files_x86 = os.environ.get("PROGRAMFILES(X86)", "C:\\Program Files (x86)")
+
+    roots.append((os.path.join(program_files, "1cv8"), arch_from_name(program_files) or host_arch()))
+
+    if os.path.normcase(program_files_x86) != os.path.normcase(program_files):
+        roots.append((os.path.join(program_files_x86, "1cv8"), "x86"))
+
+    local_programs = os.path.join(os.environ.get("LOCALAPPDATA", ""), "Programs")
+
+    for path in sorted(glob.glob(os.path.join(local_programs, "1cv8*"))):
+        roots.append((path, arch_from_name(os.path.basename(path)) or host_arch()))
+
+    return roots
+
+
+def root_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def scan_root(path, arch):
+    installs = []
+    exe_suffix = ".exe" if os.name == "nt" else ""
+
+    try:
+        names = os.listdir(path)
+    except OSError:
+        return installs
+
+    for name in names:
+        if not re.match(r"\d+\.\d+", name):
+            continue
+
+        version_dir = os.path.join(path, name)
+        bin_dir = os.path.join(version_dir, "bin") if os.name == "nt" else version_dir
+
+        try:
+            files = set(os.listdir(bin_dir))
+        except OSError:
+            continue
+
+        executables = {}
+
+        for exe in PLATFORM_EXECUTABLES:
+            if exe + exe_suffix in files:
+                executables[exe] = os.path.join(bin_dir, exe + exe_suffix)
+
+        if executables:
+            installs.append({
+                "version": name,
+                "arch": arch,
+                "executables": executables
+            })
+
+    return installs
+
+
+class PlatformRegistry:
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path
+        self.roots = {}
+        self.installs = []
+        self.preferred_arch = ""
+        self._index = None
+        self._scanned = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self.refresh, name="platforms", daemon=True).start()
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}, []
+
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+
+            return data.get("roots", {}), data.get("installs", [])
+
+        except (OSError, ValueError, AttributeError):
+            return {}, []
+
+    # Перечитывает каталоги версий, только если изменился какой-нибудь корень.
+    # Возвращает True, если набор установок поменялся. Пока идёт фоновое
+    # сканирование, вызов из потока Tk просто дожидается его результата.
+    def refresh(self):
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self):
+        roots = platform_roots()
+        mtimes = {path: root_mtime(path) for path, _ in roots}
+
+        if not self._scanned:
+            self._scanned = True
+            self.roots, self.installs = self._load_cache()
+            self._index = None
+
+        if mtimes == self.roots:
+            return False
+
+        installs = []
+
+        for path, arch in roots:
+            if mtimes[path] is not None:
+                installs.extend(scan_root(path, arch))
+
+        changed = installs != self.installs
+        self.roots = mtimes
+        self.installs = installs
+
+        if changed:
+            self._index = None
+
+        if self.cache_path:
+            try:
+                atomic_write_json(self.cache_path, {"roots": mtimes, "installs": installs})
+            except OSError as e:
+                print(f"[!] Ошибка сохранения кэша платформ: {e}")
+
+        return changed
+
+    # Версии платформы, от новой к старой
+    def versions(self):
+        self.refresh()
+
+        return sorted({install["version"] for install in self.installs}, key=version_key, reverse=True)
+
+    def _lookup(self, mask, mode, arch):
+        index = self._index
+
+        if index is None:
+            with self._lock:
+                if not self._scanned:
+                    self._refresh()
+
+                if self._index is None:
+                    self._index = build_executable_index(self.installs)
+
+                index = self._index
+
+        preferred = arch or self.preferred_arch or host_arch()
+        other = "x86" if preferred == "x64" else "x64"
+
+        return index.get((mask, preferred, mode)) or index.get((mask, other, mode))
+
+    # Исполняемый файл платформы для версии или маски версии ("8.3", "8.3.24").
+    # Файловую систему трогает, только если версии нет в индексе: тогда
+    # проверяются корни установки — вдруг платформу только что поставили.
+    def resolve(self, version, mode="enterprise", arch=""):
+        mask = version_mask(version)
+        if not mask:
+            return None
+
+        exe = self._lookup(mask, mode, arch)
+
+        if exe is None and self.refresh():
+            exe = self._lookup(mask, mode, arch)
+
+        return exe
+
+
+platform_registry = PlatformRegistry()
+
+
+def start_platform_scan(cache_path):
+    platform_registry.cache_path = cache_path
+    platform_registry.start()
+
+
+def set_preferred_arch(arch):
+    platform_registry.preferred_arch = arch or ""
+
+
+def get_installed_1c_versions():
+    return platform_registry.versions()
+
+
+def resolve_1c_path(version, mode="enterprise"):
+    return platform_registry.resolve(version, mode)
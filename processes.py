@@ -0,0 +1,131 @@
+import subprocess
+import time
+
+# Запуск внешних программ без промежуточной оболочки.
+#
+# Команда передаётся списком аргументов (argv), поэтому кавычки и пробелы
+# в путях и паролях не ломают разбор, а лишний cmd.exe не запускается.
+# ProcessSupervisor хранит Popen запущенных процессов и раз в poll_ms
+# проверяет их через after: завершившиеся получают код выхода и время
+# окончания, после чего вызывается on_exit(запись).
+#
+# Запись процесса: key, pid, argv, started, ended, exit_code и
+# дополнительные поля, переданные в spawn (например, mode и name).
+
+POLL_MS = 1000
+
+# Сколько завершившихся процессов помнить для списка
+FINISHED_LIMIT = 50
+
+
+# Разбивка строки параметров на аргументы: по пробелам вне двойных кавычек,
+# сами кавычки убираются ("D:\My dir" → D:\My dir)
+def split_args(text):
+    args = []
+    current = []
+    quoted = False
+    has_token = False
+
+    for char in text or "":
+        if char == '"':
+            quoted = not quoted
+            has_token = True
+            continue
+
+        if char.isspace() and not quoted:
+            if has_token:
+                args.append("".join(current))
+                current = []
+                has_token = False
+            continue
+
+        current.append(char)
+        has_token = True
+
+    if has_token:
+        args.append("".join(current))
+
+    return args
+
+
+def format_command(argv):
+    return subprocess.list2cmdline(argv)
+
+
+def format_duration(seconds):
+    seconds = int(seconds or 0)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+class ProcessSupervisor:
+    def __init__(self, after, on_exit=None, poll_ms=POLL_MS):
+        self.after = after
+        self.on_exit = on_exit
+        self.poll_ms = poll_ms
+
+        self.processes = []
+        self._timer = None
+
+    def spawn(self, argv, key=None, cwd=None, **info):
+        popen = subprocess.Popen(argv, cwd=cwd or None, close_fds=True)
+
+        record = {
+            "key": key,
+            "pid": popen.pid,
+            "argv": list(argv),
+            "started": time.time(),
+            "ended": None,
+            "exit_code": None,
+            "popen": popen
+        }
+        record.update(info)
+
+        self.processes.append(record)
+        self._schedule()
+        return record
+
+    def _schedule(self):
+        if self._timer is None:
+            self._timer = self.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self._timer = None
+
+        for record in self.running():
+            exit_code = record["popen"].poll()
+
+            if exit_code is None:
+                continue
+
+            record["exit_code"] = exit_code
+            record["ended"] = time.time()
+            record["popen"] = None
+
+            if self.on_exit:
+                try:
+                    self.on_exit(record)
+                except Exception as e:
+                    print(f"[!] Ошибка обработки завершения процесса {record['pid']}: {e}")
+
+        finished = [record for record in self.processes if record["popen"] is None]
+
+        if len(finished) > FINISHED_LIMIT:
+            stale = {id(record) for record in finished[:-FINISHED_LIMIT]}
+            self.processes = [record for record in self.processes if id(record) not in stale]
+
+        if self.running():
+            self._schedule()
+
+    def running(self, key=None):
+        return [
+            record for record in self.processes
+            if record["popen"] is not None and (key is None or record["key"] == key)
+        ]
+
+    # Все известные процессы, новые сверху
+    def records(self):
+        return list(reversed(self.processes))
+
+    @staticmethod
+    def duration(record):
+        return (record["ended"] or time.time()) - record["started"]
@@ -0,0 +1,69 @@
+import datetime
+import tkinter as tk
+from tkinter import ttk
+from edit_dialog import center_window
+from processes import format_duration
+
+REFRESH_MS = 1000
+
+
+# Список запущенных из CatStarter клиентов 1С и их состояние.
+#   supervisor  — ProcessSupervisor
+#   describe(запись) -> (база, режим)
+#   key — показывать только процессы одной базы (None — все)
+def open_processes_dialog(master, supervisor, describe, key=None):
+    dialog = tk.Toplevel(master)
+    dialog.title("Запущенные клиенты")
+    dialog.transient(master)
+
+    center_window(master, dialog, 640, 320)
+
+    columns = ("mode", "pid", "started", "state", "duration")
+
+    tree = ttk.Treeview(dialog, columns=columns, show="tree headings", selectmode="browse")
+    tree.heading("#0", text="База")
+    tree.heading("mode", text="Режим")
+    tree.heading("pid", text="PID")
+    tree.heading("started", text="Запуск")
+    tree.heading("state", text="Состояние")
+    tree.heading("duration", text="Длительность")
+
+    tree.column("#0", width=200)
+    tree.column("mode", width=110, stretch=False)
+    tree.column("pid", width=60, anchor="e", stretch=False)
+    tree.column("started", width=70, stretch=False)
+    tree.column("state", width=110, stretch=False)
+    tree.column("duration", width=80, anchor="e", stretch=False)
+
+    tree.pack(fill="both", expand=True, padx=10, pady=(10, 4))
+
+    ttk.Button(dialog, text="Закрыть", command=dialog.destroy).pack(anchor="e", padx=10, pady=(4, 10))
+
+    def refresh():
+        if not dialog.winfo_exists():
+            return
+
+        tree.delete(*tree.get_children())
+
+        for record in supervisor.records():
+            if key is not None and record["key"] != key:
+                continue
+
+            name, mode = describe(record)
+
+            if record["popen"] is not None:
+                state = "работает"
+            else:
+                state = f"завершён, код {record['exit_code']}"
+
+            tree.insert("", "end", text=name, values=(
+                mode,
+                record["pid"],
+                datetime.datetime.fromtimestamp(record["started"]).strftime("%H:%M:%S"),
+                state,
+                format_duration(supervisor.duration(record))
+            ))
+
+        dialog.after(REFRESH_MS, refresh)
+
+    refresh()
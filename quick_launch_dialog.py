@@ -0,0 +1,97 @@
+import tkinter as tk
+from tkinter import ttk
+from edit_dialog import center_window
+
+QUICK_LAUNCH_LIMIT = 30
+
+
+# Палитра быстрого запуска (Ctrl+P): нечёткий поиск по наименованию
+# и пути группы, результаты пересчитываются на каждое нажатие клавиши.
+#   search(query) -> [id базы, ...] в порядке убывания качества совпадения
+#   describe(id)  -> (наименование, путь группы)
+#   on_launch(id, mode)
+def open_quick_launch_dialog(master, search, describe, on_launch):
+    dialog = tk.Toplevel(master)
+    dialog.title("Быстрый запуск")
+    dialog.transient(master)
+    dialog.grab_set()
+
+    center_window(master, dialog, 560, 380)
+
+    query_var = tk.StringVar()
+    mode_var = tk.StringVar(value="enterprise")
+    found_ids = []
+
+    entry = ttk.Entry(dialog, textvariable=query_var)
+    entry.pack(fill="x", padx=10, pady=(10, 6))
+    entry.focus_set()
+
+    list_frame = ttk.Frame(dialog)
+    list_frame.pack(fill="both", expand=True, padx=10)
+
+    listbox = tk.Listbox(list_frame, activestyle="none", exportselection=False)
+    listbox.pack(side="left", fill="both", expand=True)
+
+    scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=listbox.yview)
+    listbox.configure(yscrollcommand=scrollbar.set)
+    scrollbar.pack(side="right", fill="y")
+
+    bottom = ttk.Frame(dialog)
+    bottom.pack(fill="x", padx=10, pady=(6, 10))
+
+    ttk.Radiobutton(bottom, text="1С:Предприятие", variable=mode_var, value="enterprise").pack(side="left")
+    ttk.Radiobutton(bottom, text="Конфигуратор", variable=mode_var, value="configurator").pack(side="left", padx=(8, 0))
+
+    ttk.Label(
+        bottom,
+        text="Enter — запуск, Shift+Enter — конфигуратор",
+        foreground="#888888"
+    ).pack(side="right")
+
+    def refresh(*args):
+        found_ids[:] = search(query_var.get())
+        listbox.delete(0, tk.END)
+
+        for base_id in found_ids:
+            name, group_path = describe(base_id)
+            listbox.insert(tk.END, f"{name}    ({group_path})" if group_path else name)
+
+        if found_ids:
+            listbox.selection_set(0)
+            listbox.see(0)
+
+    def move_selection(step):
+        if not found_ids:
+            return "break"
+
+        selection = listbox.curselection()
+        index = selection[0] if selection else -1
+        index = max(0, min(len(found_ids) - 1, index + step))
+
+        listbox.selection_clear(0, tk.END)
+        listbox.selection_set(index)
+        listbox.see(index)
+        return "break"
+
+    def launch(mode=None):
+        selection = listbox.curselection()
+        if not selection:
+            return "break"
+
+        base_id = found_ids[selection[0]]
+        dialog.destroy()
+        on_launch(base_id, mode or mode_var.get())
+        return "break"
+
+    query_var.trace_add("write", refresh)
+
+    entry.bind("<Down>", lambda e: move_selection(1))
+    entry.bind("<Up>", lambda e: move_selection(-1))
+    entry.bind("<Next>", lambda e: move_selection(10))
+    entry.bind("<Prior>", lambda e: move_selection(-10))
+    entry.bind("<Return>", lambda e: launch())
+    entry.bind("<Shift-Return>", lambda e: launch("configurator"))
+    listbox.bind("<Double-1>", lambda e: launch())
+    dialog.bind("<Escape>", lambda e: dialog.destroy())
+
+    refresh()
@@ -0,0 +1,497 @@
+import heapq
+import re
+from bisect import bisect_left, bisect_right, insort
+
+from catalog import display_sort_key, platform_matches
+from connection import normalize_infobase_path
+
+# Поисковый индекс по модели каталога.
+#
+# Для каждого узла хранится одна строка-ключ, сложенная из наименования,
+# строки подключения, пути к базе, версии платформы и пути группы,
+# приведённая к нижнему регистру и с заменой "ё" на "е". Индекс
+# подписан на изменения каталога и пересчитывает только затронутые узлы.
+#
+# Для поиска ключи баз каждой группы склеиваются в одну строку в порядке
+# отображения: str.find по ней идёт в C и не тратит время на узлы без
+# совпадений. Порядок детей группы хранится отсортированным и правится
+# вставкой по событиям каталога, а строка группы пересобирается только
+# после изменения её баз — правка одной базы не трогает остальной каталог.
+#
+# Поиск возвращает не больше limit совпадений в порядке дерева; truncated
+# после вызова показывает, что совпадений было больше.
+
+KEY_SEPARATOR = "\x00"
+
+SEARCH_LIMIT = 1000
+
+
+def fold_text(text):
+    return (text or "").casefold().replace("ё", "е")
+
+
+WORD_SEPARATORS = " _-.,\\/()[]"
+
+
+# Регулярное выражение "символы запроса по порядку в одной строке".
+# Первый символ — литерал, его re ищет быстро; дальше класс без
+# искомого символа, поэтому жадному квантификатору некуда возвращаться.
+def subsequence_pattern(query):
+    parts = [re.escape(query[0])]
+
+    for char in query[1:]:
+        escaped = re.escape(char)
+        parts.append(f"[^\n{escaped}]*{escaped}")
+
+    return re.compile("".join(parts))
+
+
+# Оценка нечёткого совпадения: символы запроса должны идти в тексте
+# по порядку. Бонусы за подряд идущие символы, начала слов и совпадение
+# подстрокой, штрафы за разрывы и длину текста. None — совпадения нет.
+def fuzzy_score(query, text):
+    if not query:
+        return 0
+
+    score = 0
+    position = 0
+    previous = -2
+
+    for char in query:
+        found = text.find(char, position)
+        if found == -1:
+            return None
+
+        if found == previous + 1:
+            score += 8
+        else:
+            score -= min(found - position, 10)
+
+        if found == 0 or text[found - 1] in WORD_SEPARATORS:
+            score += 6
+
+        previous = found
+        position = found + 1
+
+    substring = text.find(query)
+    if substring == 0:
+        score += 40
+    elif substring > 0:
+        score += 20
+
+    return score - len(text) // 8
+
+
+class SearchIndex:
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self.keys = {}
+        self.truncated = False
+        self._entries = {}
+        self._segments = {}
+        self._sequence = 0
+        self._last_query = None
+        self._last_filter = None
+        self._last_hits = None
+        self._last_truncated = False
+        self._quick_table = None
+
+        self._index_all()
+        catalog.subscribe(self.on_catalog_change)
+
+    def _index_all(self):
+        self.keys = {}
+        self._entries = {}
+        self._segments = {None: _Segment()}
+
+        for node in self.catalog.groups:
+            self._index_subtree(node)
+
+        self._invalidate(structure=True)
+
+    def _node_key(self, node, group_path):
+        name = node.get("name", "")
+
+        if node.get("type") == "group":
+            return fold_text(f"{name}\n{group_path}")
+
+        connect = fold_text(node.get("connect", ""))
+        path = fold_text(normalize_infobase_path(connect))
+
+        # Путь к файловой базе почти всегда уже содержится в строке подключения
+        if path in connect:
+            path = ""
+
+        return "\n".join((
+            fold_text(name),
+            connect,
+            path,
+            fold_text(node.get("platform", "")),
+            fold_text(group_path)
+        ))
+
+    # Ключи поддерева и места его узлов в порядке отображения. Порядковый
+    # номер повторяет порядок в children: у одинаковых имён порядок тот же,
+    # что у устойчивой сортировки дерева, а добавленный узел идёт последним.
+    def _index_subtree(self, node):
+        parent = self.catalog.parent_of(node.get("id"))
+        parent_id = parent.get("id") if parent else None
+        parent_path = self.catalog.group_path(parent_id) if parent else ""
+        stack = [(node, parent_id, parent_path)]
+
+        while stack:
+            current, current_parent, group_path = stack.pop()
+            node_id = current.get("id")
+            self.keys[node_id] = self._node_key(current, group_path)
+            self._place(current, current_parent)
+
+            if current.get("type") == "group":
+                self._segments[node_id] = _Segment()
+                name = current.get("name", "")
+                path = f"{group_path}\\{name}" if group_path else name
+
+                for child in reversed(current.get("children", [])):
+                    stack.append((child, node_id, path))
+
+    # Ключи поддерева без изменения мест — после переименования группы
+    # меняется путь группы у всех вложенных узлов
+    def _rekey_subtree(self, node):
+        parent = self.catalog.parent_of(node.get("id"))
+        parent_path = self.catalog.group_path(parent.get("id")) if parent else ""
+        stack = [(node, parent_path)]
+
+        while stack:
+            current, group_path = stack.pop()
+            node_id = current.get("id")
+            self.keys[node_id] = self._node_key(current, group_path)
+
+            if current.get("type") == "group":
+                self._segments[node_id].text = None
+                name = current.get("name", "")
+                path = f"{group_path}\\{name}" if group_path else name
+
+                for child in current.get("children", []):
+                    stack.append((child, path))
+
+    def _drop_subtree(self, node):
+        stack = [node]
+
+        while stack:
+            current = stack.pop()
+            node_id = current.get("id")
+            self.keys.pop(node_id, None)
+            self._unplace(node_id)
+
+            if current.get("type") == "group":
+                self._segments.pop(node_id, None)
+                stack.extend(current.get("children", []))
+
+    # Вставка узла в отсортированный список детей группы
+    def _place(self, node, parent_id):
+        node_id = node.get("id")
+        self._sequence += 1
+        entry = (display_sort_key(node), self._sequence, node_id)
+        segment = self._segments[parent_id]
+
+        self._entries[node_id] = (parent_id, entry)
+
+        if node.get("type") == "group":
+            insort(segment.groups, entry)
+        else:
+            insort(segment.bases, entry)
+            segment.text = None
+
+    def _unplace(self, node_id):
+        placed = self._entries.pop(node_id, None)
+        if placed is None:
+            return
+
+        parent_id, entry = placed
+        segment = self._segments.get(parent_id)
+
+        # Группа родителя уже снята вместе со всем поддеревом
+        if segment is None:
+            return
+
+        entries = segment.groups if entry[0][0] is False else segment.bases
+        index = bisect_left(entries, entry)
+
+        if index < len(entries) and entries[index] == entry:
+            del entries[index]
+
+        if entries is segment.bases:
+            segment.text = None
+
+    # Переименованный узел переставляется на новое место среди соседей
+    def _replace(self, node):
+        node_id = node.get("id")
+        parent_id, entry = self._entries[node_id]
+
+        if entry[0] == display_sort_key(node):
+            return
+
+        self._unplace(node_id)
+        self._place(node, parent_id)
+
+    def _invalidate(self, structure=False):
+        self._last_query = None
+        self._last_hits = None
+
+        if structure:
+            self._quick_table = None
+
+    def on_catalog_change(self, event, node):
+        if event == "rebuild":
+            self._index_all()
+
+        elif event == "add":
+            self._index_subtree(node)
+            self._invalidate(structure=True)
+
+        elif event == "rename":
+            self._replace(node)
+            self._rekey_subtree(node)
+            self._invalidate(structure=True)
+
+        elif event == "remove":
+            self._drop_subtree(node)
+            self._invalidate(structure=True)
+
+        elif event == "update":
+            node_id = node.get("id")
+            parent_id = self._entries[node_id][0]
+            group_path = self.catalog.group_path(parent_id) if parent_id else ""
+            key = self._node_key(node, group_path)
+
+            # last_run и размер в ключ не входят — такие правки индекс не трогают
+            if self.keys.get(node_id) != key:
+                self.keys[node_id] = key
+                self._replace(node)
+                self._segments[parent_id].text = None
+                self._invalidate(structure=True)
+
+    # Обход групп в порядке дерева: группа, её подгруппы, затем её базы.
+    # Останавливается, набрав limit совпадений.
+    def _scan(self, folded, platform_filter, limit):
+        keys = self.keys
+        nodes = self.catalog.nodes
+        segments = self._segments
+        hits = []
+        stack = [(False, None)]
+
+        while stack:
+            bases, group_id = stack.pop()
+            segment = segments[group_id]
+
+            if not bases:
+                if group_id is not None and folded in keys[group_id]:
+                    if len(hits) >= limit:
+                        return hits, True
+
+                    hits.append(group_id)
+
+                stack.append((True, group_id))
+                stack.extend((False, entry[2]) for entry in reversed(segment.groups))
+                continue
+
+            if not segment.bases:
+                continue
+
+            if segment.text is None:
+                segment.build(keys)
+
+            text = segment.text
+            starts = segment.starts
+            ids = segment.ids
+            count = len(starts)
+
+            position = text.find(folded)
+
+            while position != -1:
+                index = bisect_right(starts, position) - 1
+                node_id = ids[index]
+
+                if not platform_filter or platform_matches(nodes[node_id], platform_filter):
+                    if len(hits) >= limit:
+                        return hits, True
+
+                    hits.append(node_id)
+
+                # Одно совпадение на узел — продолжаем со следующего ключа
+                if index + 1 >= count:
+                    break
+
+                position = text.find(folded, starts[index + 1])
+
+        return hits, False
+
+    def search(self, query, platform_filter="", limit=SEARCH_LIMIT):
+        folded = fold_text(query.strip())
+        self.truncated = False
+
+        if not folded:
+            return []
+
+        keys = self.keys
+
+        # При наборе запрос обычно только удлиняется — тогда достаточно
+        # отфильтровать предыдущие совпадения, а не весь каталог. Обрезанный
+        # список для этого не годится: за limit могли остаться совпадения.
+        if (
+            self._last_hits is not None
+            and not self._last_truncated
+            and self._last_filter == platform_filter
+            and folded.startswith(self._last_query)
+        ):
+            hits = [node_id for node_id in self._last_hits if folded in keys[node_id]]
+            truncated = len(hits) > limit
+
+            if truncated:
+                hits = hits[:limit]
+        else:
+            hits, truncated = self._scan(folded, platform_filter, limit)
+
+        self._last_query = folded
+        self._last_filter = platform_filter
+        self._last_hits = hits
+        self._last_truncated = truncated
+        self.truncated = truncated
+
+        result = []
+
+        for fav in self.catalog.favorite_bases():
+            fav_id = fav.get("id")
+            key = keys.get(fav_id) or fold_text(fav.get("name", ""))
+
+            if folded in key and platform_matches(fav, platform_filter):
+                result.append(f"fav_{fav_id}")
+
+        result.extend(hits)
+        return result
+
+    # Таблица кандидатов для быстрого запуска: id баз и две склеенные
+    # строки — имена и "путь группы + имя", уже приведённые к нижнему
+    # регистру, по одной базе на строку. Строится один раз после изменений.
+    def quick_table(self):
+        if self._quick_table is None:
+            catalog = self.catalog
+            group_paths = {}
+            ids = []
+            names = []
+            fulls = []
+
+            for node_id, node in catalog.nodes.items():
+                if node.get("type") != "base":
+                    continue
+
+                parent = catalog.parent_of(node_id)
+                parent_id = parent.get("id") if parent else None
+
+                if parent_id not in group_paths:
+                    group_paths[parent_id] = fold_text(catalog.group_path(parent_id)) if parent_id else ""
+
+                name = fold_text(node.get("name", "")).replace("\n", " ")
+                ids.append(node_id)
+                names.append(name)
+                fulls.append(f"{group_paths[parent_id]} {name}")
+
+            self._quick_table = (ids, _LineTable(names), _LineTable(fulls))
+
+        return self._quick_table
+
+    def fuzzy_search(self, query, limit=30, platform_filter=""):
+        folded = "".join(fold_text(query).split())
+        nodes = self.catalog.nodes
+        ids, names, fulls = self.quick_table()
+
+        if not folded:
+            # Без запроса показываем недавно запускавшиеся базы
+            recent = [
+                (nodes[node_id].get("last_run", ""), node_id) for node_id in ids
+                if nodes[node_id].get("last_run") and platform_matches(nodes[node_id], platform_filter)
+            ]
+            return [node_id for _, node_id in heapq.nlargest(limit, recent)]
+
+        # Грубый отбор регулярным выражением по склеенной строке: строки
+        # без совпадений отсеиваются внутри re, затем точная оценка только
+        # для лучших кандидатов. Совпадение по пути группы ценится ниже.
+        pattern = subsequence_pattern(folded)
+        rough = names.match(pattern, 0)
+        matched = {index for _, index in rough}
+        rough.extend(
+            item for item in fulls.match(pattern, 20)
+            if item[1] not in matched
+        )
+
+        ranked = []
+
+        for _, index in heapq.nlargest(limit * 5, rough):
+            node_id = ids[index]
+            node = nodes[node_id]
+
+            if not platform_matches(node, platform_filter):
+                continue
+
+            text = names.lines[index] if index in matched else fulls.lines[index]
+            score = fuzzy_score(folded, text)
+
+            if score is not None:
+                ranked.append((score, node.get("last_run", ""), node_id))
+
+        ranked.sort(reverse=True)
+        return [node_id for _, _, node_id in ranked[:limit]]
+
+
+# Дети одной группы в порядке отображения: подгруппы и базы отдельно,
+# элементы — (display_sort_key, порядковый номер, id). Ключи баз
+# склеиваются в text при первом поиске после изменения (text = None).
+class _Segment:
+    def __init__(self):
+        self.groups = []
+        self.bases = []
+        self.text = None
+        self.starts = []
+        self.ids = []
+
+    def build(self, keys):
+        self.ids = [entry[2] for entry in self.bases]
+        self.starts = []
+        position = 0
+
+        for node_id in self.ids:
+            self.starts.append(position)
+            position += len(keys[node_id]) + 1
+
+        self.text = KEY_SEPARATOR.join(keys[node_id] for node_id in self.ids)
+
+
+# Набор строк, склеенных через перевод строки, с поиском по регулярному
+# выражению сразу по всему тексту
+class _LineTable:
+    def __init__(self, lines):
+        self.lines = lines
+        self.starts = []
+        position = 0
+
+        for line in lines:
+            self.starts.append(position)
+            position += len(line) + 1
+
+        self.text = "\n".join(lines)
+
+    # (грубая оценка, номер строки) для каждой строки с совпадением;
+    # оценка тем выше, чем короче совпадение и чем ближе оно к началу строки
+    def match(self, pattern, penalty):
+        result = []
+        starts = self.starts
+        last = -1
+
+        for match in pattern.finditer(self.text):
+            start = match.start()
+            index = bisect_right(starts, start) - 1
+
+            if index != last:
+                last = index
+                result.append((start - match.end() - (start - starts[index]) // 4 - penalty, index))
+
+        return result
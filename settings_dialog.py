@@ -2,8 +2,12 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import json
 import os
-import configparser
+import queue
+import threading
 from edit_dialog import center_window
+from persistence import atomic_write_json, load_starter
+from storage import STORAGE_JSON, STORAGE_SQLITE
+from v8i import catalog_connection_keys, iter_v8i_bases, merge_v8i_reports, parse_v8i_files
 import sys
 
 if getattr(sys, "frozen", False):
@@ -12,8 +16,6 @@ else:
     APP_DIR = os.path.dirname(os.path.abspath(__file__))
 
 SETTINGS_PATH = os.path.join(APP_DIR, "settings.json")
-STARTER_JSON = os.path.join(APP_DIR, "starter.json")
-MAIN_GROUP_NAME = "ИНФОРМАЦИОННЫЕ БАЗЫ"
 DEFAULT_V8I = os.path.expandvars("%APPDATA%/1C/1CEStart/ibases.v8i")
 
 def load_settings():
@@ -23,62 +25,20 @@ def load_settings():
     return {"v8i_paths": [DEFAULT_V8I] if os.path.exists(DEFAULT_V8I) else []}
 
 def save_settings(data):
-    with open(SETTINGS_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+    atomic_write_json(SETTINGS_PATH, data)
 
 def parse_v8i_file(path):
-    config = configparser.ConfigParser(strict=False)
-    config.optionxform = str
+    return list(iter_v8i_bases(path))
 
-    for encoding in ("utf-8-sig", "cp1251"):
-        try:
-            with open(path, "r", encoding=encoding) as f:
-                config.read_file(f)
-            break
-        except Exception:
-            continue
-    else:
-        raise RuntimeError(f"Не удалось прочитать {path} ни в utf-8-sig, ни в cp1251")
-
-    bases = []
-    for section in config.sections():
-        entry = config[section]
-        name = entry.get("Name", section)
-        connect = entry.get("Connect", "")
-        connect = connect.strip()
-        folder = entry.get("Folder", "")
-        platform = entry.get("Version", entry.get("DefaultVersion", ""))
-        username = entry.get("Usr", "")
-        password = entry.get("Pwd", "")
-        parameters = entry.get("App", "")
-        interface = "Auto"
-
-        if connect:
-            bases.append({
-                "type": "base",
-                "name": name,
-                "connect": connect,
-                "folder": folder,
-                "platform": platform,
-                "username": username,
-                "password": password,
-                "parameters": parameters,
-                "interface": interface,
-                "auth_mode": "manual" if username else "auto",
-                "auth_os": False,
-                "auth_enterprise": {"username": username, "password": password},
-                "auth_designer": {"username": "", "password": ""},
-                "last_run": "",
-                "size": ""
-            })
-    return bases
-
-def open_settings_dialog(master, reload_callback=None):
+# storage — хранилище каталога (storage.JsonStorage или storage.SqliteStorage)
+# get_catalog() — текущий каталог; импорт .v8i вливается в него в потоке Tk,
+# после чего вызывается on_imported()
+def open_settings_dialog(master, reload_callback=None, on_save=None, storage=None, get_catalog=None, on_imported=None):
     settings = load_settings()
 
     dialog = tk.Toplevel(master)
     dialog.title("Настройки CatStarter")
-    center_window(master, dialog, 600, 400)
+    center_window(master, dialog, 640, 480)
     dialog.grab_set()
 
     notebook = ttk.Notebook(dialog)
@@ -116,121 +76,307 @@ def open_settings_dialog(master, reload_callback=None):
             del current[index]
             paths_var.set(current)
             
+    import_events = queue.Queue()
+
+    # Файлы разбираются в фоновом потоке, окно следит за ходом через after.
+    # Базы добавляются в каталог уже в потоке Tk: сохраняет их обычная
+    # отложенная запись, и правки, сделанные во время разбора, не теряются
     def import_now():
         v8i_paths = get_paths()
         if not v8i_paths:
             messagebox.showinfo("Импорт", "Нет выбранных файлов .v8i")
             return
 
-        if os.path.exists(STARTER_JSON):
-            with open(STARTER_JSON, "r", encoding="utf-8") as f:
-                starter = json.load(f)
+        import_button.configure(state="disabled")
+        import_progress.configure(maximum=len(v8i_paths), value=0)
+        report_tree.delete(*report_tree.get_children())
+
+        skip_keys = frozenset(catalog_connection_keys(get_catalog()))
+
+        def worker():
+            try:
+                reports = parse_v8i_files(
+                    v8i_paths,
+                    skip_keys,
+                    on_progress=lambda report: import_events.put(("file", report))
+                )
+
+                import_events.put(("done", reports))
+
+            except Exception as e:
+                import_events.put(("error", e))
+
+        threading.Thread(target=worker, name="v8i-import", daemon=True).start()
+        master.after(50, poll_import)
+
+    def show_report(report):
+        values = (
+            os.path.basename(report["path"]),
+            report["found"],
+            report["added"],
+            f'{report["seconds"]:.2f} с',
+            report["error"]
+        )
+
+        if report_tree.exists(report["path"]):
+            report_tree.item(report["path"], values=values)
         else:
-            starter = {
-                "favorites": [],
-                "groups": [],
-                "window_geometry": "900x600"
-            }
-
-        existing_connects = set()
-
-        def collect_existing_connects(groups):
-            for g in groups:
-                if g.get("type") == "base":
-                    existing_connects.add(g.get("connect"))
-                elif g.get("type") == "group":
-                    collect_existing_connects(g.get("children", []))
-
-        collect_existing_connects(starter.get("groups", []))
-
-        def add_to_group_path(groups, folder_path, base):
-            if not folder_path or folder_path.strip() in ["/", "\\"]:
-                groups.append(base)
+            report_tree.insert("", "end", iid=report["path"], values=values)
+
+    def poll_import():
+        dialog_alive = dialog.winfo_exists()
+
+        while True:
+            try:
+                kind, payload = import_events.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == "file":
+                if dialog_alive:
+                    show_report(payload)
+                    import_progress.step(1)
+                continue
+
+            if dialog_alive:
+                import_button.configure(state="normal")
+
+            if kind == "done":
+                try:
+                    payload = merge_v8i_reports(get_catalog(), payload)
+                except Exception as e:
+                    kind, payload = "error", e
+
+            if kind == "error":
+                messagebox.showerror("Импорт", f"Импорт не выполнен:\n{payload}")
                 return
 
-            parts = folder_path.split("\\") if "\\" in folder_path else folder_path.split("/")
-            current = groups
+            added_count = sum(report["added"] for report in payload)
+            errors = [report for report in payload if report["error"]]
 
-            for part in parts:
-                part = part.strip()
-                if not part:
-                    continue
+            if dialog_alive:
+                for report in payload:
+                    show_report(report)
 
-                match = next(
-                    (
-                        g for g in current
-                        if g.get("type") == "group" and g.get("name") == part
-                    ),
-                    None
-                )
+            message = f"Импортировано баз: {added_count}"
+            if errors:
+                message += f"\nФайлов с ошибками: {len(errors)}"
 
-                if not match:
-                    match = {
-                        "type": "group",
-                        "name": part,
-                        "children": []
-                    }
-                    current.append(match)
+            messagebox.showinfo("Импорт завершён", message)
 
-                current = match["children"]
+            if on_imported and added_count:
+                on_imported()
+            return
 
-            current.append(base)
+        master.after(50, poll_import)
 
-        added_count = 0
-        for v8i_path in v8i_paths:
-            if not os.path.exists(v8i_path):
-                continue
-            try:
-                imported = parse_v8i_file(v8i_path)
-                for b in imported:
-                    if b["connect"] in existing_connects:
-                        continue
-                    base_entry = {
-                        "type": "base",
-                        "name": b.get("name", ""),
-                        "platform": b.get("platform", ""),
-                        "connect": b.get("connect", ""),
-                        "parameters": b.get("parameters", ""),
-                        "interface": b.get("interface", "Auto"),
-                        "username": b.get("username", ""),
-                        "password": b.get("password", ""),
-                        "auth_mode": b.get("auth_mode", "auto"),
-                        "auth_os": b.get("auth_os", False),
-                        "auth_enterprise": b.get("auth_enterprise", {"username": "", "password": ""}),
-                        "auth_designer": b.get("auth_designer", {"username": "", "password": ""}),
-                        "last_run": "",
-                        "size": ""
-                    }
-                    if not starter.get("groups"):
-                        starter["groups"] = []
-                    v8i_group = next((g for g in starter["groups"] if g.get("name") == MAIN_GROUP_NAME), None)
-                    if not v8i_group:
-                        v8i_group = {"type": "group", "name": MAIN_GROUP_NAME, "children": []}
-                        starter["groups"].append(v8i_group)
-                    add_to_group_path(v8i_group["children"], b.get("folder", ""), base_entry)
-                    existing_connects.add(b["connect"])
-                    added_count += 1
-            except Exception as e:
-                print(f"[!] Ошибка при импорте {v8i_path}: {e}")
+    ttk.Button(frame_import, text="Добавить", command=add_path).grid(row=1, column=0, sticky="ew", padx=5, pady=5)
+    ttk.Button(frame_import, text="Удалить", command=remove_path).grid(row=1, column=1, sticky="ew", padx=5, pady=5)
+
+    import_button = ttk.Button(frame_import, text="Импортировать сейчас", command=import_now)
+    import_button.grid(row=1, column=2, sticky="ew", padx=5, pady=5)
+
+    import_progress = ttk.Progressbar(frame_import, orient="horizontal", mode="determinate")
+    import_progress.grid(row=2, column=0, columnspan=3, sticky="ew", padx=5, pady=(0, 5))
+
+    report_columns = ("file", "found", "added", "time", "error")
+
+    report_tree = ttk.Treeview(frame_import, columns=report_columns, show="headings", height=4)
+    report_tree.heading("file", text="Файл")
+    report_tree.heading("found", text="Найдено")
+    report_tree.heading("added", text="Добавлено")
+    report_tree.heading("time", text="Время")
+    report_tree.heading("error", text="Ошибка")
+
+    report_tree.column("file", width=150)
+    report_tree.column("found", width=70, anchor="e", stretch=False)
+    report_tree.column("added", width=80, anchor="e", stretch=False)
+    report_tree.column("time", width=70, anchor="e", stretch=False)
+    report_tree.column("error", width=200)
+
+    report_tree.grid(row=3, column=0, columnspan=3, sticky="nsew", padx=5, pady=(0, 5))
+
+    sync_frame = ttk.Frame(frame_import)
+    sync_frame.grid(row=4, column=0, columnspan=3, sticky="w", padx=5, pady=(0, 5))
+
+    sync_startup_var = tk.BooleanVar(value=settings.get("v8i_sync_on_startup", False))
+    sync_minutes_var = tk.IntVar(value=settings.get("v8i_sync_minutes", 0))
+
+    ttk.Checkbutton(sync_frame, text="Синхронизировать при запуске", variable=sync_startup_var).pack(side="left")
+    ttk.Label(sync_frame, text="  и каждые").pack(side="left")
+    ttk.Spinbox(sync_frame, from_=0, to=1440, width=5, textvariable=sync_minutes_var).pack(side="left", padx=4)
+    ttk.Label(sync_frame, text="мин. (0 — нет)").pack(side="left")
+
+    frame_storage = ttk.Frame(notebook)
+    notebook.add(frame_storage, text="Хранение")
+
+    compact_json_var = tk.BooleanVar(value=settings.get("compact_json", False))
+
+    ttk.Checkbutton(
+        frame_storage,
+        text="Сохранять starter.json без отступов (быстрее для больших списков)",
+        variable=compact_json_var
+    ).pack(anchor="w", padx=5, pady=(10, 2))
+
+    backend_values = {"Файл starter.json": STORAGE_JSON, "База SQLite starter.db": STORAGE_SQLITE}
+    backend_var = tk.StringVar(value=next(
+        (title for title, value in backend_values.items() if value == settings.get("storage", STORAGE_JSON)),
+        "Файл starter.json"
+    ))
+
+    backend_frame = ttk.Frame(frame_storage)
+    backend_frame.pack(anchor="w", padx=5, pady=(8, 2))
+
+    ttk.Label(backend_frame, text="Список баз хранить в:").pack(side="left")
+    ttk.Combobox(
+        backend_frame,
+        textvariable=backend_var,
+        values=list(backend_values),
+        state="readonly",
+        width=25
+    ).pack(side="left", padx=4)
+
+    ttk.Label(
+        frame_storage,
+        text="SQLite быстрее для списков из десятков тысяч баз. Данные переносятся при выходе, "
+             "новое хранилище используется со следующего запуска.",
+        foreground="#666666",
+        wraplength=560,
+        justify="left"
+    ).pack(anchor="w", padx=5)
+
+    def export_json():
+        path = filedialog.asksaveasfilename(
+            parent=dialog,
+            title="Экспорт списка баз",
+            initialfile="starter.json",
+            defaultextension=".json",
+            filetypes=[("JSON", "*.json")]
+        )
+        if not path:
+            return
 
-        with open(STARTER_JSON, "w", encoding="utf-8") as f:
-            json.dump(starter, f, ensure_ascii=False, indent=4)
+        try:
+            atomic_write_json(path, storage.read())
+        except Exception as e:
+            messagebox.showerror("Экспорт", f"Не удалось сохранить файл:\n{e}", parent=dialog)
+            return
 
-        messagebox.showinfo("Импорт завершён", f"Импортировано баз: {added_count}")
+        messagebox.showinfo("Экспорт", "Список баз сохранён.", parent=dialog)
+
+    def import_json():
+        path = filedialog.askopenfilename(
+            parent=dialog,
+            title="Импорт списка баз",
+            filetypes=[("JSON", "*.json")]
+        )
+        if not path:
+            return
+
+        if not messagebox.askyesno(
+            "Импорт",
+            "Заменить текущий список баз, избранное и наборы данными из файла?",
+            parent=dialog
+        ):
+            return
+
+        try:
+            data = load_starter(path)
+
+            if not isinstance(data.get("groups"), list):
+                raise ValueError("в файле нет списка групп (groups)")
+
+            storage.write(data)
+        except Exception as e:
+            messagebox.showerror("Импорт", f"Не удалось загрузить файл:\n{e}", parent=dialog)
+            return
 
         if reload_callback:
             reload_callback()
-    
-    ttk.Button(frame_import, text="Добавить", command=add_path).grid(row=1, column=0, sticky="ew", padx=5, pady=5)
-    ttk.Button(frame_import, text="Удалить", command=remove_path).grid(row=1, column=1, sticky="ew", padx=5, pady=5)
-    ttk.Button(frame_import, text="Импортировать сейчас", command=import_now).grid(row=1, column=2, sticky="ew", padx=5, pady=5)
+
+    transfer_frame = ttk.Frame(frame_storage)
+    transfer_frame.pack(anchor="w", padx=5, pady=(6, 2))
+
+    ttk.Button(transfer_frame, text="Экспорт в JSON...", command=export_json).pack(side="left")
+    ttk.Button(transfer_frame, text="Импорт из JSON...", command=import_json).pack(side="left", padx=5)
+
+    size_days_frame = ttk.Frame(frame_storage)
+    size_days_frame.pack(anchor="w", padx=5, pady=(8, 2))
+
+    size_days_var = tk.IntVar(value=settings.get("size_refresh_days", 1))
+
+    ttk.Label(size_days_frame, text="Пересчитывать размеры баз раз в").pack(side="left")
+    ttk.Spinbox(size_days_frame, from_=0, to=365, width=5, textvariable=size_days_var).pack(side="left", padx=4)
+    ttk.Label(size_days_frame, text="дн. (0 — при каждом F5)").pack(side="left")
+
+    frame_platform = ttk.Frame(notebook)
+    notebook.add(frame_platform, text="Платформа")
+
+    arch_values = {"Автоматически": "", "64-разрядная (x64)": "x64", "32-разрядная (x86)": "x86"}
+    arch_var = tk.StringVar(value=next(
+        (title for title, value in arch_values.items() if value == settings.get("platform_arch", "")),
+        "Автоматически"
+    ))
+
+    ttk.Label(frame_platform, text="Если установлены обе разрядности, запускать:").pack(anchor="w", padx=5, pady=(10, 2))
+    ttk.Combobox(
+        frame_platform,
+        textvariable=arch_var,
+        values=list(arch_values),
+        state="readonly",
+        width=25
+    ).pack(anchor="w", padx=5)
+
+    ttk.Label(
+        frame_platform,
+        text="Версию базы можно указывать маской (8.3 или 8.3.24) — будет запущена самая новая подходящая.",
+        foreground="#666666",
+        wraplength=420,
+        justify="left"
+    ).pack(anchor="w", padx=5, pady=(8, 0))
+
+    batch_frame = ttk.Frame(frame_platform)
+    batch_frame.pack(anchor="w", padx=5, pady=(12, 2))
+
+    batch_concurrency_var = tk.IntVar(value=settings.get("batch_concurrency", 2))
+    batch_stagger_var = tk.IntVar(value=settings.get("batch_stagger_seconds", 3))
+
+    ttk.Label(batch_frame, text="Групповой запуск: по").pack(side="left")
+    ttk.Spinbox(batch_frame, from_=1, to=20, width=4, textvariable=batch_concurrency_var).pack(side="left", padx=4)
+    ttk.Label(batch_frame, text="баз, пауза").pack(side="left")
+    ttk.Spinbox(batch_frame, from_=0, to=120, width=4, textvariable=batch_stagger_var).pack(side="left", padx=4)
+    ttk.Label(batch_frame, text="с").pack(side="left")
 
     button_frame = ttk.Frame(dialog)
     button_frame.pack(fill="x", padx=10, pady=(0, 10))
 
     def save_and_close():
         settings["v8i_paths"] = get_paths()
+        settings["compact_json"] = compact_json_var.get()
+        settings["storage"] = backend_values.get(backend_var.get(), STORAGE_JSON)
+        settings["platform_arch"] = arch_values.get(arch_var.get(), "")
+        settings["v8i_sync_on_startup"] = sync_startup_var.get()
+
+        try:
+            settings["v8i_sync_minutes"] = max(0, sync_minutes_var.get())
+        except tk.TclError:
+            pass
+
+        try:
+            settings["batch_concurrency"] = max(1, batch_concurrency_var.get())
+            settings["batch_stagger_seconds"] = max(0, batch_stagger_var.get())
+        except tk.TclError:
+            pass
+
+        try:
+            settings["size_refresh_days"] = max(0, size_days_var.get())
+        except tk.TclError:
+            pass
         save_settings(settings)
+
+        if on_save:
+            on_save(settings)
+
         dialog.destroy()
 
     ttk.Button(button_frame, text="Сохранить", command=save_and_close).pack(side="right")
@@ -0,0 +1,326 @@
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from connection import KIND_FILE, parse_connection
+from persistence import atomic_write_json
+
+# Фоновый пересчёт размеров файловых баз.
+#
+# Базы часто лежат на сетевых шарах, и один медленный сервер не должен
+# замораживать окно. Проверки идут в пуле потоков с ограничением числа
+# одновременных обращений к одной шаре и таймаутом на каждый вызов.
+# Результаты складываются в очередь, а поток Tk забирает их через after.
+
+SIZE_MISSING = "missing"
+SIZE_UNREACHABLE = "unreachable"
+SIZE_CANCELLED = "cancelled"
+
+DB_FILE_NAME = "1Cv8.1CD"
+
+SIZE_REFRESH_DAYS = 1
+SIZE_MAX_WORKERS = 8
+SIZE_SHARE_WORKERS = 2
+SIZE_TIMEOUT = 10
+
+
+def format_size(size_bytes):
+    for unit in ["Б", "КБ", "МБ", "ГБ", "ТБ"]:
+        if size_bytes < 1024:
+            return f"{size_bytes:.1f} {unit}"
+
+        size_bytes /= 1024
+
+    return f"{size_bytes:.1f} ПБ"
+
+
+# Каталог файловой базы из строки подключения, None — база не файловая
+def file_base_path(connect):
+    info = parse_connection(connect)
+
+    if info.kind != KIND_FILE:
+        return None
+
+    return info.file or None
+
+
+# Ключ для ограничения параллельности: \\сервер\шара, буква диска или ""
+def share_key(path):
+    normalized = path.replace("/", "\\")
+
+    if normalized.startswith("\\\\"):
+        parts = normalized[2:].split("\\")
+        return "\\\\" + "\\".join(parts[:2]).lower()
+
+    drive, _ = os.path.splitdrive(path)
+    return drive.lower()
+
+
+# Размер считается свежим, если обновлялся не раньше, чем days дней назад.
+# days = 0 — пересчитывать при каждом обновлении.
+def is_size_fresh(node, days, today=None):
+    updated = node.get("size_updated")
+    if not updated or days <= 0:
+        return False
+
+    today = today or datetime.date.today()
+
+    try:
+        updated = datetime.date.fromisoformat(updated)
+    except ValueError:
+        return False
+
+    return (today - updated).days < days
+
+
+# Вызов func(*args) в отдельном потоке с ожиданием не дольше timeout.
+# Зависший вызов к недоступной шаре прервать нельзя, поэтому поток
+# остаётся висеть сам по себе (daemon), а вызывающий получает TimeoutError.
+def call_with_timeout(timeout, func, *args):
+    result = {}
+
+    def target():
+        try:
+            result["value"] = func(*args)
+        except BaseException as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=target, name="size-stat", daemon=True)
+    thread.start()
+    thread.join(timeout)
+
+    if thread.is_alive():
+        raise TimeoutError(f"Нет ответа за {timeout} с")
+
+    if "error" in result:
+        raise result["error"]
+
+    return result["value"]
+
+
+# Кэш результатов stat между запусками (size_cache.json рядом с starter.json):
+# путь к 1Cv8.1CD — size и checked (время последней проверки, epoch).
+# База, проверенная недавно, не перепроверяется, даже если её узел в
+# каталоге потерял дату размера (перенос, повторный импорт).
+class StatCache:
+    def __init__(self, path=None):
+        self.path = path
+        self.files = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+
+                self.files = data.get("files", {})
+
+            except (OSError, ValueError, AttributeError) as e:
+                print(f"[!] Кэш размеров не прочитан: {e}")
+
+    @staticmethod
+    def key(path):
+        return os.path.normcase(os.path.normpath(path))
+
+    # Проверялся ли путь не раньше, чем max_age секунд назад
+    def is_fresh(self, path, max_age, now=None):
+        entry = self.files.get(self.key(path))
+        if entry is None or max_age <= 0:
+            return False
+
+        return (now or time.time()) - entry.get("checked", 0) < max_age
+
+    # Размер файла по одному stat
+    def stat_file(self, path):
+        size = os.stat(path).st_size
+
+        with self._lock:
+            self.files[self.key(path)] = {"size": size, "checked": time.time()}
+            self.dirty = True
+
+        return size
+
+    def base_size(self, path):
+        return self.stat_file(os.path.join(path, DB_FILE_NAME))
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+
+        with self._lock:
+            data = {"files": dict(self.files)}
+            self.dirty = False
+
+        try:
+            atomic_write_json(self.path, data, compact=True)
+        except OSError as e:
+            print(f"[!] Ошибка сохранения кэша размеров: {e}")
+
+
+def measure_base_size(path):
+    return os.stat(os.path.join(path, DB_FILE_NAME)).st_size
+
+
+# Пересчёт размеров для набора баз.
+#   after          — root.after, через него результаты попадают в поток Tk
+#   on_result(id, size_bytes, status) — status: None, SIZE_MISSING, SIZE_UNREACHABLE
+#   on_progress(done, total)
+#   on_done(cancelled)
+#   measure(path)  — размер базы в байтах, по умолчанию размер 1Cv8.1CD
+class SizeRefresher:
+    POLL_MS = 50
+
+    def __init__(
+        self,
+        after,
+        on_result,
+        on_progress=None,
+        on_done=None,
+        max_workers=SIZE_MAX_WORKERS,
+        share_workers=SIZE_SHARE_WORKERS,
+        timeout=SIZE_TIMEOUT,
+        measure=measure_base_size
+    ):
+        self.after = after
+        self.on_result = on_result
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.max_workers = max(1, max_workers)
+        self.share_workers = max(1, share_workers)
+        self.timeout = timeout
+        self.measure = measure
+
+        self._results = queue.Queue()
+        self._cancelled = threading.Event()
+        self._share_locks = {}
+        self._dead_shares = set()
+        self._lock = threading.Lock()
+        self._executor = None
+        self.total = 0
+        self.done = 0
+        self.running = False
+
+    # jobs — список (id базы, каталог базы). Базы с одним и тем же
+    # каталогом (копии, избранное) проверяются одним обращением.
+    def start(self, jobs):
+        by_path = {}
+
+        for base_id, path in jobs:
+            by_path.setdefault(StatCache.key(path), (path, []))[1].append(base_id)
+
+        self.total = len(jobs)
+        self.done = 0
+        self.running = True
+
+        if not jobs:
+            self._finish()
+            return
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(by_path)),
+            thread_name_prefix="size"
+        )
+
+        for path, base_ids in by_path.values():
+            self._executor.submit(self._run_job, base_ids, path)
+
+        self._executor.shutdown(wait=False)
+
+        if self.on_progress:
+            self.on_progress(0, self.total)
+
+        self.after(self.POLL_MS, self._poll)
+
+    # Оставшиеся задачи завершаются без обращения к диску, а результаты
+    # уже зависших вызовов просто не забираются
+    def cancel(self):
+        self._cancelled.set()
+
+        if self.running:
+            self._finish()
+
+    def _share_semaphore(self, key):
+        with self._lock:
+            if key not in self._share_locks:
+                self._share_locks[key] = threading.Semaphore(self.share_workers)
+
+            return self._share_locks[key]
+
+    def _run_job(self, base_ids, path):
+        if self._cancelled.is_set():
+            self._put(base_ids, None, SIZE_CANCELLED)
+            return
+
+        key = share_key(path)
+
+        with self._share_semaphore(key):
+            # Шара уже не ответила раньше — не ждём её таймаут повторно
+            if key in self._dead_shares or self._cancelled.is_set():
+                status = SIZE_CANCELLED if self._cancelled.is_set() else SIZE_UNREACHABLE
+                self._put(base_ids, None, status)
+                return
+
+            try:
+                size_bytes = call_with_timeout(self.timeout, self.measure, path)
+                self._put(base_ids, size_bytes, None)
+
+            except TimeoutError:
+                if key:
+                    self._dead_shares.add(key)
+                self._put(base_ids, None, SIZE_UNREACHABLE)
+
+            except FileNotFoundError:
+                status = SIZE_MISSING if self._share_alive(key) else SIZE_UNREACHABLE
+                self._put(base_ids, None, status)
+
+            except Exception:
+                self._put(base_ids, None, SIZE_UNREACHABLE)
+
+    def _put(self, base_ids, size_bytes, status):
+        for base_id in base_ids:
+            self._results.put((base_id, size_bytes, status))
+
+    # Windows отвечает "файл не найден" и на отсутствующий сервер —
+    # отличаем пропавшую базу от недоступной шары по корню шары
+    def _share_alive(self, key):
+        if not key:
+            return True
+
+        try:
+            return call_with_timeout(self.timeout, os.path.exists, key + os.sep)
+        except Exception:
+            return False
+
+    def _poll(self):
+        if not self.running:
+            return
+
+        while True:
+            try:
+                base_id, size_bytes, status = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            self.done += 1
+
+            if status != SIZE_CANCELLED:
+                self.on_result(base_id, size_bytes, status)
+
+        if self.on_progress:
+            self.on_progress(self.done, self.total)
+
+        if self.done >= self.total:
+            self._finish()
+        else:
+            self.after(self.POLL_MS, self._poll)
+
+    def _finish(self):
+        self.running = False
+
+        if self.on_done:
+            self.on_done(self._cancelled.is_set())
@@ -0,0 +1,406 @@
+import json
+import os
+import queue
+import threading
+
+from catalog import ensure_id
+from persistence import default_starter, format_json
+
+# Совместная работа нескольких копий CatStarter с одним starter.json
+# (например, в общей папке).
+#
+# Версия файла — его отпечаток stat (mtime и размер); счётчик revision
+# внутри растёт с каждой записью. StarterSync помнит версию, от которой
+# произошли данные в памяти (base). Фоновый наблюдатель раз в несколько
+# секунд сверяет stat и, если данные в файле отличаются от base, кладёт
+# его текст в очередь events — окно сливает чужие изменения со своими
+# (merge_starter). Отложенная запись перед заменой файла проверяет, что
+# он не изменился с base; если изменился — пишет не свой снимок, а
+# результат трёхстороннего слияния. Совпадение revision изменением не
+# считается: запись в обход StarterSync его не увеличивает.
+#
+# События в events:
+#   ("external", текст, stamp)         — файл изменён другой копией
+#   ("merged", свой снимок, текст, stamp) — при записи свои изменения
+#                                          слиты с чужими и записаны
+
+WATCH_INTERVAL = 2.0
+
+# Состояние окна у каждой копии своё: при слиянии всегда остаётся своё
+# и не считается изменением данных
+LOCAL_KEYS = ("window_geometry", "open_nodes", "column_widths", "revision")
+
+_MISSING = object()
+
+
+def file_stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+
+    return (st.st_mtime_ns, st.st_size)
+
+
+def read_text(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def parse_starter(text):
+    return json.loads(text) if text else default_starter()
+
+
+def data_changed(merged, theirs):
+    def shared(data):
+        return {key: value for key, value in data.items() if key not in LOCAL_KEYS}
+
+    return shared(merged) != shared(theirs)
+
+
+# Узлы дерева по id: id → (id родителя, поля без children)
+def _flatten(data):
+    nodes = {}
+    order = {}
+    stack = [(None, node) for node in reversed(data.get("groups", []))]
+
+    while stack:
+        parent_id, node = stack.pop()
+        node_id = ensure_id(node)
+
+        if node_id in nodes:
+            continue
+
+        fields = {key: value for key, value in node.items() if key != "children"}
+        nodes[node_id] = (parent_id, fields)
+        order[node_id] = len(order)
+
+        for child in reversed(node.get("children", [])):
+            stack.append((node_id, child))
+
+    return nodes, order
+
+
+# Трёхстороннее слияние значения: чужое берётся, только если своё не менялось
+def _merge_value(base, ours, theirs):
+    if ours == base:
+        return theirs
+
+    return ours
+
+
+def _merge_fields(base, ours, theirs):
+    result = {}
+
+    for key in {**base, **ours, **theirs}:
+        value = _merge_value(base.get(key, _MISSING), ours.get(key, _MISSING), theirs.get(key, _MISSING))
+
+        if value is not _MISSING:
+            result[key] = value
+
+    return result
+
+
+# Трёхстороннее слияние starter.json по id узлов.
+# Поле узла, изменённое только одной стороной, берётся у неё, при
+# конфликте побеждает своя правка. Узел, удалённый одной стороной и
+# изменённый другой, остаётся. Группы, в которые другая сторона добавила
+# узлы, не удаляются; циклы из встречных перемещений разрываются
+# переносом в корень.
+def merge_starter(base, ours, theirs):
+    base_nodes, _ = _flatten(base)
+    our_nodes, our_order = _flatten(ours)
+    their_nodes, their_order = _flatten(theirs)
+
+    merged = {}
+
+    for node_id in {**our_nodes, **their_nodes}:
+        b = base_nodes.get(node_id)
+        o = our_nodes.get(node_id)
+        t = their_nodes.get(node_id)
+
+        if o is None:
+            if b is None or t != b:
+                merged[node_id] = t
+            continue
+
+        if t is None:
+            if b is None or o != b:
+                merged[node_id] = o
+            continue
+
+        b = b or (None, {})
+        merged[node_id] = (
+            _merge_value(b[0], o[0], t[0]),
+            _merge_fields(b[1], o[1], t[1])
+        )
+
+    # Родитель, удалённый одной стороной, возвращается ради своих детей
+    for node_id in list(merged):
+        parent_id = merged[node_id][0]
+
+        while parent_id is not None and parent_id not in merged:
+            parent = our_nodes.get(parent_id) or their_nodes.get(parent_id)
+
+            if parent is None:
+                merged[node_id] = (None, merged[node_id][1])
+                break
+
+            merged[parent_id] = parent
+            parent_id = parent[0]
+
+    for node_id in merged:
+        seen = {node_id}
+        parent_id = merged[node_id][0]
+
+        while parent_id is not None:
+            if parent_id in seen:
+                merged[node_id] = (None, merged[node_id][1])
+                break
+
+            seen.add(parent_id)
+            parent_id = merged[parent_id][0]
+
+    def sort_key(node_id):
+        if node_id in our_order:
+            return (0, our_order[node_id])
+
+        return (1, their_order.get(node_id, 0))
+
+    built = {}
+    children = {}
+
+    for node_id in sorted(merged, key=sort_key):
+        parent_id, fields = merged[node_id]
+        node = dict(fields)
+
+        if node.get("type") == "group":
+            node["children"] = children.setdefault(node_id, [])
+
+        built[node_id] = node
+        children.setdefault(parent_id, []).append(node)
+
+    result = {}
+
+    for key in {**base, **ours, **theirs}:
+        if key in ("groups", "favorites"):
+            continue
+
+        if key in LOCAL_KEYS:
+            value = ours.get(key, theirs.get(key, _MISSING))
+        else:
+            value = _merge_value(base.get(key, _MISSING), ours.get(key, _MISSING), theirs.get(key, _MISSING))
+
+        if value is not _MISSING:
+            result[key] = value
+
+    result["groups"] = children.get(None, [])
+    result["favorites"] = _merge_favorites(base, ours, theirs, built)
+    return result
+
+
+# Избранное — множество id: удалённое хотя бы одной стороной уходит,
+# добавленное любой — остаётся. Файл в старом формате (копии баз)
+# сравнивается по id копий; копия без узла сохраняется для миграции.
+def _favorite_id(fav):
+    return fav.get("id") if isinstance(fav, dict) else fav
+
+
+def _merge_favorites(base, ours, theirs, built):
+    def ids(data):
+        return [_favorite_id(fav) for fav in data.get("favorites", []) if _favorite_id(fav)]
+
+    base_ids = set(ids(base))
+    their_ids = set(ids(theirs))
+    our_ids = set(ids(ours))
+    copies = {
+        fav["id"]: fav for fav in theirs.get("favorites", []) + ours.get("favorites", [])
+        if isinstance(fav, dict) and fav.get("id")
+    }
+
+    result = []
+    seen = set()
+
+    for fav_id in ids(ours) + ids(theirs):
+        if fav_id in seen:
+            continue
+        seen.add(fav_id)
+
+        keep = (fav_id in our_ids and fav_id in their_ids) or fav_id not in base_ids
+        if not keep:
+            continue
+
+        if fav_id in built or fav_id not in copies:
+            result.append(fav_id)
+        else:
+            result.append(copies[fav_id])
+
+    return result
+
+
+class StarterSync:
+    def __init__(self, path, interval=WATCH_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.events = queue.Queue()
+
+        self._lock = threading.Lock()
+        self._base_text = None
+        self._base_stamp = None
+        self._revision = 0
+        self._generation = 0
+        self._merge_base = None
+        self._reported = None
+
+        self._stop = threading.Event()
+        self._thread = None
+
+    # Чтение starter.json с запоминанием его версии как base
+    def load(self):
+        stamp = file_stamp(self.path)
+        text = read_text(self.path)
+        self.rebase(text, stamp)
+        return parse_starter(text)
+
+    # Данные в памяти теперь произошли от text; снимки, сделанные до этого,
+    # устарели и записаны не будут
+    def rebase(self, text, stamp):
+        with self._lock:
+            self._base_text = text
+            self._base_stamp = stamp
+            self._revision = parse_starter(text).get("revision", 0) if text else 0
+            self._generation += 1
+            self._merge_base = None
+
+    def base(self):
+        with self._lock:
+            text = self._base_text
+
+        return parse_starter(text)
+
+    # Событие с этой версией файла уже неактуально: её слили при записи
+    # или файл с тех пор изменился снова
+    def is_stale(self, stamp):
+        with self._lock:
+            if stamp == self._base_stamp:
+                return True
+
+        return file_stamp(self.path) != stamp
+
+    # Метка для снимка в потоке Tk: новый revision и поколение base
+    def stamp_data(self, data):
+        with self._lock:
+            data["revision"] = self._revision + 1
+            return (self._generation, data["revision"])
+
+    # Запись снимка (компактный JSON) из потока записи; token — от stamp_data.
+    # commit(текст) пишет файл; возвращает False, если снимок устарел.
+    def write(self, snapshot, token, commit):
+        generation, revision = token
+
+        with self._lock:
+            if generation != self._generation:
+                return False
+
+            # Пока окно не приняло результат прошлого слияния, снимки
+            # по-прежнему происходят от версии до него — она и есть base
+            # для слияния, а в файле уже лежит слитый текст
+            base_text = self._base_text if self._merge_base is None else self._merge_base
+            theirs_text = None
+
+            if file_stamp(self.path) != self._base_stamp or self._merge_base is not None:
+                theirs_text = read_text(self.path)
+
+                # Данные те же — например, файл скопировали поверх
+                if theirs_text is not None:
+                    theirs = parse_starter(theirs_text)
+
+                    if not data_changed(theirs, parse_starter(base_text)):
+                        theirs_text = None
+
+            if theirs_text is None:
+                commit(snapshot)
+                self._base_text = snapshot
+                self._revision = revision
+            else:
+                merged = merge_starter(parse_starter(base_text), json.loads(snapshot), theirs)
+                merged["revision"] = max(theirs.get("revision", 0), self._revision) + 1
+
+                merged_text = format_json(merged, compact=True)
+                commit(merged_text)
+
+                self._merge_base = base_text
+                self._base_text = merged_text
+                self._revision = merged["revision"]
+
+            self._base_stamp = file_stamp(self.path)
+            self._reported = self._base_stamp
+
+            if theirs_text is not None:
+                self.events.put(("merged", snapshot, merged_text, self._base_stamp))
+
+            return True
+
+    # Запись данных в обход отложенной (импорт из потока): revision растёт
+    # от версии в файле, base не меняется — эта копия, как и остальные,
+    # сольёт запись со своими данными как чужое изменение.
+    # commit(data) пишет файл.
+    def replace(self, data, commit):
+        with self._lock:
+            text = read_text(self.path)
+            current = parse_starter(text) if text else {}
+
+            data["revision"] = max(current.get("revision", 0), self._revision) + 1
+            commit(data)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="starter-watch", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"[!] Не удалось проверить {self.path}: {e}")
+
+    # Один опрос: stat, и только при смене отпечатка — чтение файла
+    def check(self):
+        stamp = file_stamp(self.path)
+
+        with self._lock:
+            if stamp is None or stamp == self._base_stamp or stamp == self._reported:
+                return False
+
+            self._reported = stamp
+            base_text = self._base_text
+
+        text = read_text(self.path)
+
+        if text is None:
+            return False
+
+        try:
+            data = json.loads(text)
+        except ValueError:
+            # Файл дописывается не атомарно — дочитаем на следующем опросе
+            with self._lock:
+                self._reported = None
+            return False
+
+        # Файл переписан теми же данными — запоминаем новый отпечаток
+        if not data_changed(data, parse_starter(base_text)):
+            with self._lock:
+                if self._base_text is base_text:
+                    self._base_stamp = stamp
+            return False
+
+        self.events.put(("external", text, stamp))
+        return True
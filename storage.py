@@ -0,0 +1,590 @@
+import json
+import os
+import sqlite3
+import uuid
+
+from catalog import ensure_id
+from connection import connection_key
+from persistence import DebouncedJsonWriter, atomic_write_json, default_starter, load_starter
+from starter_sync import WATCH_INTERVAL, StarterSync
+
+# Хранилище каталога баз: starter.json или база SQLite.
+#
+# Обе реализации дают один интерфейс, которым пользуются main.py и окно
+# настроек:
+#   load()            — данные для Catalog (словарь в формате starter.json)
+#   attach(catalog)   — подписка на изменения каталога
+#   save(data)        — отложенное сохранение, flush() — немедленное
+#   discard()         — отказ от несохранённых изменений
+#   close(data)       — сохранение при выходе
+#   read() / write()  — чтение и полная запись из фонового потока (импорт .v8i)
+#   record_launch(), record_session() — счётчики запусков базы
+#   sync              — StarterSync для слежения за файлом или None
+#   recovered         — сколько узлов без родительской группы восстановил
+#                       последний load()
+#
+# on_error(исключение) — ошибка отложенного сохранения, вызывается в потоке Tk.
+#
+# JsonStorage переписывает starter.json целиком. SqliteStorage (режим WAL)
+# хранит группы, базы, избранное, состояние окна и статистику запусков в
+# отдельных таблицах и по событиям каталога обновляет только изменённые
+# строки, поэтому правка одной базы в каталоге на десятки тысяч баз не
+# переписывает весь список.
+
+STORAGE_JSON = "json"
+STORAGE_SQLITE = "sqlite"
+
+SAVE_DELAY_MS = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS groups (
+    id TEXT PRIMARY KEY,
+    parent_id TEXT,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bases (
+    id TEXT PRIMARY KEY,
+    parent_id TEXT,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    connect_key TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS favorites (
+    base_id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ui_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS launch_stats (
+    base_id TEXT PRIMARY KEY,
+    last_run TEXT NOT NULL DEFAULT '',
+    launches INTEGER NOT NULL DEFAULT 0,
+    total_seconds INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS groups_parent ON groups (parent_id, position);
+CREATE INDEX IF NOT EXISTS bases_parent ON bases (parent_id, position);
+CREATE INDEX IF NOT EXISTS bases_connect_key ON bases (connect_key);
+CREATE INDEX IF NOT EXISTS bases_platform ON bases (platform);
+"""
+
+# Ключи starter.json, которые хранятся отдельными таблицами
+TREE_KEYS = ("groups", "favorites")
+
+# Группа для баз, чья группа пропала из хранилища
+LOST_BASES_GROUP = "Восстановленные базы"
+
+
+def dump_value(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def connect_sqlite(path):
+    conn = sqlite3.connect(path, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _node_row(node, parent_id, position):
+    node_id = node["id"]
+    data = dump_value({key: value for key, value in node.items() if key not in ("id", "children")})
+
+    if node.get("type") == "group":
+        return "groups", (node_id, parent_id, position, node.get("name", ""), data)
+
+    return "bases", (
+        node_id,
+        parent_id,
+        position,
+        node.get("name", ""),
+        connection_key(node.get("connect", "")),
+        node.get("platform", ""),
+        data
+    )
+
+
+UPSERT = {
+    "groups": "INSERT OR REPLACE INTO groups (id, parent_id, position, name, data) VALUES (?, ?, ?, ?, ?)",
+    "bases": (
+        "INSERT OR REPLACE INTO bases (id, parent_id, position, name, connect_key, platform, data) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)"
+    )
+}
+
+
+def _write_favorites(conn, favorites):
+    conn.execute("DELETE FROM favorites")
+    conn.executemany(
+        "INSERT OR IGNORE INTO favorites (base_id, position) VALUES (?, ?)",
+        [(fav_id, position) for position, fav_id in enumerate(favorites) if isinstance(fav_id, str)]
+    )
+
+
+# Полная запись данных в формате starter.json (импорт, миграция)
+def write_sqlite_data(conn, data):
+    rows = {"groups": [], "bases": []}
+    stack = [(node, None, position) for position, node in enumerate(data.get("groups", []))]
+
+    while stack:
+        node, parent_id, position = stack.pop()
+        ensure_id(node)
+
+        table, row = _node_row(node, parent_id, position)
+        rows[table].append(row)
+
+        if node.get("type") == "group":
+            stack.extend((child, node["id"], index) for index, child in enumerate(node.get("children", [])))
+
+    with conn:
+        conn.execute("DELETE FROM groups")
+        conn.execute("DELETE FROM bases")
+        conn.execute("DELETE FROM ui_state")
+
+        for table, table_rows in rows.items():
+            conn.executemany(UPSERT[table], table_rows)
+
+        _write_favorites(conn, data.get("favorites", []))
+
+        conn.executemany(
+            "INSERT INTO ui_state (key, value) VALUES (?, ?)",
+            [(key, dump_value(value)) for key, value in data.items() if key not in TREE_KEYS]
+        )
+
+
+# recovered — список, куда попадают id узлов с пропавшим родителем
+def read_sqlite_data(conn, recovered=None):
+    nodes = {}
+    children = {}
+
+    for table in ("groups", "bases"):
+        for node_id, parent_id, position, raw in conn.execute(f"SELECT id, parent_id, position, data FROM {table}"):
+            node = json.loads(raw)
+            node["id"] = node_id
+
+            if table == "groups":
+                node["children"] = []
+
+            nodes[node_id] = node
+            children.setdefault(parent_id, []).append((position, node))
+
+    top = []
+    lost = []
+    lost_bases = []
+
+    for parent_id, items in children.items():
+        items.sort(key=lambda item: item[0])
+        parent = nodes.get(parent_id)
+
+        if parent is not None and parent.get("type") == "group":
+            parent["children"].extend(node for _, node in items)
+            continue
+
+        # Группы пропавшей группы поднимаются в корень после своих,
+        # базы собираются в группу LOST_BASES_GROUP
+        for _, node in items:
+            if node.get("type") == "group":
+                (top if parent_id is None else lost).append(node)
+            else:
+                lost_bases.append(node)
+
+            if parent_id is not None and recovered is not None:
+                recovered.append(node["id"])
+
+    if lost_bases:
+        group = next(
+            (node for node in top + lost if node.get("type") == "group" and node.get("name") == LOST_BASES_GROUP),
+            None
+        )
+
+        if group is None:
+            group = {"type": "group", "name": LOST_BASES_GROUP, "children": [], "id": str(uuid.uuid4())}
+            lost.append(group)
+
+        group["children"].extend(lost_bases)
+
+    for base_id, last_run in conn.execute("SELECT base_id, last_run FROM launch_stats"):
+        node = nodes.get(base_id)
+
+        if node is not None and last_run > node.get("last_run", ""):
+            node["last_run"] = last_run
+
+    data = default_starter()
+
+    for key, value in conn.execute("SELECT key, value FROM ui_state"):
+        data[key] = json.loads(value)
+
+    data["groups"] = top + lost
+    data["favorites"] = [row[0] for row in conn.execute("SELECT base_id FROM favorites ORDER BY position")]
+    return data
+
+
+class JsonStorage:
+    kind = STORAGE_JSON
+    recovered = 0
+
+    def __init__(self, path, after, after_cancel, compact=False, watch_seconds=WATCH_INTERVAL, on_error=None):
+        self.path = path
+        self.sync = StarterSync(path, watch_seconds)
+        self.writer = DebouncedJsonWriter(
+            path,
+            after,
+            after_cancel,
+            compact=compact,
+            sync=self.sync,
+            on_error=on_error
+        )
+
+    def load(self):
+        return self.sync.load()
+
+    def attach(self, catalog):
+        pass
+
+    def save(self, data):
+        self.writer.request(data)
+
+    def flush(self):
+        self.writer.flush()
+
+    def discard(self):
+        self.writer.discard()
+
+    def close(self, data):
+        self.sync.stop()
+        self.writer.close(data)
+
+    def set_compact(self, compact):
+        self.writer.compact = compact
+
+    def read(self):
+        return load_starter(self.path)
+
+    def write(self, data):
+        compact = self.writer.compact
+        self.sync.replace(data, lambda data: atomic_write_json(self.path, data, compact))
+
+    def record_launch(self, base_id, date):
+        pass
+
+    def record_session(self, base_id, seconds):
+        pass
+
+
+class SqliteStorage:
+    kind = STORAGE_SQLITE
+    sync = None
+    recovered = 0
+
+    def __init__(self, path, after, after_cancel, delay_ms=SAVE_DELAY_MS, on_error=None):
+        self.path = path
+        self.after = after
+        self.after_cancel = after_cancel
+        self.delay_ms = delay_ms
+        self.on_error = on_error
+
+        self.conn = connect_sqlite(path)
+        self.catalog = None
+
+        self._data = None
+        self._timer = None
+        self._reset_changes()
+        self._favorites = []
+        self._ui = {}
+
+    def _reset_changes(self):
+        self._dirty = set()
+        self._removed = set()
+        self._added = set()
+        self._left = set()
+        self._full = False
+
+    def is_empty(self):
+        return not any(
+            self.conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone()
+            for table in ("groups", "bases", "ui_state")
+        )
+
+    def load(self):
+        recovered = []
+        data = read_sqlite_data(self.conn, recovered)
+        self._remember(data)
+        self._reset_changes()
+
+        # Узлы с пропавшим родителем перенесены — при сохранении
+        # таблицы переписываются целиком
+        self.recovered = len(recovered)
+
+        if recovered:
+            self._full = True
+
+        return data
+
+    def _remember(self, data):
+        self._favorites = list(data.get("favorites", []))
+        self._ui = {key: dump_value(value) for key, value in data.items() if key not in TREE_KEYS}
+
+    def attach(self, catalog):
+        self.catalog = catalog
+        catalog.subscribe(self._on_catalog_event)
+
+        # Каталог при загрузке мог дописать данные (id, миграция избранного)
+        if getattr(catalog, "favorites_migrated", False):
+            self._full = True
+
+    def _on_catalog_event(self, event, node):
+        if event == "rebuild":
+            self._full = True
+            return
+
+        if event == "add":
+            self._added.add(node.get("id"))
+
+        stack = [node]
+
+        while stack:
+            current = stack.pop()
+            node_id = current.get("id")
+
+            if event == "remove":
+                self._removed.add(node_id)
+                self._left.add(node_id)
+                self._dirty.discard(node_id)
+            else:
+                self._removed.discard(node_id)
+                self._dirty.add(node_id)
+
+            # Переименование и правка меняют только сам узел
+            if event in ("add", "remove") and current.get("type") == "group":
+                stack.extend(current.get("children", []))
+
+    def save(self, data):
+        self._data = data
+
+        if self._timer is not None:
+            self.after_cancel(self._timer)
+
+        self._timer = self.after(self.delay_ms, self._on_timer)
+
+    def _on_timer(self):
+        self._timer = None
+
+        try:
+            self._commit()
+        except sqlite3.Error as e:
+            if self.on_error:
+                self.on_error(e)
+            else:
+                print(f"[!] Ошибка сохранения {self.path}: {e}")
+
+    def _commit(self, data=None):
+        data = data if data is not None else self._data
+        self._data = None
+
+        if data is None:
+            return
+
+        if self._full or self.catalog is None:
+            write_sqlite_data(self.conn, data)
+            self._remember(data)
+            self._reset_changes()
+            return
+
+        with self.conn:
+            self._write_rows(data)
+
+    # Только изменённые строки: узлы из событий каталога, избранное
+    # и ключи состояния окна, значения которых поменялись
+    def _write_rows(self, data):
+        conn = self.conn
+
+        # Группы, из которых уходили узлы (удаление, перемещение), —
+        # прежний родитель есть только в старой строке
+        touched = set()
+
+        for table in ("groups", "bases"):
+            for node_id in self._left:
+                row = conn.execute(f"SELECT parent_id FROM {table} WHERE id = ?", (node_id,)).fetchone()
+                if row is not None:
+                    touched.add(row[0])
+
+        if self._removed:
+            removed = [(node_id,) for node_id in self._removed]
+            conn.executemany("DELETE FROM groups WHERE id = ?", removed)
+            conn.executemany("DELETE FROM bases WHERE id = ?", removed)
+
+        positions = {}
+        rows = {"groups": [], "bases": []}
+
+        for node_id in self._dirty:
+            node = self.catalog.get(node_id)
+            if node is None:
+                continue
+
+            parent = self.catalog.parent_of(node_id)
+            parent_id = parent.get("id") if parent is not None else None
+
+            if parent_id not in positions:
+                positions[parent_id] = {
+                    id(child): index for index, child in enumerate(self.catalog.children_of(parent))
+                }
+
+            table, row = _node_row(node, parent_id, positions[parent_id].get(id(node), 0))
+            rows[table].append(row)
+
+        for node_id in self._added:
+            if self.catalog.get(node_id) is not None:
+                parent = self.catalog.parent_of(node_id)
+                touched.add(parent.get("id") if parent is not None else None)
+
+        for table, table_rows in rows.items():
+            conn.executemany(UPSERT[table], table_rows)
+
+        # Позиция в таблице совпадает с индексом в модели. Удаление и
+        # перемещение сдвигают индексы соседей, поэтому в группах, откуда
+        # уходили и куда добавлялись узлы, переписываются разошедшиеся
+        # позиции; правка и переименование порядок не меняют.
+        for parent_id in touched:
+            parent = self.catalog.get(parent_id) if parent_id is not None else None
+
+            if parent_id is not None and parent is None:
+                continue
+
+            order = {child.get("id"): index for index, child in enumerate(self.catalog.children_of(parent))}
+
+            for table in ("groups", "bases"):
+                stored = conn.execute(f"SELECT id, position FROM {table} WHERE parent_id IS ?", (parent_id,))
+                conn.executemany(
+                    f"UPDATE {table} SET position = ? WHERE id = ?",
+                    [(order[node_id], node_id) for node_id, position in stored.fetchall()
+                     if node_id in order and order[node_id] != position]
+                )
+
+        favorites = list(data.get("favorites", []))
+
+        if favorites != self._favorites:
+            _write_favorites(conn, favorites)
+            self._favorites = favorites
+
+        ui = {key: dump_value(value) for key, value in data.items() if key not in TREE_KEYS}
+
+        conn.executemany(
+            "INSERT OR REPLACE INTO ui_state (key, value) VALUES (?, ?)",
+            [(key, value) for key, value in ui.items() if self._ui.get(key) != value]
+        )
+        conn.executemany(
+            "DELETE FROM ui_state WHERE key = ?",
+            [(key,) for key in self._ui if key not in ui]
+        )
+
+        self._ui = ui
+        self._dirty = set()
+        self._removed = set()
+        self._added = set()
+        self._left = set()
+
+    def flush(self):
+        if self._timer is not None:
+            self.after_cancel(self._timer)
+            self._timer = None
+
+        self._commit()
+
+    def discard(self):
+        if self._timer is not None:
+            self.after_cancel(self._timer)
+            self._timer = None
+
+        self._data = None
+        self._reset_changes()
+
+    def close(self, data):
+        try:
+            if self._timer is not None:
+                self.after_cancel(self._timer)
+                self._timer = None
+
+            self._commit(data)
+        finally:
+            self.conn.close()
+
+    def set_compact(self, compact):
+        pass
+
+    # Фоновый поток: своё соединение, sqlite3 не делит его между потоками
+    def read(self):
+        conn = connect_sqlite(self.path)
+
+        try:
+            return read_sqlite_data(conn)
+        finally:
+            conn.close()
+
+    def write(self, data):
+        conn = connect_sqlite(self.path)
+
+        try:
+            write_sqlite_data(conn, data)
+        finally:
+            conn.close()
+
+    def _update_stats(self, sql, params):
+        try:
+            with self.conn:
+                self.conn.execute(sql, params)
+        except sqlite3.Error as e:
+            print(f"[!] Не удалось обновить статистику запусков: {e}")
+
+    def record_launch(self, base_id, date):
+        self._update_stats(
+            "INSERT INTO launch_stats (base_id, last_run, launches) VALUES (?, ?, 1) "
+            "ON CONFLICT (base_id) DO UPDATE SET launches = launches + 1, last_run = MAX(last_run, excluded.last_run)",
+            (base_id, date)
+        )
+
+    def record_session(self, base_id, seconds):
+        self._update_stats(
+            "INSERT INTO launch_stats (base_id, total_seconds) VALUES (?, ?) "
+            "ON CONFLICT (base_id) DO UPDATE SET total_seconds = total_seconds + excluded.total_seconds",
+            (base_id, round(seconds))
+        )
+
+
+# settings.json: storage — "json" (по умолчанию) или "sqlite".
+# Пустая база SQLite при первом запуске заполняется из starter.json.
+def open_storage(settings, json_path, db_path, after, after_cancel, on_error=None):
+    if settings.get("storage") == STORAGE_SQLITE:
+        storage = SqliteStorage(db_path, after, after_cancel, on_error=on_error)
+
+        if storage.is_empty() and os.path.exists(json_path):
+            write_sqlite_data(storage.conn, load_starter(json_path))
+
+        return storage
+
+    return JsonStorage(
+        json_path,
+        after,
+        after_cancel,
+        compact=settings.get("compact_json", False),
+        watch_seconds=settings.get("starter_watch_seconds", WATCH_INTERVAL),
+        on_error=on_error
+    )
+
+
+# Перенос данных в хранилище другого вида при смене настройки storage
+def copy_to_backend(data, kind, json_path, db_path):
+    if kind == STORAGE_SQLITE:
+        conn = connect_sqlite(db_path)
+
+        try:
+            write_sqlite_data(conn, data)
+        finally:
+            conn.close()
+    else:
+        atomic_write_json(json_path, data)
@@ -0,0 +1,111 @@
+from catalog import display_sort_key, ensure_id, platform_matches
+from sizes import SIZE_MISSING, SIZE_UNREACHABLE
+
+# Раскладка дерева баз без Treeview.
+#
+# build_tree_layout превращает каталог в описание дерева для
+# TreeReconciler.sync: родитель → [iid детей] и iid → (текст, значения
+# колонок). Tk здесь не нужен, поэтому раскладку можно строить и мерить
+# отдельно от окна.
+
+FAVORITES_IID = "favorites"
+
+SIZE_STATUS_TEXT = {
+    SIZE_MISSING: "нет файла",
+    SIZE_UNREACHABLE: "недоступна"
+}
+
+
+def size_text(item):
+    status = item.get("size_status")
+
+    if status in SIZE_STATUS_TEXT:
+        return SIZE_STATUS_TEXT[status]
+
+    return item.get("size", "")
+
+
+def base_row(item):
+    return (
+        item.get("name", ""),
+        (item.get("platform", ""), item.get("last_run", ""), size_text(item))
+    )
+
+
+def sort_tree_children(children):
+    return sorted(children, key=display_sort_key)
+
+
+def group_title(catalog, group, platform_filter=""):
+    count = catalog.count_bases(ensure_id(group), platform_filter)
+    return f'{group.get("name", "")} ({count})'
+
+
+def group_has_displayable_children(children, platform_filter=""):
+    for child in children:
+        if child.get("type") == "group":
+            return True
+
+        if child.get("type") == "base" and platform_matches(child, platform_filter):
+            return True
+
+    return False
+
+
+# Возвращает (layout, rows, nodes):
+#   layout — родитель → [iid детей] в порядке отображения
+#   rows   — iid → (текст, значения колонок)
+#   nodes  — iid → узел каталога
+# loaded_groups — группы, содержимое которых выводится; None — все
+# (без ленивой загрузки). У незагруженной группы вместо детей одна
+# заглушка lazy_<id>, чтобы в дереве был виден значок раскрытия.
+def build_tree_layout(catalog, platform_filter="", loaded_groups=None):
+    layout = {"": []}
+    rows = {}
+    nodes = {}
+
+    def insert_item(parent, item):
+        base_id = ensure_id(item)
+        iid = f"fav_{base_id}" if parent == FAVORITES_IID else base_id
+
+        nodes[iid] = item
+        rows[iid] = base_row(item)
+        layout.setdefault(parent, []).append(iid)
+
+    def insert_group(parent, group):
+        group_id = ensure_id(group)
+        children = group.get("children", [])
+
+        nodes[group_id] = group
+        rows[group_id] = (group_title(catalog, group, platform_filter), ())
+        layout.setdefault(parent, []).append(group_id)
+
+        if loaded_groups is None or group_id in loaded_groups:
+            insert_children(group_id, children)
+
+        elif group_has_displayable_children(children, platform_filter):
+            placeholder = f"lazy_{group_id}"
+            rows[placeholder] = ("Загрузка…", ())
+            layout[group_id] = [placeholder]
+
+    def insert_children(parent, children):
+        for child in sort_tree_children(children):
+            if child.get("type") == "group":
+                insert_group(parent, child)
+
+            elif child.get("type") == "base" and platform_matches(child, platform_filter):
+                insert_item(parent, child)
+
+    favorites = [fav for fav in catalog.favorite_bases() if platform_matches(fav, platform_filter)]
+
+    rows[FAVORITES_IID] = (f"★ Избранное ({len(favorites)})", ())
+    layout[""].append(FAVORITES_IID)
+    layout[FAVORITES_IID] = []
+
+    for fav in favorites:
+        insert_item(FAVORITES_IID, fav)
+
+    for group in sort_tree_children(catalog.groups):
+        insert_group("", group)
+
+    return layout, rows, nodes
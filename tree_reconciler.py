@@ -0,0 +1,109 @@
+# Инкрементальное обновление ttk.Treeview.
+#
+# Вместо полного пересоздания дерева сравниваем желаемую раскладку узлов
+# с тем, что уже показано, и выполняем только нужные insert/delete/
+# set_children/item. Выделение, фокус, раскрытие и прокрутка у
+# сохранившихся элементов остаются на месте.
+
+
+class TreeReconciler:
+    def __init__(self, tree):
+        self.tree = tree
+        self.rows = {}
+        self.parents = {}
+        self.children = {}
+
+    def sync(self, layout, rows, open_ids=()):
+        # layout: {parent_iid: [child_iid, ...]} в порядке отображения, корень — ""
+        # rows:   {iid: (text, values)}
+        tree = self.tree
+        removed = [iid for iid in self.rows if iid not in rows]
+        removed_set = set(removed)
+        old_parents = self.parents
+
+        yview = tree.yview()[0] if self.rows else None
+
+        new_parents = {}
+        stack = [""]
+
+        while stack:
+            parent = stack.pop()
+            desired = layout.get(parent, ())
+            current = list(self.children.get(parent, ()))
+
+            for iid in desired:
+                row = rows[iid]
+                old_row = self.rows.get(iid)
+
+                if old_row is None:
+                    text, values = row
+                    tree.insert(
+                        parent,
+                        "end",
+                        iid=iid,
+                        text=text,
+                        values=values,
+                        open=iid in open_ids
+                    )
+                    current.append(iid)
+                    self.rows[iid] = row
+
+                elif old_row != row:
+                    text, values = row
+                    tree.item(iid, text=text, values=values)
+                    self.rows[iid] = row
+
+                new_parents[iid] = parent
+
+                if iid in layout:
+                    stack.append(iid)
+
+            desired = tuple(desired)
+
+            if tuple(current) != desired:
+                tree.set_children(parent, *desired)
+
+            if desired:
+                self.children[parent] = desired
+            else:
+                self.children.pop(parent, None)
+
+        # Узлы, оставшиеся без потомков, больше не числятся родителями
+        for parent in list(self.children):
+            if parent and parent not in layout:
+                del self.children[parent]
+
+        if removed:
+            # Удаляем только верхние из удаляемых: потомки уйдут вместе с ними,
+            # а сохранившиеся элементы к этому моменту уже перенесены.
+            tops = [iid for iid in removed if old_parents.get(iid) not in removed_set]
+            tree.delete(*tops)
+
+            for iid in removed:
+                self.rows.pop(iid, None)
+                self.children.pop(iid, None)
+
+        self.parents = new_parents
+
+        if yview is not None:
+            tree.yview_moveto(yview)
+
+    def update_row(self, iid, text, values):
+        row = (text, tuple(values))
+        old_row = self.rows.get(iid)
+
+        if old_row is None or old_row == row:
+            return False
+
+        self.tree.item(iid, text=text, values=row[1])
+        self.rows[iid] = row
+        return True
+
+    def children_of(self, iid):
+        return self.children.get(iid, ())
+
+    def is_rendered(self, iid):
+        return iid in self.rows
+
+    def rendered_ids(self):
+        return list(self.rows)
@@ -0,0 +1,557 @@
+import codecs
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from catalog import ensure_id
+from connection import connection_key
+from persistence import atomic_write_json
+
+# Потоковый разбор списков информационных баз (*.v8i).
+#
+# Файл читается один раз построчно, базы отдаются по одной по мере
+# чтения секций, так что память не растёт с размером списка.
+#
+# Как и штатный стартер 1С, каждая секция [Имя] — отдельная запись:
+# базы с одинаковым именем в разных папках не склеиваются. Повторный
+# ключ внутри секции перекрывает предыдущий.
+#
+# Повторная синхронизация (plan_v8i_sync / apply_v8i_sync) помнит отпечаток
+# каждого файла и хэши его секций с прошлого раза: неизменённые файлы не
+# читаются, а в группу MAIN_GROUP_NAME попадают только добавленные,
+# изменённые и удалённые секции.
+
+SNIFF_SIZE = 64 * 1024
+
+MAIN_GROUP_NAME = "ИНФОРМАЦИОННЫЕ БАЗЫ"
+V8I_IMPORT_WORKERS = 4
+
+# Поля базы, которые берутся из .v8i и обновляются при синхронизации;
+# остальное (last_run, размер, режим запуска) остаётся пользовательским
+V8I_SYNC_FIELDS = ("name", "connect", "platform", "parameters", "username", "password", "auth_enterprise")
+
+
+# Кодировка по BOM или по первым байтам: UTF-8 без BOM отличаем от
+# cp1251 пробным декодированием начала файла
+def sniff_encoding(head):
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+
+    if head.startswith(codecs.BOM_UTF16_LE) or head.startswith(codecs.BOM_UTF16_BE):
+        return "utf-16"
+
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # Обрезанный на границе буфера многобайтный символ — всё ещё UTF-8
+        if e.start < len(head) - 3:
+            return "cp1251"
+
+    return "utf-8"
+
+
+# digest — hashlib-объект, в который попутно подаются прочитанные байты
+def _iter_lines(path, digest=None):
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_SIZE)
+        encoding = sniff_encoding(head)
+        f.seek(0)
+
+        if encoding == "utf-16":
+            with open(path, "r", encoding="utf-16") as text:
+                for line in text:
+                    if digest is not None:
+                        digest.update(line.encode("utf-8"))
+                    yield line
+            return
+
+        lines = iter(f)
+
+        if encoding == "utf-8-sig":
+            first = next(lines, b"")
+            if digest is not None:
+                digest.update(first)
+            yield first[len(codecs.BOM_UTF8):].decode("utf-8", errors="replace")
+            encoding = "utf-8"
+
+        for raw in lines:
+            if digest is not None:
+                digest.update(raw)
+
+            try:
+                yield raw.decode(encoding)
+            except UnicodeDecodeError:
+                # Склеенный из разных источников файл: строка в другой кодировке
+                yield raw.decode("cp1251" if encoding == "utf-8" else "utf-8", errors="replace")
+
+
+# (имя секции, {ключ: значение}) по порядку следования в файле
+def iter_v8i_sections(path, digest=None):
+    section = None
+    entry = {}
+
+    for line in _iter_lines(path, digest):
+        line = line.strip()
+
+        if not line or line[0] in ";#":
+            continue
+
+        if line[0] == "[" and line[-1] == "]":
+            if section is not None:
+                yield section, entry
+
+            section = line[1:-1]
+            entry = {}
+            continue
+
+        if section is None:
+            continue
+
+        key, separator, value = line.partition("=")
+
+        if separator:
+            entry[key.strip()] = value.strip()
+
+    if section is not None:
+        yield section, entry
+
+
+def v8i_base_record(section, entry):
+    connect = entry.get("Connect", "").strip()
+
+    # Секции без строки подключения — это папки списка
+    if not connect:
+        return None
+
+    username = entry.get("Usr", "")
+    password = entry.get("Pwd", "")
+
+    return {
+        "type": "base",
+        "name": entry.get("Name", section),
+        "connect": connect,
+        "folder": entry.get("Folder", ""),
+        "platform": entry.get("Version", entry.get("DefaultVersion", "")),
+        "username": username,
+        "password": password,
+        "parameters": entry.get("App", ""),
+        "interface": "Auto",
+        "auth_mode": "manual" if username else "auto",
+        "auth_os": False,
+        "auth_enterprise": {"username": username, "password": password},
+        "auth_designer": {"username": "", "password": ""},
+        "last_run": "",
+        "size": ""
+    }
+
+
+def iter_v8i_bases(path):
+    for section, entry in iter_v8i_sections(path):
+        base = v8i_base_record(section, entry)
+
+        if base is not None:
+            yield base
+
+
+# Разбор одного файла для импорта: время и ошибка вместо исключения.
+# Базы читаются потоком; в отчёте остаются только кандидаты на добавление
+# (ключ, база) — без баз, чей ключ есть в skip_keys или уже встретился
+# в этом файле. found — все базы файла.
+def parse_v8i_report(path, skip_keys=frozenset()):
+    report = {"path": path, "bases": [], "found": 0, "added": 0, "seconds": 0.0, "error": ""}
+    start = time.perf_counter()
+    seen = set()
+
+    try:
+        if not os.path.exists(path):
+            raise FileNotFoundError("файл не найден")
+
+        for base in iter_v8i_bases(path):
+            report["found"] += 1
+            key = connection_key(base["connect"])
+
+            if key in skip_keys or key in seen:
+                continue
+
+            seen.add(key)
+            report["bases"].append((key, base))
+
+    except Exception as e:
+        report["error"] = str(e)
+
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+# Индекс (родительская группа, имя) → группа для раскладки баз по папкам
+# без линейного поиска среди соседних групп.
+# add_group(родитель или None, группа) добавляет недостающую группу;
+# по умолчанию — просто в список детей.
+class GroupPathIndex:
+    def __init__(self, groups, add_group=None):
+        self.groups = groups
+        self.add_group = add_group or self._append_group
+        self.index = {}
+
+        stack = [(None, groups)]
+
+        while stack:
+            parent, children = stack.pop()
+
+            for child in children:
+                if child.get("type") == "group":
+                    self.index.setdefault((id(parent), child.get("name")), child)
+                    stack.append((child, child.get("children", [])))
+
+    def _append_group(self, parent, group):
+        children = self.groups if parent is None else parent.setdefault("children", [])
+        children.append(group)
+
+    # Группа по пути вида "/Папка/Подпапка" или "Папка\Подпапка" (None — корень);
+    # недостающие группы создаются
+    def group_for(self, folder_path):
+        parent = None
+
+        if not folder_path or folder_path.strip() in ["/", "\\"]:
+            return None
+
+        parts = folder_path.split("\\") if "\\" in folder_path else folder_path.split("/")
+
+        for part in parts:
+            part = part.strip()
+            if not part:
+                continue
+
+            key = (id(parent), part)
+            group = self.index.get(key)
+
+            if group is None:
+                group = {"type": "group", "name": part, "children": []}
+                self.add_group(parent, group)
+                self.index[key] = group
+
+            parent = group
+
+        return parent
+
+    def children_for(self, folder_path):
+        group = self.group_for(folder_path)
+        return self.groups if group is None else group.setdefault("children", [])
+
+
+# Ключи строк подключения всех баз каталога
+def catalog_connection_keys(catalog):
+    return {
+        connection_key(node.get("connect"))
+        for node in catalog.nodes.values() if node.get("type") == "base"
+    }
+
+
+# Импорт баз из файлов .v8i в группу MAIN_GROUP_NAME.
+#
+# Файлы разбираются параллельно (parse_v8i_files, фоновый поток), а
+# сливаются в каталог (merge_v8i_reports, поток Tk) строго в порядке
+# v8i_paths, так что результат не зависит от того, какой файл прочитался
+# первым. Базы, чья строка подключения (без учёта регистра, кавычек и ";")
+# уже есть в каталоге или встретилась раньше, пропускаются.
+#
+# Слить файл можно только после всех предыдущих, поэтому прочитанный
+# раньше своей очереди файл ждёт в памяти. Чтобы это стоило мало, базы из
+# skip_keys (известные каталогу на момент запуска) и повторы внутри файла
+# отсеиваются ещё при разборе: ждут только кандидаты на добавление.
+#
+# on_progress(отчёт) вызывается по мере разбора файлов. Отчёты по файлам
+# идут в порядке v8i_paths: path, found, added, seconds, error.
+def parse_v8i_files(v8i_paths, skip_keys=frozenset(), on_progress=None, max_workers=V8I_IMPORT_WORKERS):
+    reports = [None] * len(v8i_paths)
+
+    if not v8i_paths:
+        return reports
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(v8i_paths)))) as executor:
+        futures = {
+            executor.submit(parse_v8i_report, path, skip_keys): index
+            for index, path in enumerate(v8i_paths)
+        }
+
+        for future in as_completed(futures):
+            report = future.result()
+            reports[futures[future]] = report
+
+            if on_progress:
+                on_progress({key: value for key, value in report.items() if key != "bases"})
+
+    return reports
+
+
+# Слияние разобранных файлов с каталогом через catalog.add — изменения
+# проходят через события каталога, как правки из окна. Возвращает отчёты
+# без списков баз.
+def merge_v8i_reports(catalog, reports):
+    existing_keys = catalog_connection_keys(catalog)
+    context = {}
+
+    def group_index():
+        if "index" not in context:
+            main_group = next((g for g in catalog.groups if g.get("name") == MAIN_GROUP_NAME), None)
+
+            if main_group is None:
+                main_group = catalog.add({"type": "group", "name": MAIN_GROUP_NAME, "children": []})
+
+            context["main"] = main_group
+            context["index"] = GroupPathIndex(
+                main_group.setdefault("children", []),
+                add_group=lambda parent, group: catalog.add(group, parent or main_group)
+            )
+
+        return context["index"]
+
+    for report in reports:
+        for key, b in report.pop("bases"):
+            if key in existing_keys:
+                continue
+
+            parent = group_index().group_for(b.get("folder", "")) or context["main"]
+            catalog.add(new_base_entry(b), parent)
+            existing_keys.add(key)
+            report["added"] += 1
+
+    return reports
+
+
+def import_v8i_files(catalog, v8i_paths, on_progress=None, max_workers=V8I_IMPORT_WORKERS):
+    skip_keys = frozenset(catalog_connection_keys(catalog))
+    reports = parse_v8i_files(v8i_paths, skip_keys, on_progress, max_workers)
+    return merge_v8i_reports(catalog, reports)
+
+
+def new_base_entry(b):
+    return {
+        "type": "base",
+        "name": b.get("name", ""),
+        "platform": b.get("platform", ""),
+        "connect": b.get("connect", ""),
+        "parameters": b.get("parameters", ""),
+        "interface": b.get("interface", "Auto"),
+        "username": b.get("username", ""),
+        "password": b.get("password", ""),
+        "auth_mode": b.get("auth_mode", "auto"),
+        "auth_os": b.get("auth_os", False),
+        "auth_enterprise": b.get("auth_enterprise", {"username": "", "password": ""}),
+        "auth_designer": b.get("auth_designer", {"username": "", "password": ""}),
+        "last_run": "",
+        "size": ""
+    }
+
+
+# Состояние синхронизации (v8i_sync.json):
+#   {"files": {путь: {"size", "mtime", "hash",
+#                     "sections": {ключ секции: {"hash", "base_id"}}}}}
+def load_v8i_sync_state(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {"files": {}}
+
+    if not isinstance(state.get("files"), dict):
+        state["files"] = {}
+
+    return state
+
+
+def save_v8i_sync_state(path, state):
+    atomic_write_json(path, state, compact=True)
+
+
+def file_fingerprint(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime": st.st_mtime_ns}
+
+
+# Секция узнаётся по ID из списка 1С, а без него — по имени и папке
+def v8i_section_key(section, entry):
+    return entry.get("ID") or f'{section}|{entry.get("Folder", "")}'
+
+
+def v8i_section_hash(section, entry):
+    text = "\n".join(f"{key}={value}" for key, value in sorted(entry.items()))
+    return hashlib.sha1(f"[{section}]\n{text}".encode("utf-8")).hexdigest()
+
+
+# Что поменялось в файлах с прошлой синхронизации. Только чтение файлов
+# и state, поэтому выполняется в фоновом потоке. По каждому пути:
+#   unchanged — файл не менялся (по размеру и mtime или по хэшу содержимого)
+#   added / changed — [(ключ, хэш, запись базы)], removed — [ключ]
+#   error — файл недоступен; его базы не трогаются
+def plan_v8i_sync(v8i_paths, state):
+    files = state.get("files", {})
+    plans = []
+
+    for path in v8i_paths:
+        previous = files.get(path) or {}
+        plan = {
+            "path": path, "error": "", "unchanged": False, "fingerprint": None, "hash": "",
+            "added": [], "changed": [], "removed": []
+        }
+        plans.append(plan)
+
+        try:
+            plan["fingerprint"] = file_fingerprint(path)
+
+            if previous.get("size") == plan["fingerprint"]["size"] and previous.get("mtime") == plan["fingerprint"]["mtime"]:
+                plan["unchanged"] = True
+                continue
+
+            old_sections = previous.get("sections", {})
+            digest = hashlib.sha1()
+            seen = set()
+
+            for section, entry in iter_v8i_sections(path, digest):
+                record = v8i_base_record(section, entry)
+                if record is None:
+                    continue
+
+                key = v8i_section_key(section, entry)
+                unique = key
+                number = 1
+
+                while unique in seen:
+                    number += 1
+                    unique = f"{key}#{number}"
+
+                seen.add(unique)
+                section_hash = v8i_section_hash(section, entry)
+                old = old_sections.get(unique)
+
+                if old is None:
+                    plan["added"].append((unique, section_hash, record))
+                elif old.get("hash") != section_hash:
+                    plan["changed"].append((unique, section_hash, record))
+
+            plan["hash"] = digest.hexdigest()
+            plan["removed"] = [key for key in old_sections if key not in seen]
+
+            # Файл пересохранили без изменений — только новый отпечаток
+            if plan["hash"] == previous.get("hash"):
+                plan["unchanged"] = True
+
+        except Exception as e:
+            plan["error"] = str(e)
+            plan["added"], plan["changed"], plan["removed"] = [], [], []
+
+    return plans
+
+
+# Применяет планы к каталогу (в потоке Tk) и обновляет state.
+# Базы добавляются в группу MAIN_GROUP_NAME по папкам из .v8i; база, чья
+# строка подключения уже есть в этой группе, связывается с секцией, а не
+# дублируется. Удаляются и перемещаются только базы внутри MAIN_GROUP_NAME —
+# перенесённые пользователем в свои группы остаются на месте.
+# Пути, которых больше нет в v8i_paths, забываются без удаления баз.
+# Возвращает {"added", "changed", "removed"}.
+def apply_v8i_sync(catalog, plans, state):
+    files = state.setdefault("files", {})
+    counts = {"added": 0, "changed": 0, "removed": 0}
+    context = {}
+
+    def main_group():
+        if "group" not in context:
+            group = next((g for g in catalog.groups if g.get("name") == MAIN_GROUP_NAME), None)
+
+            if group is None:
+                group = catalog.add({"type": "group", "name": MAIN_GROUP_NAME, "children": []})
+
+            context["group"] = group
+
+        return context["group"]
+
+    def in_main_group(base_id):
+        return catalog.is_descendant(main_group().get("id"), base_id)
+
+    def folder_group(folder):
+        if "index" not in context:
+            root_group = main_group()
+            context["index"] = GroupPathIndex(
+                root_group.setdefault("children", []),
+                add_group=lambda parent, group: catalog.add(group, parent or root_group)
+            )
+
+        return context["index"].group_for(folder) or main_group()
+
+    def known_keys():
+        if "keys" not in context:
+            context["keys"] = {}
+
+            for node_id, node in catalog.nodes.items():
+                if node.get("type") == "base":
+                    key = connection_key(node.get("connect"))
+                    # None — база вне MAIN_GROUP_NAME, её не дублируем и не трогаем
+                    if in_main_group(node_id):
+                        context["keys"].setdefault(key, node_id)
+                    else:
+                        context["keys"].setdefault(key, None)
+
+        return context["keys"]
+
+    def add_base(record):
+        key = connection_key(record["connect"])
+        keys = known_keys()
+
+        if key in keys:
+            return keys[key]
+
+        base = new_base_entry(record)
+        ensure_id(base)
+        catalog.add(base, folder_group(record.get("folder", "")))
+        keys[key] = base["id"]
+        counts["added"] += 1
+        return base["id"]
+
+    for plan in plans:
+        if plan["error"]:
+            continue
+
+        file_state = files.setdefault(plan["path"], {"sections": {}})
+        sections = file_state.setdefault("sections", {})
+
+        for key in plan["removed"]:
+            base_id = sections.pop(key, {}).get("base_id")
+
+            if base_id and catalog.get(base_id) is not None and in_main_group(base_id):
+                catalog.remove(base_id)
+                counts["removed"] += 1
+
+        for key, section_hash, record in plan["changed"]:
+            base_id = sections.get(key, {}).get("base_id")
+
+            if base_id is None or catalog.get(base_id) is None:
+                base_id = add_base(record)
+
+            elif in_main_group(base_id):
+                catalog.update_base(base_id, {field: record[field] for field in V8I_SYNC_FIELDS})
+
+                target = folder_group(record.get("folder", ""))
+                if catalog.parent_of(base_id) is not target:
+                    catalog.move([base_id], target)
+
+                counts["changed"] += 1
+
+            sections[key] = {"hash": section_hash, "base_id": base_id}
+
+        for key, section_hash, record in plan["added"]:
+            sections[key] = {"hash": section_hash, "base_id": add_base(record)}
+
+        file_state.update(plan["fingerprint"] or {})
+
+        if plan["hash"]:
+            file_state["hash"] = plan["hash"]
+
+    planned = {plan["path"] for plan in plans}
+
+    for path in [path for path in files if path not in planned]:
+        del files[path]
+
+    return counts